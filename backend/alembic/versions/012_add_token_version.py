@@ -0,0 +1,26 @@
+"""add token_version to users
+
+Revision ID: 012_token_version
+Revises: 011_avatar_url
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012_token_version'
+down_revision: Union[str, None] = '011_avatar_url'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bumped whenever a user's authorization changes; stale access tokens are rejected
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
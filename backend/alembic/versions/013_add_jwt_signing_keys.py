@@ -0,0 +1,37 @@
+"""add jwt_signing_keys table
+
+Revision ID: 013_jwt_signing_keys
+Revises: 012_token_version
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013_jwt_signing_keys'
+down_revision: Union[str, None] = '012_token_version'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jwt_signing_keys',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('kid', sa.String(64), nullable=False),
+        sa.Column('algorithm', sa.String(10), nullable=False),
+        sa.Column('private_key', sa.Text(), nullable=False),
+        sa.Column('public_key', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('activates_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('retires_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_jwt_signing_keys_kid', 'jwt_signing_keys', ['kid'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_jwt_signing_keys_kid', table_name='jwt_signing_keys')
+    op.drop_table('jwt_signing_keys')
@@ -0,0 +1,75 @@
+"""add one_time_tokens table
+
+Revision ID: 014_one_time_tokens
+Revises: 013_jwt_signing_keys
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+import hashlib
+import hmac
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+from config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014_one_time_tokens'
+down_revision: Union[str, None] = '013_jwt_signing_keys'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def hash_token(purpose: str, token: str) -> str:
+    """Same keyed hash as one_time_tokens.hash_token."""
+    return hmac.new(settings.SECRET_KEY.encode("utf-8"), f"{purpose}:{token}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def upgrade() -> None:
+    op.create_table(
+        'one_time_tokens',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('token_hash', sa.String(64), nullable=False),
+        sa.Column('purpose', sa.String(32), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_one_time_tokens_token_hash', 'one_time_tokens', ['token_hash'], unique=True)
+    op.create_index('ix_one_time_tokens_user_id', 'one_time_tokens', ['user_id'])
+    op.create_index('ix_one_time_tokens_expires_at', 'one_time_tokens', ['expires_at'])
+
+    # Carry over codes and reset links that are still valid
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    seen = set()
+    for purpose, token_column, expires_column in [
+        ('password_reset', 'reset_token', 'reset_token_expires'),
+        ('magic_code', 'magic_link_token', 'magic_link_expires'),
+    ]:
+        rows = bind.execute(
+            sa.text(f"SELECT id, {token_column}, {expires_column} FROM users "
+                    f"WHERE {token_column} IS NOT NULL AND {expires_column} > :now"),
+            {"now": now}
+        ).fetchall()
+        for user_id, token, expires_at in rows:
+            token_hash = hash_token(purpose, token)
+            if token_hash in seen:
+                continue
+            seen.add(token_hash)
+            bind.execute(
+                sa.text("INSERT INTO one_time_tokens (token_hash, purpose, user_id, expires_at) "
+                        "VALUES (:token_hash, :purpose, :user_id, :expires_at)"),
+                {"token_hash": token_hash, "purpose": purpose, "user_id": user_id, "expires_at": expires_at}
+            )
+
+    op.execute("UPDATE users SET reset_token = NULL, reset_token_expires = NULL, "
+               "magic_link_token = NULL, magic_link_expires = NULL")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_one_time_tokens_expires_at', table_name='one_time_tokens')
+    op.drop_index('ix_one_time_tokens_user_id', table_name='one_time_tokens')
+    op.drop_index('ix_one_time_tokens_token_hash', table_name='one_time_tokens')
+    op.drop_table('one_time_tokens')
@@ -0,0 +1,26 @@
+"""add indexes for session sweeping and per-user eviction
+
+Revision ID: 015_session_indexes
+Revises: 014_one_time_tokens
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015_session_indexes'
+down_revision: Union[str, None] = '014_one_time_tokens'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_sessions_expires_at', 'sessions', ['expires_at'])
+    op.create_index('ix_sessions_user_id_created_at', 'sessions', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_user_id_created_at', table_name='sessions')
+    op.drop_index('ix_sessions_expires_at', table_name='sessions')
@@ -0,0 +1,34 @@
+"""add rate_limits table
+
+Revision ID: 016_rate_limits
+Revises: 015_session_indexes
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '016_rate_limits'
+down_revision: Union[str, None] = '015_session_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rate_limits',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('key', sa.String(255), nullable=False),
+        sa.Column('tat', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_rate_limits_key', 'rate_limits', ['key'], unique=True)
+    op.create_index('ix_rate_limits_tat', 'rate_limits', ['tat'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rate_limits_tat', table_name='rate_limits')
+    op.drop_index('ix_rate_limits_key', table_name='rate_limits')
+    op.drop_table('rate_limits')
@@ -0,0 +1,39 @@
+"""add email_outbox table
+
+Revision ID: 017_email_outbox
+Revises: 016_rate_limits
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '017_email_outbox'
+down_revision: Union[str, None] = '016_rate_limits'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'email_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('to_email', sa.String(255), nullable=False),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('html', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_email_outbox_status_next_attempt_at', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_email_outbox_status_next_attempt_at', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,46 @@
+"""add bulk_email_jobs table
+
+Revision ID: 018_bulk_email_jobs
+Revises: 017_email_outbox
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '018_bulk_email_jobs'
+down_revision: Union[str, None] = '017_email_outbox'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bulk_email_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('audience', sa.String(50), nullable=False),
+        sa.Column('project_status', sa.String(50), nullable=True),
+        sa.Column('subject', sa.String(500), nullable=False),
+        sa.Column('message', sa.Text(), nullable=False),
+        sa.Column('locale', sa.String(10), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='queued'),
+        sa.Column('total_recipients', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sent_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_user_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_bulk_email_jobs_status', 'bulk_email_jobs', ['status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bulk_email_jobs_status', table_name='bulk_email_jobs')
+    op.drop_table('bulk_email_jobs')
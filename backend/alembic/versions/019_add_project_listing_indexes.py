@@ -0,0 +1,26 @@
+"""add composite indexes for keyset pagination of project listings
+
+Revision ID: 019_project_listing_indexes
+Revises: 018_bulk_email_jobs
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '019_project_listing_indexes'
+down_revision: Union[str, None] = '018_bulk_email_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_projects_status_created_at_id', 'projects', ['status', 'created_at', 'id'])
+    op.create_index('ix_projects_type_status_created_at', 'projects', ['project_type', 'status', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_type_status_created_at', table_name='projects')
+    op.drop_index('ix_projects_status_created_at_id', table_name='projects')
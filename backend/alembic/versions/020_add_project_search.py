@@ -0,0 +1,41 @@
+"""add full-text search vector, trigger and GIN index to projects
+
+Revision ID: 020_project_search
+Revises: 019_project_listing_indexes
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from text_search import POSTGRES_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '020_project_search'
+down_revision: Union[str, None] = '019_project_listing_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    for statement in POSTGRES_DDL:
+        op.execute(statement)
+
+    # Fill the vector for existing projects
+    op.execute("""
+        UPDATE projects SET search_vector =
+            setweight(to_tsvector('german', search_fold(title)), 'A') ||
+            setweight(to_tsvector('german', search_fold(short_description)), 'B') ||
+            setweight(to_tsvector('german', search_fold(description)), 'C')
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_projects_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS projects_search_vector_trigger ON projects")
+    op.execute("DROP FUNCTION IF EXISTS projects_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS search_fold(text)")
+    op.drop_column('projects', 'search_vector')
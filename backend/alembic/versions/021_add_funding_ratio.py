@@ -0,0 +1,39 @@
+"""add maintained funding_ratio column with a partial index on financing projects
+
+Revision ID: 021_funding_ratio
+Revises: 020_project_search
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from funding import POSTGRES_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '021_funding_ratio'
+down_revision: Union[str, None] = '020_project_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('funding_ratio', sa.Float(), nullable=True))
+    op.execute("""
+        UPDATE projects SET funding_ratio = COALESCE(funding_current, 0) / funding_goal
+        WHERE funding_goal > 0
+    """)
+    for statement in POSTGRES_DDL:
+        op.execute(statement)
+    op.create_index(
+        'ix_projects_financing_funding_ratio', 'projects', ['funding_ratio'],
+        postgresql_where=sa.text("status = 'financing'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_financing_funding_ratio', table_name='projects')
+    op.execute("DROP TRIGGER IF EXISTS projects_funding_ratio_trigger ON projects")
+    op.execute("DROP FUNCTION IF EXISTS projects_funding_ratio_update()")
+    op.drop_column('projects', 'funding_ratio')
@@ -0,0 +1,44 @@
+"""add pledges ledger and striped funding counters
+
+Revision ID: 022_pledges
+Revises: 021_funding_ratio
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '022_pledges'
+down_revision: Union[str, None] = '021_funding_ratio'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pledges',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_pledges_project_id', 'pledges', ['project_id'])
+    op.create_index('ix_pledges_user_id', 'pledges', ['user_id'])
+
+    op.create_table(
+        'funding_shards',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('shard', sa.Integer(), primary_key=True),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('funding_shards')
+    op.drop_index('ix_pledges_user_id', table_name='pledges')
+    op.drop_index('ix_pledges_project_id', table_name='pledges')
+    op.drop_table('pledges')
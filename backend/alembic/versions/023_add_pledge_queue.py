@@ -0,0 +1,38 @@
+"""add pledge submission queue
+
+Revision ID: 023_pledge_queue
+Revises: 022_pledges
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '023_pledge_queue'
+down_revision: Union[str, None] = '022_pledges'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pledge_queue',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('partition', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False, server_default='pending'),
+        sa.Column('pledge_id', sa.Integer(), sa.ForeignKey('pledges.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('applied_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_pledge_queue_partition_status_id', 'pledge_queue', ['partition', 'status', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pledge_queue_partition_status_id', table_name='pledge_queue')
+    op.drop_table('pledge_queue')
@@ -0,0 +1,61 @@
+"""add reward tiers and reservations
+
+Revision ID: 024_reward_tiers
+Revises: 023_pledge_queue
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '024_reward_tiers'
+down_revision: Union[str, None] = '023_pledge_queue'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reward_tiers',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('title', sa.String(255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('amount', sa.Numeric(12, 2), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=True),
+        sa.Column('reserved', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_reward_tiers_project_id', 'reward_tiers', ['project_id'])
+
+    op.create_table(
+        'reward_reservations',
+        sa.Column('id', sa.Integer(), primary_key=True, index=True),
+        sa.Column('tier_id', sa.Integer(), sa.ForeignKey('reward_tiers.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False, server_default='held'),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_reward_reservations_tier_id', 'reward_reservations', ['tier_id'])
+    op.create_index('ix_reward_reservations_user_id', 'reward_reservations', ['user_id'])
+    op.create_index('ix_reward_reservations_status_expires_at', 'reward_reservations', ['status', 'expires_at'])
+
+    for table in ('pledges', 'pledge_queue'):
+        op.add_column(table, sa.Column(
+            'reward_tier_id', sa.Integer(), sa.ForeignKey('reward_tiers.id', ondelete='SET NULL'), nullable=True
+        ))
+
+
+def downgrade() -> None:
+    for table in ('pledge_queue', 'pledges'):
+        op.drop_column(table, 'reward_tier_id')
+    op.drop_index('ix_reward_reservations_status_expires_at', table_name='reward_reservations')
+    op.drop_index('ix_reward_reservations_user_id', table_name='reward_reservations')
+    op.drop_index('ix_reward_reservations_tier_id', table_name='reward_reservations')
+    op.drop_table('reward_reservations')
+    op.drop_index('ix_reward_tiers_project_id', table_name='reward_tiers')
+    op.drop_table('reward_tiers')
@@ -0,0 +1,33 @@
+"""add partial indexes for the project lifecycle scheduler
+
+Revision ID: 025_lifecycle_indexes
+Revises: 024_reward_tiers
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '025_lifecycle_indexes'
+down_revision: Union[str, None] = '024_reward_tiers'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_projects_verified_start_date', 'projects', ['start_date'],
+        postgresql_where=sa.text("status = 'verified'")
+    )
+    op.create_index(
+        'ix_projects_financing_financing_end', 'projects', ['financing_end'],
+        postgresql_where=sa.text("status = 'financing'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_projects_financing_financing_end', table_name='projects')
+    op.drop_index('ix_projects_verified_start_date', table_name='projects')
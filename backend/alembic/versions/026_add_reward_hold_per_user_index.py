@@ -0,0 +1,43 @@
+"""limit backers to one held reservation per reward tier
+
+Revision ID: 026_reward_hold_per_user
+Revises: 025_lifecycle_indexes
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '026_reward_hold_per_user'
+down_revision: Union[str, None] = '025_lifecycle_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing duplicate holds: keep each backer's newest, return the others' units
+    op.execute("""
+        WITH released AS (
+            UPDATE reward_reservations r SET status = 'released'
+            WHERE r.status = 'held' AND EXISTS (
+                SELECT 1 FROM reward_reservations newer
+                WHERE newer.tier_id = r.tier_id AND newer.user_id = r.user_id
+                  AND newer.status = 'held' AND newer.id > r.id
+            )
+            RETURNING r.tier_id
+        )
+        UPDATE reward_tiers t SET reserved = t.reserved - released.count
+        FROM (SELECT tier_id, count(*) AS count FROM released GROUP BY tier_id) released
+        WHERE t.id = released.tier_id
+    """)
+    op.create_index(
+        'uq_reward_reservations_held_tier_user', 'reward_reservations', ['tier_id', 'user_id'],
+        unique=True, postgresql_where=sa.text("status = 'held'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_reward_reservations_held_tier_user', table_name='reward_reservations')
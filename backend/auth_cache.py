@@ -0,0 +1,124 @@
+"""
+Per-process cache of verified access tokens -> user snapshots.
+
+Lets ``get_current_user`` skip JWT verification and the ``users`` lookup for
+tokens it has already seen. Entries never outlive the token they belong to
+and are dropped whenever the user's row changes (deactivation, password
+change, profile edits), on logout, and when another worker publishes an
+invalidation for the user.
+
+It also caches each user's ``token_version`` so stateless principals can be
+validated without loading the user row.
+"""
+import time
+from typing import Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from cache import TTLCache
+from config import settings
+from metrics import register_collector
+import invalidation
+import models
+
+USERS_TOPIC = "users"
+
+user_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    default_ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+# user_id -> current token_version, used to validate stateless principals
+token_version_cache = TTLCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    default_ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
+
+USER_COLUMNS = [attr.key for attr in inspect(models.User).column_attrs]
+
+
+def get_user(db: Session, token: str) -> Optional[models.User]:
+    """Return the cached user for ``token`` attached to ``db``, or None on a miss."""
+    snapshot = user_cache.get(token)
+    if snapshot is None:
+        return None
+
+    user = models.User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def put_user(token: str, user: models.User, token_expires_at: float) -> None:
+    """Cache a snapshot of ``user`` for ``token`` until at most the token's expiry."""
+    ttl = min(settings.AUTH_CACHE_TTL_SECONDS, token_expires_at - time.time())
+    snapshot = {key: getattr(user, key) for key in USER_COLUMNS}
+    user_cache.set(token, snapshot, ttl)
+
+
+def get_token_version(db: Session, user_id: int) -> Optional[int]:
+    """Return the user's current token_version, or None if the user does not exist."""
+    version = token_version_cache.get(user_id)
+    if version is not None:
+        return version
+
+    row = db.query(models.User.token_version).filter(models.User.id == user_id).first()
+    if row is None:
+        return None
+
+    version = row.token_version or 0
+    token_version_cache.set(user_id, version)
+    return version
+
+
+def remember_token_version(user_id: int, version: int) -> None:
+    """Seed the version cache when a token is issued, so its first use needs no lookup."""
+    token_version_cache.set(user_id, version)
+
+
+def invalidate_users(user_ids) -> None:
+    """Drop cached entries for ``user_ids`` in this and all other workers."""
+    user_ids = sorted({int(user_id) for user_id in user_ids})
+    if user_ids:
+        invalidation.publish(USERS_TOPIC, {"user_ids": user_ids})
+
+
+def clear() -> None:
+    """Drop everything cached in this worker."""
+    user_cache.clear()
+    token_version_cache.clear()
+
+
+def _on_users_invalidated(payload: dict) -> None:
+    if payload.get("all"):
+        clear()
+        return
+    user_ids = set(payload.get("user_ids", []))
+    user_cache.delete_where(lambda token, snapshot: snapshot["id"] in user_ids)
+    for user_id in user_ids:
+        token_version_cache.delete(user_id)
+
+
+invalidation.subscribe(USERS_TOPIC, _on_users_invalidated)
+register_collector("auth_cache", user_cache.stats)
+register_collector("token_version_cache", token_version_cache.stats)
+
+
+# Any committed change to a users row invalidates its cached snapshots
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.User) and obj.id is not None:
+            if obj in session.deleted or session.is_modified(obj, include_collections=False):
+                changed.add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    changed = session.info.pop("changed_user_ids", None)
+    if changed:
+        invalidate_users(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
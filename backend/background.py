@@ -0,0 +1,103 @@
+"""
+Periodic background tasks run in daemon threads of each worker process.
+
+Tasks are registered at startup and are not started in test mode; tests call
+the underlying functions directly.
+"""
+import os
+import threading
+import time
+from typing import Callable
+from metrics import register_collector
+
+
+class PeriodicTask:
+    """Runs ``fn`` every ``interval_seconds`` until stopped."""
+
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], object]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.last_result = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self.run_once()
+
+    def wake(self) -> None:
+        """Run the task now instead of at the end of the current interval."""
+        self._wake.set()
+
+    def run_once(self) -> None:
+        started = time.monotonic()
+        try:
+            self.last_result = self.fn()
+        except Exception as e:
+            self.failures += 1
+            print(f"Background task '{self.name}' failed: {e}", flush=True)
+        finally:
+            self.runs += 1
+            self.last_duration = time.monotonic() - started
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"task-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "runs": self.runs,
+            "failures": self.failures,
+            "last_duration_seconds": round(self.last_duration, 4),
+            "last_result": self.last_result if isinstance(self.last_result, (int, float, str, dict)) else None,
+        }
+
+
+_tasks: dict[str, PeriodicTask] = {}
+
+
+def register_task(name: str, interval_seconds: float, fn: Callable[[], object]) -> PeriodicTask:
+    """Register a periodic task; it runs once ``start()`` is called."""
+    task = PeriodicTask(name, interval_seconds, fn)
+    _tasks[name] = task
+    return task
+
+
+def start() -> None:
+    if os.environ.get("TESTING") == "true":
+        return
+    for task in _tasks.values():
+        task.start()
+
+
+def wake(name: str) -> None:
+    """Wake a registered task early; no-op if it is not registered."""
+    task = _tasks.get(name)
+    if task is not None:
+        task.wake()
+
+
+def stop() -> None:
+    for task in _tasks.values():
+        task.stop()
+
+
+register_collector("background_tasks", lambda: {name: task.stats() for name, task in _tasks.items()})
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark login throughput (password verifications per second) per core.
+
+For each hashing setting a hash is created once, then verified repeatedly
+through the process pool with N workers for a fixed duration. Throughput
+per core is total verifications / seconds / workers.
+
+Usage (from backend/):
+    python benchmarks/bench_password_hashing.py --workers 4 --seconds 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.Settings requires these; the benchmark never touches the DB or email
+for key, value in {
+    "DATABASE_URL": "sqlite://",
+    "SECRET_KEY": "benchmark",
+    "RESEND_API_KEY": "benchmark",
+    "FROM_EMAIL": "bench@example.com",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from config import settings  # noqa: E402
+import password_hashing  # noqa: E402
+
+SETTINGS = [
+    ("bcrypt cost 10", {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": 10}),
+    ("bcrypt cost 12", {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": 12}),
+    ("bcrypt cost 13", {"PASSWORD_HASH_SCHEME": "bcrypt", "BCRYPT_ROUNDS": 13}),
+    ("argon2id t=2 m=19MiB", {"PASSWORD_HASH_SCHEME": "argon2id", "ARGON2_TIME_COST": 2, "ARGON2_MEMORY_COST_KIB": 19456}),
+    ("argon2id t=3 m=64MiB", {"PASSWORD_HASH_SCHEME": "argon2id", "ARGON2_TIME_COST": 3, "ARGON2_MEMORY_COST_KIB": 65536}),
+]
+
+
+def run(label: str, overrides: dict, workers: int, seconds: float) -> None:
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    settings.PASSWORD_HASH_WORKERS = workers
+
+    password = "CorrectHorseBatteryStaple1!"
+    hashed = password_hashing.hash_password(password)
+
+    executor = password_hashing._get_executor()
+    # Warm up every worker process
+    list(executor.map(password_hashing._verify, [password] * workers, [hashed] * workers))
+
+    completed = 0
+    in_flight = []
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        while len(in_flight) < workers * 2:
+            in_flight.append(executor.submit(password_hashing._verify, password, hashed))
+        in_flight.pop(0).result()
+        completed += 1
+    for future in in_flight:
+        future.result()
+        completed += 1
+    elapsed = time.perf_counter() - started
+
+    total = completed / elapsed
+    print(f"{label:<24} {total:>10.1f} {total / workers:>14.1f} {1000 * workers / total:>12.1f}")
+    password_hashing.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"Pool workers: {args.workers}, duration per setting: {args.seconds}s")
+    print(f"{'setting':<24} {'logins/s':>10} {'logins/s/core':>14} {'ms/login':>12}")
+    for label, overrides in SETTINGS:
+        run(label, overrides, args.workers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
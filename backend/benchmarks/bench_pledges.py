@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent pledges to a single project.
+
+N writer threads pledge 1.00 to the same project for a fixed duration using
+each strategy, then the benchmark checks the final total against the number
+of committed pledges:
+
+- read-modify-write: load the project, add in Python, commit (the old way;
+  loses updates under concurrency)
+- atomic update: UPDATE projects SET funding_current = funding_current + x
+  (correct, but every writer queues on the one project row lock)
+- sharded: pledges.add_pledge() spreads writers over FUNDING_SHARDS rows,
+  then pledges.compact() folds them into funding_current
+
+- queued: pledge_queue.enqueue() only inserts a queue entry; the writers'
+  figure is the accepted rate, and the table below it shows how fast 1, 2,
+  4, ... partition consumers apply a backlog spread over --projects projects
+
+Row-lock contention and consumer scaling only show on PostgreSQL; SQLite serialises all writers
+on its database lock. Point --database-url at a scratch database, because
+its tables are dropped and recreated.
+
+Usage (from backend/):
+    python benchmarks/bench_pledges.py --database-url postgresql://.../bench --writers 32 --seconds 5 --consumers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.Settings requires these; the benchmark uses its own engine and never sends email
+for key, value in {
+    "DATABASE_URL": "sqlite://",
+    "SECRET_KEY": "benchmark",
+    "RESEND_API_KEY": "benchmark",
+    "FROM_EMAIL": "bench@example.com",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from sqlalchemy import create_engine, insert, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from config import settings  # noqa: E402
+from database import Base  # noqa: E402
+import models  # noqa: E402
+import pledges  # noqa: E402
+import pledge_queue  # noqa: E402
+
+AMOUNT = Decimal("1.00")
+
+
+def read_modify_write(db, project_id):
+    project = db.get(models.Project, project_id)
+    project.funding_current = (project.funding_current or 0) + AMOUNT
+    db.commit()
+
+
+def atomic_update(db, project_id):
+    db.execute(
+        update(models.Project).where(models.Project.id == project_id).values(
+            funding_current=models.Project.funding_current + AMOUNT
+        )
+    )
+    db.commit()
+
+
+def sharded(db, project_id):
+    pledges.add_pledge(db, project_id, None, AMOUNT)
+    db.commit()
+
+
+def queued(db, project_id):
+    pledge_queue.enqueue(db, project_id, None, AMOUNT)
+    db.commit()
+
+
+STRATEGIES = [
+    ("read-modify-write", read_modify_write),
+    ("atomic update", atomic_update),
+    ("sharded", sharded),
+    ("queued", queued),
+]
+
+
+def setup(SessionFactory, projects: int = 1) -> list[int]:
+    db = SessionFactory()
+    owner = models.User(email="bench@example.com", hashed_password="x", full_name="Bench", profile_slug="bench")
+    db.add(owner)
+    db.flush()
+    rows = [
+        models.Project(
+            owner_id=owner.id, title=f"Bench {i}", slug=f"bench-{i}", status="financing",
+            funding_goal=1000000, funding_current=0
+        )
+        for i in range(projects)
+    ]
+    db.add_all(rows)
+    db.commit()
+    project_ids = [project.id for project in rows]
+    db.close()
+    return project_ids
+
+
+def run(label, write, engine, writers, seconds):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    project_id = setup(SessionFactory)[0]
+
+    committed = [0] * writers
+    retries = [0] * writers
+    deadline = time.perf_counter() + seconds
+
+    def writer(index):
+        db = SessionFactory()
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    write(db, project_id)
+                    committed[index] += 1
+                except OperationalError:
+                    # SQLite "database is locked"
+                    db.rollback()
+                    retries[index] += 1
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    db = SessionFactory()
+    pledge_queue.consume(db, pledge_queue.partition_of(project_id))
+    compaction = time.perf_counter()
+    pledges.compact(db)
+    compaction = time.perf_counter() - compaction
+    total = db.get(models.Project, project_id).funding_current
+    db.close()
+
+    pledged = sum(committed)
+    lost = pledged - int(total)
+    print(f"{label:<20} {pledged / elapsed:>10.1f} {lost:>8} {sum(retries):>8} {compaction * 1000:>14.1f}")
+
+
+def drain(engine, consumers, projects, entries):
+    """Time ``consumers`` partition consumers applying ``entries`` queued pledges."""
+    settings.PLEDGE_QUEUE_PARTITIONS = consumers
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    SessionFactory = sessionmaker(bind=engine, autoflush=False)
+    project_ids = setup(SessionFactory, projects)
+
+    with engine.begin() as connection:
+        connection.execute(insert(models.QueuedPledge), [
+            {"project_id": project_id, "amount": AMOUNT, "status": "pending",
+             "partition": pledge_queue.partition_of(project_id)}
+            for project_id in (project_ids[i % projects] for i in range(entries))
+        ])
+
+    applied = [0] * consumers
+
+    def consumer(partition):
+        db = SessionFactory()
+        try:
+            applied[partition] = pledge_queue.consume(db, partition, settings.PLEDGE_QUEUE_BATCH_SIZE)
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=consumer, args=(p,)) for p in range(consumers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"{consumers:<20} {sum(applied) / elapsed:>10.1f} {entries - sum(applied):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--consumers", type=int, default=4, help="Largest queue consumer count to measure")
+    parser.add_argument("--projects", type=int, default=64, help="Projects the queued backlog is spread over")
+    parser.add_argument("--entries", type=int, default=20000, help="Queued pledges per consumer run")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_pledges.db')}"
+    connect_args = {"check_same_thread": False, "timeout": 30} if url.startswith("sqlite") else {}
+    engine = create_engine(url, pool_size=args.writers + 2, connect_args=connect_args)
+
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}, writers: {args.writers}, duration: {args.seconds}s")
+    print(f"{'strategy':<20} {'pledges/s':>10} {'lost':>8} {'retries':>8} {'compaction ms':>14}")
+    for label, write in STRATEGIES:
+        run(label, write, engine, args.writers, args.seconds)
+
+    print(f"\n{'queue consumers':<20} {'applied/s':>10} {'left':>8}")
+    consumers = 1
+    while consumers <= args.consumers:
+        drain(engine, consumers, args.projects, args.entries)
+        consumers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Admin bulk notifications.
+
+An admin creates a job for an audience and the ``bulk_email`` background task
+sends it. Recipients are streamed with keyset pagination on ``users.id`` in
+chunks of ``EMAIL_BULK_CHUNK_SIZE``, so memory stays flat for any audience
+size. Each chunk is rendered from the precompiled ``notification`` template,
+handed to the transport's batch call and paced to
+``EMAIL_BULK_RATE_PER_SECOND``.
+
+Progress and the resume cursor are committed after every chunk. A running job
+without a heartbeat for ``EMAIL_BULK_STALE_SECONDS`` (its worker died) is
+claimed again and continues where it stopped. Messages the provider rejects
+are handed to the email outbox, which retries them with backoff.
+"""
+import html
+import time
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query, Session
+from config import settings
+from database import SessionLocal
+from email_templates import Safe, registry, text_to_html
+from email_transport import get_transport
+import background
+import email_outbox
+import models
+
+AUDIENCES = ("all_users", "starters", "backers")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+WORKER_TASK = "bulk_email"
+
+
+def audience_query(db: Session, audience: str, project_status: Optional[str] = None) -> Query:
+    """Active recipients of ``audience`` as (id, email, full_name) rows."""
+    query = db.query(models.User.id, models.User.email, models.User.full_name).filter(
+        models.User.is_active.is_(True)
+    )
+
+    if audience == "starters":
+        projects = db.query(models.Project.id).filter(models.Project.owner_id == models.User.id)
+        if project_status:
+            projects = projects.filter(models.Project.status == project_status)
+        query = query.filter(projects.exists())
+    elif audience == "backers":
+        backed = db.query(models.Pledge.id).filter(models.Pledge.user_id == models.User.id)
+        if project_status:
+            backed = backed.join(models.Project, models.Project.id == models.Pledge.project_id).filter(
+                models.Project.status == project_status
+            )
+        query = query.filter(backed.exists())
+    elif audience != "all_users":
+        raise ValueError(f"Unknown audience '{audience}'")
+
+    return query
+
+
+def create_job(
+    db: Session,
+    created_by: int,
+    audience: str,
+    subject: str,
+    message: str,
+    project_status: Optional[str] = None,
+    locale: Optional[str] = None
+) -> models.BulkEmailJob:
+    job = models.BulkEmailJob(
+        created_by=created_by,
+        audience=audience,
+        project_status=project_status,
+        subject=subject,
+        message=message,
+        locale=locale,
+        status=STATUS_QUEUED,
+        total_recipients=audience_query(db, audience, project_status).count()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    background.wake(WORKER_TASK)
+    return job
+
+
+def iter_recipient_chunks(db: Session, job: models.BulkEmailJob, chunk_size: int) -> Iterator[list]:
+    """Yield recipients after the job's cursor, one chunk at a time."""
+    last_user_id = job.last_user_id
+    while True:
+        rows = audience_query(db, job.audience, job.project_status).filter(
+            models.User.id > last_user_id
+        ).order_by(models.User.id).limit(chunk_size).all()
+        if not rows:
+            return
+
+        yield rows
+        last_user_id = rows[-1].id
+        if len(rows) < chunk_size:
+            return
+
+
+def _claimable(now: datetime):
+    stale = now - timedelta(seconds=settings.EMAIL_BULK_STALE_SECONDS)
+    return or_(
+        models.BulkEmailJob.status == STATUS_QUEUED,
+        and_(models.BulkEmailJob.status == STATUS_RUNNING, models.BulkEmailJob.heartbeat_at < stale)
+    )
+
+
+def claim_next_job(db: Session) -> Optional[int]:
+    """Atomically move the oldest queued (or stale) job to running."""
+    now = datetime.utcnow()
+    candidate = db.query(models.BulkEmailJob.id).filter(_claimable(now)).order_by(models.BulkEmailJob.id).first()
+    if candidate is None:
+        return None
+
+    claimed = db.query(models.BulkEmailJob).filter(
+        models.BulkEmailJob.id == candidate.id,
+        _claimable(now)
+    ).update({
+        "status": STATUS_RUNNING,
+        "heartbeat_at": now,
+        "started_at": func.coalesce(models.BulkEmailJob.started_at, now),
+    }, synchronize_session=False)
+    db.commit()
+    return candidate.id if claimed else None
+
+
+def run_job(db: Session, job_id: int) -> int:
+    """Send a claimed job to the rest of its audience; returns messages sent."""
+    job = db.get(models.BulkEmailJob, job_id)
+    _, body = registry.get("notification", job.locale)
+    # Static per job, so escaped once rather than per recipient
+    values = {
+        "subject": Safe(html.escape(job.subject)),
+        "message": text_to_html(job.message),
+    }
+    subject = job.subject
+    seconds_per_message = 1.0 / settings.EMAIL_BULK_RATE_PER_SECOND if settings.EMAIL_BULK_RATE_PER_SECOND > 0 else 0.0
+    transport = get_transport()
+    sent_total = 0
+
+    try:
+        for chunk in iter_recipient_chunks(db, job, settings.EMAIL_BULK_CHUNK_SIZE):
+            started = time.monotonic()
+            payloads = [{
+                "from": settings.FROM_EMAIL,
+                "to": [row.email],
+                "subject": subject,
+                "html": body.render({**values, "name": f" {row.full_name}" if row.full_name else ""}, escape=True),
+            } for row in chunk]
+
+            try:
+                errors = transport.send_batch(payloads)
+            except Exception as e:
+                errors = [e] * len(payloads)
+
+            failed = 0
+            for payload, error in zip(payloads, errors):
+                if error is not None:
+                    email_outbox.enqueue(db, payload["to"][0], payload["subject"], payload["html"])
+                    failed += 1
+
+            job.sent_count += len(chunk) - failed
+            job.failed_count += failed
+            job.last_user_id = chunk[-1].id
+            job.heartbeat_at = datetime.utcnow()
+            db.commit()
+            sent_total += len(chunk) - failed
+
+            remaining = len(chunk) * seconds_per_message - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+        job.status = STATUS_COMPLETED
+        job.finished_at = datetime.utcnow()
+    except Exception as e:
+        db.rollback()
+        job.status = STATUS_FAILED
+        job.last_error = str(e)
+        job.finished_at = datetime.utcnow()
+        print(f"Bulk email job {job_id} failed: {e}", flush=True)
+    db.commit()
+    return sent_total
+
+
+def run_pending_jobs() -> int:
+    db = SessionLocal()
+    try:
+        sent = 0
+        while (job_id := claim_next_job(db)) is not None:
+            sent += run_job(db, job_id)
+        return sent
+    finally:
+        db.close()
@@ -0,0 +1,251 @@
+"""
+Bulk import of users and projects (migrations from the legacy platform).
+
+The upload is read row by row as NDJSON or CSV and validated against
+``UserImport`` / ``ProjectImport``. Valid rows are handled in chunks of
+``IMPORT_CHUNK_SIZE``, each in its own transaction:
+
+- duplicates (emails, explicit slugs) are found with one ``IN`` query per
+  chunk, and missing slugs are allocated with ``next_free_slugs``
+- user passwords are hashed in the password hashing process pool
+- rows are written with one multi-row ``INSERT ... RETURNING id``
+
+A bad row (including invalid UTF-8) is reported with its row number and
+skipped; it never aborts the import. CSV is the exception: after a line the
+csv module cannot parse, the rest of the file is reported as skipped. If a chunk hits a unique constraint (a concurrent signup took an
+email or slug after the checks), it is retried row by row to find and
+report the conflicting rows.
+
+Core inserts bypass the ORM events, so the import publishes the changes
+itself: new projects on the projects topic (listings, typeahead) and owners
+who became starters on the users topic. Search documents and
+``funding_ratio`` are maintained by database triggers. No emails are sent;
+use a bulk email to the imported audience instead.
+"""
+import csv
+import json
+import secrets
+from typing import BinaryIO, Iterator
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from auth_cache import invalidate_users
+from config import settings
+from password_hashing import hash_passwords
+from project_events import projects_changed
+from slugs import next_free_slugs, slugify
+import models
+import schemas
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.errors: list[dict] = []
+        # Keys taken by earlier rows of this import (emails, slugs)
+        self.seen: set[str] = set()
+
+    def error(self, row: int, message: str) -> None:
+        self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+        }
+
+
+def _lines(stream: BinaryIO) -> Iterator[str]:
+    for line in stream:
+        yield line.decode("utf-8-sig")
+
+
+def read_rows(stream: BinaryIO, fmt: str) -> Iterator[tuple[int, object]]:
+    """(row number, dict) per data row; a ValueError instead of the dict for unreadable rows."""
+    if fmt == "csv":
+        number = 0
+        try:
+            for number, row in enumerate(csv.DictReader(_lines(stream)), start=1):
+                # Empty cells mean "not given"
+                yield number, {key: value for key, value in row.items() if key and value not in ("", None)}
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Rows after a broken line cannot be told apart reliably, so reading stops
+            yield number + 1, ValueError(f"Unreadable CSV, rest of the file skipped: {e}")
+        return
+
+    for number, line in enumerate(stream, start=1):
+        try:
+            line = line.decode("utf-8-sig")
+        except UnicodeDecodeError as e:
+            yield number, ValueError(f"Invalid UTF-8: {e}")
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("expected a JSON object")
+            yield number, row
+        except ValueError as e:
+            yield number, ValueError(f"Invalid JSON: {e}")
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+
+def _chunks(rows, schema: type[BaseModel], report: ImportReport) -> Iterator[list[tuple[int, BaseModel]]]:
+    chunk = []
+    for number, row in rows:
+        if isinstance(row, Exception):
+            report.error(number, str(row))
+            continue
+        try:
+            chunk.append((number, schema.model_validate(row)))
+        except ValidationError as e:
+            report.error(number, _describe(e))
+            continue
+        if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(db: Session, table, rows: list[tuple[int, dict]], report: ImportReport, conflict: str) -> list:
+    """Insert ``rows`` with one multi-row statement; returns each row's new id (None if it failed)."""
+    if not rows:
+        return []
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    try:
+        with db.begin_nested():
+            ids = [row.id for row in db.execute(stmt, [values for _, values in rows])]
+        report.created += len(ids)
+        return ids
+    except IntegrityError:
+        pass
+
+    # Someone else took a key after our checks; find the rows one by one
+    ids = []
+    for number, values in rows:
+        try:
+            with db.begin_nested():
+                ids.append(db.execute(insert(table).returning(table.c.id), values).scalar_one())
+            report.created += 1
+        except IntegrityError:
+            ids.append(None)
+            report.error(number, conflict)
+    return ids
+
+
+def _import_user_chunk(db: Session, chunk: list[tuple[int, schemas.UserImport]], report: ImportReport) -> None:
+    emails = [user.email for _, user in chunk]
+    registered = {row.email for row in db.query(models.User.email).filter(models.User.email.in_(emails))}
+
+    accepted = []
+    for number, user in chunk:
+        key = f"email:{user.email}"
+        if user.email in registered or key in report.seen:
+            report.error(number, "Email already registered")
+        elif not slugify(user.full_name):
+            report.error(number, "Full name is required")
+        else:
+            report.seen.add(key)
+            accepted.append((number, user))
+    if not accepted:
+        return
+
+    hashes = hash_passwords([user.password or secrets.token_urlsafe(24) for _, user in accepted])
+    slugs = next_free_slugs(db, models.User.profile_slug, [slugify(user.full_name) for _, user in accepted])
+    rows = [
+        (number, {
+            "email": user.email,
+            "hashed_password": hashed,
+            "full_name": user.full_name,
+            "profile_slug": slug,
+            "is_active": True,
+            "is_admin": False,
+        })
+        for (number, user), hashed, slug in zip(accepted, hashes, slugs)
+    ]
+    _insert(db, models.User.__table__, rows, report, "Email or profile slug was taken during the import")
+    db.commit()
+
+
+def _import_project_chunk(db: Session, chunk: list[tuple[int, schemas.ProjectImport]], report: ImportReport) -> None:
+    owner_emails = {project.owner_email for _, project in chunk}
+    owners = {
+        row.email: row for row in db.query(models.User.id, models.User.email, models.User.is_starter).filter(
+            models.User.email.in_(owner_emails)
+        )
+    }
+    explicit = {slugify(project.slug) for _, project in chunk if project.slug}
+    taken = {row.slug for row in db.query(models.Project.slug).filter(models.Project.slug.in_(explicit))}
+
+    accepted = []
+    for number, project in chunk:
+        slug = slugify(project.slug) if project.slug else None
+        if project.owner_email not in owners:
+            report.error(number, f"Unknown owner_email '{project.owner_email}'")
+        elif project.slug is not None and not slug:
+            report.error(number, "Slug has no usable characters")
+        elif slug and (slug in taken or f"slug:{slug}" in report.seen):
+            report.error(number, f"Slug '{slug}' is already taken")
+        elif not slug and not slugify(project.title):
+            report.error(number, "Title has no usable characters")
+        else:
+            if slug:
+                report.seen.add(f"slug:{slug}")
+            accepted.append((number, project, slug))
+    if not accepted:
+        return
+
+    # Derived slugs avoid the explicit ones of this chunk too
+    derived = iter(next_free_slugs(
+        db, models.Project.slug,
+        [slugify(project.title) for _, project, slug in accepted if not slug],
+        reserved={slug for _, _, slug in accepted if slug}
+    ))
+    rows = []
+    for number, project, slug in accepted:
+        values = project.model_dump(exclude={"owner_email", "slug"})
+        values["owner_id"] = owners[project.owner_email].id
+        values["slug"] = slug or next(derived)
+        rows.append((number, values))
+
+    ids = _insert(db, models.Project.__table__, rows, report, "Slug was taken during the import")
+    inserted = [(values["owner_id"], project_id) for (_, values), project_id in zip(rows, ids) if project_id]
+    if not inserted:
+        db.rollback()
+        return
+
+    starters = {owner.id for owner in owners.values() if owner.is_starter}
+    new_starters = {owner_id for owner_id, _ in inserted if owner_id not in starters}
+    if new_starters:
+        db.execute(update(models.User.__table__).where(
+            models.User.__table__.c.id.in_(new_starters)
+        ).values(is_starter=True))
+    db.commit()
+
+    projects_changed(project_id for _, project_id in inserted)
+    invalidate_users(new_starters)
+
+
+def import_users(db: Session, stream: BinaryIO, fmt: str) -> dict:
+    """Create users from an NDJSON or CSV upload; returns the import report."""
+    report = ImportReport()
+    for chunk in _chunks(read_rows(stream, fmt), schemas.UserImport, report):
+        _import_user_chunk(db, chunk, report)
+    return report.as_dict()
+
+
+def import_projects(db: Session, stream: BinaryIO, fmt: str) -> dict:
+    """Create projects (owners given by email) from an NDJSON or CSV upload; returns the import report."""
+    report = ImportReport()
+    for chunk in _chunks(read_rows(stream, fmt), schemas.ProjectImport, report):
+        _import_project_chunk(db, chunk, report)
+    return report.as_dict()
@@ -0,0 +1,139 @@
+"""
+Bulkheads: named, size-limited executor pools with an admission queue.
+
+Blocking work that can be slow (OpenAI calls) runs in its own pool so it
+cannot starve the default Starlette threadpool used by the sync database
+routes. When a bulkhead is saturated, new work is shed with a 503 instead
+of piling up, and work still queued after ``queue_timeout`` is dropped
+with a 503 as well.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import anyio.to_thread
+from fastapi import HTTPException, status
+from config import settings
+from metrics import register_collector
+
+
+class Bulkhead:
+    """A dedicated thread pool with bounded concurrency and queue depth."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"bulkhead-{name}")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._dequeued = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+        register_collector(f"bulkhead_{name}", self.stats)
+
+    def _shed(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(1, int(self.queue_timeout)))}
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn`` in this bulkhead's pool, or raise 503 if it is saturated."""
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise self._shed(f"Service '{self.name}' is busy. Please try again shortly.")
+            self._queued += 1
+
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        enqueued_at = time.monotonic()
+
+        def task():
+            loop.call_soon_threadsafe(started.set)
+            waited = time.monotonic() - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._dequeued += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        future = self._executor.submit(task)
+        try:
+            await asyncio.wait_for(started.wait(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Still queued: drop it so no worker picks it up later
+            if self._abandon(future):
+                with self._lock:
+                    self._timed_out += 1
+                raise self._shed(f"Service '{self.name}' is busy. Please try again shortly.")
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        return await asyncio.wrap_future(future)
+
+    def _abandon(self, future) -> bool:
+        """Cancel a job that no worker has started yet; False if it is already running."""
+        if not future.cancel():
+            return False
+        with self._lock:
+            self._queued -= 1
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "wait_seconds_avg": round(self._wait_total / self._dequeued, 4) if self._dequeued else 0.0,
+                "wait_seconds_max": round(self._wait_max, 4),
+            }
+
+
+# Bulkhead for OpenAI calls made by routers/ai_coach.py
+ai_bulkhead = Bulkhead(
+    "ai",
+    max_workers=settings.AI_POOL_MAX_WORKERS,
+    max_queue=settings.AI_POOL_MAX_QUEUE,
+    queue_timeout=settings.AI_POOL_QUEUE_TIMEOUT_SECONDS,
+)
+
+
+def configure_default_threadpool() -> None:
+    """
+    Size the default AnyIO threadpool used by sync routes and expose its metrics.
+
+    Must be called from within the running event loop (e.g. a startup handler).
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = settings.DEFAULT_THREADPOOL_SIZE
+
+    def stats() -> dict:
+        statistics = limiter.statistics()
+        return {
+            "max_workers": statistics.total_tokens,
+            "active": statistics.borrowed_tokens,
+            "queue_depth": statistics.tasks_waiting,
+        }
+
+    register_collector("threadpool_default", stats)
@@ -9,13 +9,90 @@ class Settings(BaseSettings):
 
     # Security
     SECRET_KEY: str
-    ALGORITHM: str = "HS256"
+    ALGORITHM: str = "HS256"  # HS256 signs with SECRET_KEY; RS256 uses the rotating key ring (JWKS)
+    JWT_KEY_ROTATION_DAYS: int = 30
+    JWT_KEY_PREPUBLISH_MINUTES: int = 60  # New keys appear in JWKS this long before they sign
+    JWT_KEY_SIZE: int = 2048
+    JWT_KEY_REFRESH_SECONDS: int = 300  # How often workers reload the key ring
+    JWT_ACCEPT_LEGACY_HS256: bool = True  # Accept HS256 tokens without kid while migrating to RS256
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     SESSION_TOKEN_EXPIRE_HOURS: int = 2
+    SESSION_MAX_PER_USER: int = 10  # Oldest sessions are evicted beyond this
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 300
+    SESSION_SWEEP_BATCH_SIZE: int = 500
+    SESSION_SLIDING_EXPIRATION: bool = True  # Each refresh extends the session
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    SESSION_CACHE_TTL_SECONDS: int = 30  # 0 disables the cache
+    SESSION_TOUCH_FLUSH_SECONDS: int = 30  # Write-behind interval for sliding expiry
+    SESSION_REFRESH_COALESCE_SECONDS: int = 5  # Concurrent refreshes share one token
+
+    # One-time tokens (magic codes, password resets)
+    ONE_TIME_TOKEN_PURGE_INTERVAL_SECONDS: int = 300
+    ONE_TIME_TOKEN_PURGE_BATCH_SIZE: int = 1000
+
+    # Password hashing
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # bcrypt or argon2id; other hashes are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 2  # Size of the hashing process pool; 0 hashes inline
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 1
+
+    # Auth cache (verified access token -> user snapshot, per worker)
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 60  # Also bounded by token expiry; 0 disables the cache
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 300  # Upper bound on staleness if an invalidation is missed
+    INVALIDATION_CHANNEL: str = "cache_invalidation"  # Postgres NOTIFY channel shared by workers
+
+    # Pledges: each project's pledge total is striped over FUNDING_SHARDS counter rows
+    FUNDING_SHARDS: int = 16
+    FUNDING_COMPACTION_INTERVAL_SECONDS: int = 10  # Folds the shards into projects.funding_current
+    PLEDGE_QUEUE_PARTITIONS: int = 4  # Consumers per worker; may change anytime (consumer 0 drains orphans)
+    PLEDGE_QUEUE_BATCH_SIZE: int = 500
+    PLEDGE_QUEUE_POLL_SECONDS: int = 2  # Fallback poll; commits that enqueue wake the consumer
+    PLEDGE_QUEUE_RETENTION_HOURS: int = 24  # Applied entries are kept this long for status checks
+
+    # Reward tiers: a reservation holds one unit until the backer pledges
+    REWARD_RESERVATION_MINUTES: int = 15
+    REWARD_EXPIRY_INTERVAL_SECONDS: int = 60  # Returns expired holds to stock (reservations also do this)
+
+    # Project lifecycle scheduler (runs on the elected leader worker only)
+    LIFECYCLE_INTERVAL_SECONDS: int = 60  # Starts and ends campaigns at most this late
+    LIFECYCLE_BATCH_SIZE: int = 100
+
+    # Admin bulk import
+    IMPORT_CHUNK_SIZE: int = 500  # Rows per multi-row INSERT and transaction
+
+    # Homepage response cache (per worker, invalidated on project and user changes); 0 disables
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_FEATURED_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_NEAR_GOAL_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_STARTERS_TTL_SECONDS: int = 300
 
     # Email
     RESEND_API_KEY: str
     FROM_EMAIL: str
+    EMAIL_DEFAULT_LOCALE: str = "de"  # Templates without a variant for the requested locale use this
+    EMAIL_TRANSPORT: str = "resend"  # resend, http (local stand-in at EMAIL_HTTP_URL) or smtp
+    EMAIL_HTTP_URL: str = ""
+    EMAIL_SMTP_HOST: str = "localhost"
+    EMAIL_SMTP_PORT: int = 25
+    EMAIL_SMTP_USERNAME: str = ""
+    EMAIL_SMTP_PASSWORD: str = ""
+    EMAIL_SMTP_STARTTLS: bool = False
+    EMAIL_OUTBOX_POLL_SECONDS: int = 5  # Fallback poll; commits that enqueue wake the worker
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_SEND_LEASE_SECONDS: int = 300  # Claimed messages are retried after this if the worker dies
+    EMAIL_MAX_ATTEMPTS: int = 6  # Then the message is dead-lettered
+    EMAIL_RETRY_BASE_SECONDS: int = 30  # Doubles per failed attempt
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_SENT_RETENTION_HOURS: int = 24  # Sent messages (body already blanked) are then deleted
+    EMAIL_DEAD_RETENTION_DAYS: int = 14  # Dead letters are kept this long for inspection
+    EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS: int = 3600
+    EMAIL_BULK_CHUNK_SIZE: int = 100  # Recipients per batch call (Resend accepts up to 100)
+    EMAIL_BULK_RATE_PER_SECOND: float = 50.0  # Bulk send pace; 0 disables pacing
+    EMAIL_BULK_POLL_SECONDS: int = 10
+    EMAIL_BULK_STALE_SECONDS: int = 300  # Running jobs without a heartbeat this long are resumed
 
     # Application
     FRONTEND_URL: str = "http://localhost:5173"
@@ -32,6 +109,7 @@ class Settings(BaseSettings):
     # Admin
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
+    METRICS_TOKEN: str = ""  # Bearer token for metrics scrapers; empty: /metrics is admin-only
 
     # OpenAI
     OPENAI_API_KEY: str = ""
@@ -42,5 +120,23 @@ class Settings(BaseSettings):
     AI_MIN_MESSAGES_FOR_PROJECT: int = 3  # Min messages before project creation allowed
     AI_MAX_ANONYMOUS_DRAFTS: int = 2  # Max drafts anonymous users can generate
 
+    # Executor pools (bulkheads)
+    DEFAULT_THREADPOOL_SIZE: int = 40  # Threadpool shared by sync routes (projects, auth, admin)
+    AI_POOL_MAX_WORKERS: int = 8  # Concurrent OpenAI calls per worker process
+    AI_POOL_MAX_QUEUE: int = 16  # Calls allowed to wait for a free AI worker before shedding
+    AI_POOL_QUEUE_TIMEOUT_SECONDS: float = 10.0  # Max time a call may wait in the AI queue
+
+    # Rate limits ("<count>/[<n>]<unit>", e.g. "5/minute" or "3/15minutes"; empty disables)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory (per worker) or database (shared by all workers)
+    RATE_LIMIT_TRUST_PROXY: bool = False  # Take the client IP from X-Forwarded-For
+    RATE_LIMIT_PURGE_INTERVAL_SECONDS: int = 600
+    RATE_LIMIT_LOGIN_PER_IP: str = "30/minute"  # Login and magic-code verification
+    RATE_LIMIT_LOGIN_PER_EMAIL: str = "10/15minutes"
+    RATE_LIMIT_EMAIL_PER_IP: str = "10/hour"  # Magic-code and password-reset emails
+    RATE_LIMIT_EMAIL_PER_ADDRESS: str = "5/hour"
+    RATE_LIMIT_AI_PER_USER: str = "20/minute"
+    RATE_LIMIT_AI_ANONYMOUS_PER_IP: str = "30/hour"  # Not per session_id, which clients can rotate
+
 
 settings = Settings()
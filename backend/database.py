@@ -25,3 +25,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def delete_in_batches(db, model, *criteria, batch_size: int = 1000) -> int:
+    """
+    Delete rows of ``model`` matching ``criteria`` in batches, committing each batch.
+
+    Keeps each transaction (and the locks it holds) small. Returns rows deleted.
+    """
+    total = 0
+    while True:
+        ids = [row.id for row in db.query(model.id).filter(*criteria).limit(batch_size).all()]
+        if not ids:
+            return total
+
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        total += len(ids)
+
+        if len(ids) < batch_size:
+            return total
@@ -0,0 +1,215 @@
+"""
+Durable email outbox.
+
+Request handlers ``enqueue()`` messages in the same transaction as the change
+that triggers them (registration, reset token, magic code), so signups never
+wait on the email provider and no email is lost if the provider is down.
+
+A background worker claims due messages in batches and delivers them through
+the configured transport. A claim leases a row by pushing ``next_attempt_at``
+forward, so a crashed worker's messages are retried after the lease expires,
+and on PostgreSQL ``SKIP LOCKED`` lets workers in several processes share
+the queue. Failed sends are retried with exponential backoff; after
+``EMAIL_MAX_ATTEMPTS`` the message is dead-lettered (``status = 'dead'``)
+and kept for inspection.
+
+Messages carry one-time secrets (reset links, magic codes), so the body is
+blanked once a message is sent. A purge task deletes sent rows after
+``EMAIL_SENT_RETENTION_HOURS`` and dead letters after
+``EMAIL_DEAD_RETENTION_DAYS``.
+"""
+import random
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, delete_in_batches
+from email_transport import get_transport
+from metrics import register_collector
+import background
+import models
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+WORKER_TASK = "email_outbox"
+
+_stats_lock = threading.Lock()
+_stats = {"sent": 0, "failed": 0, "dead": 0}
+
+
+def enqueue(db: Session, to_email: str, subject: str, html: str) -> models.EmailOutbox:
+    """Add a message to the outbox. The caller commits."""
+    message = models.EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        html=html,
+        status=STATUS_PENDING,
+        attempts=0,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(message)
+    db.info["email_enqueued"] = True
+    return message
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter after ``attempts`` failed sends."""
+    delay = min(settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.EMAIL_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim(db: Session, batch_size: int) -> list[dict]:
+    """Lease a batch of due messages; returns plain snapshots of them."""
+    now = datetime.utcnow()
+    messages = db.query(models.EmailOutbox).filter(
+        models.EmailOutbox.status == STATUS_PENDING,
+        models.EmailOutbox.next_attempt_at <= now
+    ).order_by(
+        models.EmailOutbox.next_attempt_at, models.EmailOutbox.id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    claimed = []
+    for message in messages:
+        message.attempts += 1
+        message.next_attempt_at = now + timedelta(seconds=settings.EMAIL_SEND_LEASE_SECONDS)
+        claimed.append({
+            "id": message.id,
+            "attempts": message.attempts,
+            "to_email": message.to_email,
+            "subject": message.subject,
+            "html": message.html,
+        })
+    db.commit()
+    return claimed
+
+
+def _deliver_batch(db: Session, batch_size: int) -> tuple[int, int]:
+    """Send one batch of due messages; returns (claimed, delivered)."""
+    messages = _claim(db, batch_size)
+    if not messages:
+        return 0, 0
+
+    payloads = [{
+        "from": settings.FROM_EMAIL,
+        "to": [message["to_email"]],
+        "subject": message["subject"],
+        "html": message["html"],
+    } for message in messages]
+
+    try:
+        errors = get_transport().send_batch(payloads)
+    except Exception as e:
+        errors = [e] * len(messages)
+
+    now = datetime.utcnow()
+    sent_ids = []
+    dead = 0
+    for message, error in zip(messages, errors):
+        if error is None:
+            sent_ids.append(message["id"])
+            continue
+
+        values = {"last_error": str(error)}
+        if message["attempts"] >= settings.EMAIL_MAX_ATTEMPTS:
+            values["status"] = STATUS_DEAD
+            dead += 1
+            print(f"Email {message['id']} to {message['to_email']} dead-lettered: {error}", flush=True)
+        else:
+            values["next_attempt_at"] = now + timedelta(seconds=retry_delay(message["attempts"]))
+        db.query(models.EmailOutbox).filter(
+            models.EmailOutbox.id == message["id"]
+        ).update(values, synchronize_session=False)
+
+    if sent_ids:
+        db.query(models.EmailOutbox).filter(
+            models.EmailOutbox.id.in_(sent_ids)
+        ).update(
+            {"status": STATUS_SENT, "sent_at": now, "last_error": None, "html": ""},
+            synchronize_session=False
+        )
+    db.commit()
+
+    with _stats_lock:
+        _stats["sent"] += len(sent_ids)
+        _stats["failed"] += len(messages) - len(sent_ids) - dead
+        _stats["dead"] += dead
+    return len(messages), len(sent_ids)
+
+
+def deliver_pending(db: Session, batch_size: int = 50) -> int:
+    """Drain due messages batch by batch; returns how many were delivered."""
+    total = 0
+    while True:
+        claimed, sent = _deliver_batch(db, batch_size)
+        total += sent
+        if claimed < batch_size:
+            return total
+
+
+def deliver_pending_job() -> int:
+    db = SessionLocal()
+    try:
+        return deliver_pending(db, settings.EMAIL_OUTBOX_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def purge(db: Session, batch_size: int = 1000) -> int:
+    """Delete sent and dead messages past their retention; returns rows deleted."""
+    now = datetime.utcnow()
+    # next_attempt_at is the last claim's lease, so the (status, next_attempt_at) index serves both
+    deleted = 0
+    for status, cutoff in (
+        (STATUS_SENT, now - timedelta(hours=settings.EMAIL_SENT_RETENTION_HOURS)),
+        (STATUS_DEAD, now - timedelta(days=settings.EMAIL_DEAD_RETENTION_DAYS)),
+    ):
+        deleted += delete_in_batches(
+            db, models.EmailOutbox,
+            models.EmailOutbox.status == status,
+            models.EmailOutbox.next_attempt_at <= cutoff,
+            batch_size=batch_size
+        )
+    return deleted
+
+
+def purge_job() -> int:
+    db = SessionLocal()
+    try:
+        return purge(db)
+    finally:
+        db.close()
+
+
+def stats() -> dict:
+    db = SessionLocal()
+    try:
+        # Only pending and dead rows: an index range scan that skips the sent ones
+        counts = dict(db.query(models.EmailOutbox.status, func.count(models.EmailOutbox.id)).filter(
+            models.EmailOutbox.status.in_([STATUS_PENDING, STATUS_DEAD])
+        ).group_by(models.EmailOutbox.status).all())
+    finally:
+        db.close()
+    with _stats_lock:
+        return {
+            "pending": counts.get(STATUS_PENDING, 0),
+            "dead_letters": counts.get(STATUS_DEAD, 0),
+            **_stats,
+        }
+
+
+# Deliver right after the enqueuing transaction commits instead of waiting for the next poll
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session):
+    if session.info.pop("email_enqueued", False):
+        background.wake(WORKER_TASK)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_enqueued(session):
+    session.info.pop("email_enqueued", None)
+
+
+register_collector("email_outbox", stats)
@@ -1,163 +1,71 @@
-import resend
+from typing import Optional
+from sqlalchemy.orm import Session
 from config import settings
+from email_templates import registry
+from email_transport import get_transport
+import email_outbox
 
-resend.api_key = settings.RESEND_API_KEY
 
+def _name(user_name: Optional[str]) -> str:
+    return f" {user_name}" if user_name else ""
 
-def send_password_reset_email(email: str, reset_token: str, user_name: str = None):
-    reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
-
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .button {{
-                display: inline-block;
-                padding: 12px 24px;
-                background-color: #007bff;
-                color: white;
-                text-decoration: none;
-                border-radius: 4px;
-                margin: 20px 0;
-            }}
-            .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>Passwort zurücksetzen</h2>
-            <p>Hallo{f" {user_name}" if user_name else ""},</p>
-            <p>Du hast eine Anfrage zum Zurücksetzen deines Passworts erhalten.</p>
-            <p>Klicke auf den folgenden Button, um dein Passwort zurückzusetzen:</p>
-            <a href="{reset_url}" class="button">Passwort zurücksetzen</a>
-            <p>Oder kopiere diesen Link in deinen Browser:</p>
-            <p style="word-break: break-all;">{reset_url}</p>
-            <p>Dieser Link ist 1 Stunde lang gültig.</p>
-            <p>Wenn du diese Anfrage nicht gestellt hast, kannst du diese E-Mail ignorieren.</p>
-            <div class="footer">
-                <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
 
+def _send_now(email: str, subject: str, html_content: str) -> bool:
+    """Deliver immediately, bypassing the outbox (admin test emails)."""
     try:
-        params = {
+        get_transport().send({
             "from": settings.FROM_EMAIL,
             "to": [email],
-            "subject": "Passwort zurücksetzen",
+            "subject": subject,
             "html": html_content,
-        }
-        resend.Emails.send(params)
+        })
         return True
     except Exception as e:
         print(f"Error sending email: {e}")
         return False
 
 
-def send_magic_link_email(email: str, verification_code: str, user_name: str = None):
+def password_reset_email(reset_token: str, user_name: str = None, locale: str = None) -> tuple[str, str]:
+    reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+    return registry.render("password_reset", locale, name=_name(user_name), reset_url=reset_url)
+
+
+def magic_link_email(verification_code: str, user_name: str = None, locale: str = None) -> tuple[str, str]:
     # Format code with spaces for better readability (123 456)
     formatted_code = f"{verification_code[:3]} {verification_code[3:]}"
+    return registry.render("magic_code", locale, name=_name(user_name), code=formatted_code)
 
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .code-box {{
-                background-color: #f4f4f4;
-                border: 2px dashed #007bff;
-                border-radius: 8px;
-                padding: 20px;
-                text-align: center;
-                margin: 20px 0;
-            }}
-            .code {{
-                font-size: 32px;
-                font-weight: bold;
-                letter-spacing: 8px;
-                color: #007bff;
-                font-family: 'Courier New', monospace;
-            }}
-            .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>Dein Bestätigungscode</h2>
-            <p>Hallo{f" {user_name}" if user_name else ""},</p>
-            <p>Gib den folgenden Code ein, um dich einzuloggen:</p>
-            <div class="code-box">
-                <span class="code">{formatted_code}</span>
-            </div>
-            <p>Dieser Code ist 15 Minuten lang gültig.</p>
-            <p>Wenn du diesen Code nicht angefordert hast, kannst du diese E-Mail ignorieren.</p>
-            <div class="footer">
-                <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
 
-    try:
-        params = {
-            "from": settings.FROM_EMAIL,
-            "to": [email],
-            "subject": f"Dein Login-Code: {formatted_code}",
-            "html": html_content,
-        }
-        resend.Emails.send(params)
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+def welcome_email(user_name: str = None, locale: str = None) -> tuple[str, str]:
+    return registry.render("welcome", locale, name=_name(user_name), login_url=f"{settings.FRONTEND_URL}/login")
 
 
-def send_welcome_email(email: str, user_name: str = None):
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>Willkommen!</h2>
-            <p>Hallo{f" {user_name}" if user_name else ""},</p>
-            <p>Dein Account wurde erfolgreich erstellt.</p>
-            <p>Du kannst dich jetzt mit deiner E-Mail-Adresse und deinem Passwort anmelden.</p>
-            <p><a href="{settings.FRONTEND_URL}/login">Zum Login</a></p>
-            <div class="footer">
-                <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
+def send_password_reset_email(db: Session, email: str, reset_token: str, user_name: str = None):
+    """Queue the reset email; it is sent once the caller commits."""
+    email_outbox.enqueue(db, email, *password_reset_email(reset_token, user_name))
+
+
+def send_magic_link_email(db: Session, email: str, verification_code: str, user_name: str = None):
+    """Queue the login code email; it is sent once the caller commits."""
+    email_outbox.enqueue(db, email, *magic_link_email(verification_code, user_name))
+
+
+def send_welcome_email(db: Session, email: str, user_name: str = None):
+    """Queue the welcome email; it is sent once the caller commits."""
+    email_outbox.enqueue(db, email, *welcome_email(user_name))
+
+
+def project_status_email(status: str, title: str, slug: str, user_name: str = None,
+                         locale: str = None) -> tuple[str, str]:
+    return registry.render(
+        f"project_{status}", locale,
+        name=_name(user_name), title=title, project_url=f"{settings.FRONTEND_URL}/projects/{slug}"
+    )
 
-    try:
-        params = {
-            "from": settings.FROM_EMAIL,
-            "to": [email],
-            "subject": "Willkommen bei der Nutzerverwaltung",
-            "html": html_content,
-        }
-        resend.Emails.send(params)
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+
+def send_project_status_email(db: Session, email: str, status: str, title: str, slug: str, user_name: str = None):
+    """Queue the starter's notice that their project entered ``status``; sent once the caller commits."""
+    email_outbox.enqueue(db, email, *project_status_email(status, title, slug, user_name))
 
 
 def send_test_email(email: str, email_type: str, user_name: str = None):
@@ -172,127 +80,15 @@ def send_test_email(email: str, email_type: str, user_name: str = None):
     - 'test_simple': Simple test email
     """
 
-    if email_type == "welcome":
-        return send_welcome_email(email, user_name)
-
-    elif email_type == "password_reset":
+    if email_type == "password_reset":
         test_token = "TEST_TOKEN_123456"
-        return send_password_reset_email(email, test_token, user_name)
-
-    elif email_type == "account_activated":
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Account aktiviert</h2>
-                <p>Hallo{f" {user_name}" if user_name else ""},</p>
-                <p>Dein Account wurde von einem Administrator aktiviert.</p>
-                <p>Du kannst dich jetzt wieder anmelden.</p>
-                <p><a href="{settings.FRONTEND_URL}/login">Zum Login</a></p>
-                <div class="footer">
-                    <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        try:
-            params = {
-                "from": settings.FROM_EMAIL,
-                "to": [email],
-                "subject": "Dein Account wurde aktiviert",
-                "html": html_content,
-            }
-            resend.Emails.send(params)
-            return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
-
-    elif email_type == "account_deactivated":
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Account deaktiviert</h2>
-                <p>Hallo{f" {user_name}" if user_name else ""},</p>
-                <p>Dein Account wurde von einem Administrator deaktiviert.</p>
-                <p>Bei Fragen wende dich bitte an den Support.</p>
-                <div class="footer">
-                    <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        return _send_now(email, *password_reset_email(test_token, user_name))
 
-        try:
-            params = {
-                "from": settings.FROM_EMAIL,
-                "to": [email],
-                "subject": "Dein Account wurde deaktiviert",
-                "html": html_content,
-            }
-            resend.Emails.send(params)
-            return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
-
-    elif email_type == "test_simple":
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .footer {{ margin-top: 30px; font-size: 12px; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h2>Test-E-Mail</h2>
-                <p>Hallo{f" {user_name}" if user_name else ""},</p>
-                <p>Dies ist eine Test-E-Mail aus der Nutzerverwaltung.</p>
-                <p>Wenn du diese E-Mail erhältst, funktioniert der E-Mail-Versand korrekt.</p>
-                <div class="footer">
-                    <p>Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        try:
-            params = {
-                "from": settings.FROM_EMAIL,
-                "to": [email],
-                "subject": "Test-E-Mail von der Nutzerverwaltung",
-                "html": html_content,
-            }
-            resend.Emails.send(params)
-            return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
-
-    else:
+    if email_type not in registry.names():
         return False
+
+    return _send_now(email, *registry.render(
+        email_type,
+        name=_name(user_name),
+        login_url=f"{settings.FRONTEND_URL}/login"
+    ))
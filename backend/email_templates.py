@@ -0,0 +1,367 @@
+"""
+Precompiled email templates.
+
+Each template is registered once per locale with a subject and an HTML body
+using ``{slot}`` placeholders. ``compile()`` (run at startup) joins the body
+with the shared layout and CSS and splits it into static text and slots, so
+rendering a message only escapes the slot values and joins strings. Locales
+without a variant fall back to ``EMAIL_DEFAULT_LOCALE``.
+"""
+import html
+import threading
+from string import Formatter
+from typing import Optional
+from config import settings
+
+BASE_CSS = """
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .footer { margin-top: 30px; font-size: 12px; color: #666; }"""
+
+BUTTON_CSS = """
+            .button {
+                display: inline-block;
+                padding: 12px 24px;
+                background-color: #007bff;
+                color: white;
+                text-decoration: none;
+                border-radius: 4px;
+                margin: 20px 0;
+            }"""
+
+CODE_CSS = """
+            .code-box {
+                background-color: #f4f4f4;
+                border: 2px dashed #007bff;
+                border-radius: 8px;
+                padding: 20px;
+                text-align: center;
+                margin: 20px 0;
+            }
+            .code {
+                font-size: 32px;
+                font-weight: bold;
+                letter-spacing: 8px;
+                color: #007bff;
+                font-family: 'Courier New', monospace;
+            }"""
+
+FOOTERS = {
+    "de": "Diese E-Mail wurde automatisch generiert. Bitte antworte nicht darauf.",
+    "en": "This email was generated automatically. Please do not reply.",
+}
+
+
+def _layout(css: str, locale: str) -> tuple[str, str]:
+    """Static text before and after a template body."""
+    before = f"""
+    <!DOCTYPE html>
+    <html lang="{locale}">
+    <head>
+        <style>{css}
+        </style>
+    </head>
+    <body>
+        <div class="container">"""
+    after = f"""
+            <div class="footer">
+                <p>{FOOTERS.get(locale, FOOTERS["de"])}</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """
+    return before, after
+
+
+class Safe(str):
+    """Already-escaped HTML, inserted into a template as is."""
+
+
+def text_to_html(text: str) -> Safe:
+    """Escape plain text and keep its line breaks."""
+    return Safe(html.escape(text).replace("\n", "<br>\n"))
+
+
+class CompiledTemplate:
+    """A template split into static text and slots."""
+
+    def __init__(self, source: str, before: str = "", after: str = ""):
+        self.parts: list[tuple[str, Optional[str]]] = []
+        pending = before
+        for literal, field, _, _ in Formatter().parse(source):
+            pending += literal
+            if field is not None:
+                self.parts.append((pending, field))
+                pending = ""
+        self.tail = pending + after
+        self.slots = {field for _, field in self.parts}
+
+    def render(self, values: dict, escape: bool) -> str:
+        chunks = []
+        for literal, field in self.parts:
+            value = str(values[field])
+            chunks.append(literal)
+            chunks.append(html.escape(value) if escape and not isinstance(values[field], Safe) else value)
+        chunks.append(self.tail)
+        return "".join(chunks)
+
+
+class TemplateRegistry:
+    def __init__(self):
+        self._sources: dict[tuple[str, str], tuple[str, str, str]] = {}
+        self._compiled: dict[tuple[str, str], tuple[CompiledTemplate, CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, locale: str, subject: str, body: str, css: str = "") -> None:
+        with self._lock:
+            self._sources[(name, locale)] = (subject, body, css)
+            self._compiled.pop((name, locale), None)
+
+    def compile(self) -> None:
+        """Compile every registered template (idempotent)."""
+        for key in list(self._sources):
+            self._compile(key)
+
+    def _compile(self, key: tuple[str, str]) -> tuple[CompiledTemplate, CompiledTemplate]:
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            subject, body, css = self._sources[key]
+            before, after = _layout(BASE_CSS + css, key[1])
+            compiled = (CompiledTemplate(subject), CompiledTemplate(body, before, after))
+            with self._lock:
+                self._compiled[key] = compiled
+        return compiled
+
+    def get(self, name: str, locale: Optional[str] = None) -> tuple[CompiledTemplate, CompiledTemplate]:
+        """Compiled (subject, body) for ``name`` in ``locale`` or the default locale."""
+        key = (name, locale or settings.EMAIL_DEFAULT_LOCALE)
+        if key not in self._sources:
+            key = (name, settings.EMAIL_DEFAULT_LOCALE)
+        if key not in self._sources:
+            raise KeyError(f"Unknown email template '{name}'")
+        return self._compile(key)
+
+    def render(self, name: str, locale: Optional[str] = None, /, **values) -> tuple[str, str]:
+        """Render (subject, html); slot values are HTML-escaped in the body."""
+        subject, body = self.get(name, locale)
+        return subject.render(values, escape=False), body.render(values, escape=True)
+
+    def names(self) -> set[str]:
+        return {name for name, _ in self._sources}
+
+
+registry = TemplateRegistry()
+
+
+# {name} is " <user name>" or empty, so greetings read "Hallo Anna," or "Hallo,"
+registry.register(
+    "password_reset", "de",
+    subject="Passwort zurücksetzen",
+    css=BUTTON_CSS,
+    body="""
+            <h2>Passwort zurücksetzen</h2>
+            <p>Hallo{name},</p>
+            <p>Du hast eine Anfrage zum Zurücksetzen deines Passworts erhalten.</p>
+            <p>Klicke auf den folgenden Button, um dein Passwort zurückzusetzen:</p>
+            <a href="{reset_url}" class="button">Passwort zurücksetzen</a>
+            <p>Oder kopiere diesen Link in deinen Browser:</p>
+            <p style="word-break: break-all;">{reset_url}</p>
+            <p>Dieser Link ist 1 Stunde lang gültig.</p>
+            <p>Wenn du diese Anfrage nicht gestellt hast, kannst du diese E-Mail ignorieren.</p>""",
+)
+registry.register(
+    "password_reset", "en",
+    subject="Reset your password",
+    css=BUTTON_CSS,
+    body="""
+            <h2>Reset your password</h2>
+            <p>Hello{name},</p>
+            <p>We received a request to reset your password.</p>
+            <p>Click the button below to choose a new password:</p>
+            <a href="{reset_url}" class="button">Reset password</a>
+            <p>Or copy this link into your browser:</p>
+            <p style="word-break: break-all;">{reset_url}</p>
+            <p>This link is valid for 1 hour.</p>
+            <p>If you did not request this, you can ignore this email.</p>""",
+)
+
+registry.register(
+    "magic_code", "de",
+    subject="Dein Login-Code: {code}",
+    css=CODE_CSS,
+    body="""
+            <h2>Dein Bestätigungscode</h2>
+            <p>Hallo{name},</p>
+            <p>Gib den folgenden Code ein, um dich einzuloggen:</p>
+            <div class="code-box">
+                <span class="code">{code}</span>
+            </div>
+            <p>Dieser Code ist 15 Minuten lang gültig.</p>
+            <p>Wenn du diesen Code nicht angefordert hast, kannst du diese E-Mail ignorieren.</p>""",
+)
+registry.register(
+    "magic_code", "en",
+    subject="Your login code: {code}",
+    css=CODE_CSS,
+    body="""
+            <h2>Your verification code</h2>
+            <p>Hello{name},</p>
+            <p>Enter the following code to log in:</p>
+            <div class="code-box">
+                <span class="code">{code}</span>
+            </div>
+            <p>This code is valid for 15 minutes.</p>
+            <p>If you did not request this code, you can ignore this email.</p>""",
+)
+
+registry.register(
+    "welcome", "de",
+    subject="Willkommen bei der Nutzerverwaltung",
+    body="""
+            <h2>Willkommen!</h2>
+            <p>Hallo{name},</p>
+            <p>Dein Account wurde erfolgreich erstellt.</p>
+            <p>Du kannst dich jetzt mit deiner E-Mail-Adresse und deinem Passwort anmelden.</p>
+            <p><a href="{login_url}">Zum Login</a></p>""",
+)
+registry.register(
+    "welcome", "en",
+    subject="Welcome to Startnext",
+    body="""
+            <h2>Welcome!</h2>
+            <p>Hello{name},</p>
+            <p>Your account has been created.</p>
+            <p>You can now log in with your email address and password.</p>
+            <p><a href="{login_url}">Log in</a></p>""",
+)
+
+registry.register(
+    "account_activated", "de",
+    subject="Dein Account wurde aktiviert",
+    body="""
+            <h2>Account aktiviert</h2>
+            <p>Hallo{name},</p>
+            <p>Dein Account wurde von einem Administrator aktiviert.</p>
+            <p>Du kannst dich jetzt wieder anmelden.</p>
+            <p><a href="{login_url}">Zum Login</a></p>""",
+)
+registry.register(
+    "account_activated", "en",
+    subject="Your account has been activated",
+    body="""
+            <h2>Account activated</h2>
+            <p>Hello{name},</p>
+            <p>Your account has been activated by an administrator.</p>
+            <p>You can log in again now.</p>
+            <p><a href="{login_url}">Log in</a></p>""",
+)
+
+registry.register(
+    "account_deactivated", "de",
+    subject="Dein Account wurde deaktiviert",
+    body="""
+            <h2>Account deaktiviert</h2>
+            <p>Hallo{name},</p>
+            <p>Dein Account wurde von einem Administrator deaktiviert.</p>
+            <p>Bei Fragen wende dich bitte an den Support.</p>""",
+)
+registry.register(
+    "account_deactivated", "en",
+    subject="Your account has been deactivated",
+    body="""
+            <h2>Account deactivated</h2>
+            <p>Hello{name},</p>
+            <p>Your account has been deactivated by an administrator.</p>
+            <p>If you have questions, please contact support.</p>""",
+)
+
+# Project lifecycle (sent to the starter by the scheduler, see lifecycle.py)
+registry.register(
+    "project_financing", "de",
+    subject="Deine Finanzierungsphase hat begonnen: {title}",
+    css=BUTTON_CSS,
+    body="""
+            <h2>Die Finanzierungsphase läuft</h2>
+            <p>Hallo{name},</p>
+            <p>Dein Projekt „{title}“ sammelt ab jetzt Unterstützung.</p>
+            <p>Teile den Link mit deinen Unterstützerinnen und Unterstützern:</p>
+            <a href="{project_url}" class="button">Zum Projekt</a>""",
+)
+registry.register(
+    "project_financing", "en",
+    subject="Your funding period has started: {title}",
+    css=BUTTON_CSS,
+    body="""
+            <h2>Your funding period is live</h2>
+            <p>Hello{name},</p>
+            <p>Your project "{title}" is now collecting pledges.</p>
+            <p>Share the link with your supporters:</p>
+            <a href="{project_url}" class="button">View project</a>""",
+)
+
+registry.register(
+    "project_ended_success", "de",
+    subject="Geschafft! „{title}“ ist erfolgreich finanziert",
+    body="""
+            <h2>Herzlichen Glückwunsch!</h2>
+            <p>Hallo{name},</p>
+            <p>Die Finanzierungsphase von „{title}“ ist beendet und das Finanzierungsziel wurde erreicht.</p>
+            <p><a href="{project_url}">Zum Projekt</a></p>""",
+)
+registry.register(
+    "project_ended_success", "en",
+    subject="Congratulations! \"{title}\" is funded",
+    body="""
+            <h2>Congratulations!</h2>
+            <p>Hello{name},</p>
+            <p>The funding period of "{title}" has ended and the funding goal was reached.</p>
+            <p><a href="{project_url}">View project</a></p>""",
+)
+
+registry.register(
+    "project_ended_failed", "de",
+    subject="Die Finanzierungsphase von „{title}“ ist beendet",
+    body="""
+            <h2>Finanzierungsphase beendet</h2>
+            <p>Hallo{name},</p>
+            <p>Die Finanzierungsphase von „{title}“ ist beendet, das Finanzierungsziel wurde leider nicht erreicht.</p>
+            <p><a href="{project_url}">Zum Projekt</a></p>""",
+)
+registry.register(
+    "project_ended_failed", "en",
+    subject="The funding period of \"{title}\" has ended",
+    body="""
+            <h2>Funding period ended</h2>
+            <p>Hello{name},</p>
+            <p>The funding period of "{title}" has ended without reaching the funding goal.</p>
+            <p><a href="{project_url}">View project</a></p>""",
+)
+
+registry.register(
+    "test_simple", "de",
+    subject="Test-E-Mail von der Nutzerverwaltung",
+    body="""
+            <h2>Test-E-Mail</h2>
+            <p>Hallo{name},</p>
+            <p>Dies ist eine Test-E-Mail aus der Nutzerverwaltung.</p>
+            <p>Wenn du diese E-Mail erhältst, funktioniert der E-Mail-Versand korrekt.</p>""",
+)
+
+# Admin notifications (bulk sends): {message} is prepared once per job with text_to_html
+registry.register(
+    "notification", "de",
+    subject="{subject}",
+    body="""
+            <h2>{subject}</h2>
+            <p>Hallo{name},</p>
+            <p>{message}</p>""",
+)
+registry.register(
+    "notification", "en",
+    subject="{subject}",
+    body="""
+            <h2>{subject}</h2>
+            <p>Hello{name},</p>
+            <p>{message}</p>""",
+)
@@ -0,0 +1,130 @@
+"""
+Email delivery transports.
+
+``EMAIL_TRANSPORT`` selects how the outbox worker delivers mail:
+
+- ``resend``: the Resend API (production)
+- ``http``: POSTs each message as JSON to ``EMAIL_HTTP_URL`` (a local stand-in
+  such as a mail catcher during development and tests)
+- ``smtp``: a plain SMTP server, e.g. a local MailHog/Mailpit
+
+``send_batch`` returns one entry per message: None if it was accepted, or
+the error otherwise, so one bad address does not fail the whole batch.
+"""
+import json
+import smtplib
+from abc import ABC, abstractmethod
+import urllib.request
+from email.message import EmailMessage
+from typing import Optional
+from config import settings
+
+
+class Transport(ABC):
+    @abstractmethod
+    def send(self, message: dict) -> None:
+        ...
+
+    def send_batch(self, messages: list[dict]) -> list[Optional[Exception]]:
+        errors = []
+        for message in messages:
+            try:
+                self.send(message)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+
+class ResendTransport(Transport):
+    # Maximum messages per call to the batch endpoint
+    BATCH_LIMIT = 100
+
+    def send(self, message: dict) -> None:
+        import resend
+        resend.api_key = settings.RESEND_API_KEY
+        resend.Emails.send(message)
+
+    def send_batch(self, messages: list[dict]) -> list[Optional[Exception]]:
+        # The batch endpoint accepts or rejects a whole call
+        import resend
+        resend.api_key = settings.RESEND_API_KEY
+        errors = []
+        for i in range(0, len(messages), self.BATCH_LIMIT):
+            chunk = messages[i:i + self.BATCH_LIMIT]
+            try:
+                resend.Batch.send(chunk)
+                errors.extend([None] * len(chunk))
+            except Exception as e:
+                errors.extend([e] * len(chunk))
+        return errors
+
+
+class HttpTransport(Transport):
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, message: dict) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(message).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+
+class SmtpTransport(Transport):
+    def __init__(self, host: str, port: int, username: str = "", password: str = "", starttls: bool = False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=10)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    @staticmethod
+    def _mime(message: dict) -> EmailMessage:
+        mime = EmailMessage()
+        mime["From"] = message["from"]
+        mime["To"] = ", ".join(message["to"])
+        mime["Subject"] = message["subject"]
+        mime.set_content(message["html"], subtype="html")
+        return mime
+
+    def send(self, message: dict) -> None:
+        self.send_batch([message])
+
+    def send_batch(self, messages: list[dict]) -> list[Optional[Exception]]:
+        # One connection for the whole batch
+        errors = []
+        with self._connect() as smtp:
+            for message in messages:
+                try:
+                    smtp.send_message(self._mime(message))
+                    errors.append(None)
+                except smtplib.SMTPException as e:
+                    errors.append(e)
+        return errors
+
+
+def get_transport() -> Transport:
+    if settings.EMAIL_TRANSPORT == "http":
+        return HttpTransport(settings.EMAIL_HTTP_URL)
+    if settings.EMAIL_TRANSPORT == "smtp":
+        return SmtpTransport(
+            settings.EMAIL_SMTP_HOST,
+            settings.EMAIL_SMTP_PORT,
+            settings.EMAIL_SMTP_USERNAME,
+            settings.EMAIL_SMTP_PASSWORD,
+            settings.EMAIL_SMTP_STARTTLS,
+        )
+    return ResendTransport()
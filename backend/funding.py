@@ -0,0 +1,83 @@
+"""
+Maintained funding ratio of projects.
+
+``projects.funding_ratio`` is ``funding_current / funding_goal`` (NULL
+without a positive goal), so near-goal listings can filter and sort on an
+indexed column instead of computing the ratio for every financing project.
+
+It is kept in sync at two levels:
+
+- ORM: ``before_insert``/``before_update`` set it on the object, so it is
+  correct in the flushing session without a refresh.
+- Database triggers: any other write of ``funding_current`` or
+  ``funding_goal`` (bulk SQL, pledge counters, manual fixes) recomputes it.
+"""
+from decimal import Decimal
+from typing import Optional, Union
+from sqlalchemy import DDL, event
+
+Number = Union[Decimal, float, int, None]
+
+
+def funding_ratio(funding_current: Number, funding_goal: Number) -> Optional[float]:
+    if funding_goal is None or funding_goal <= 0:
+        return None
+    return float(funding_current or 0) / float(funding_goal)
+
+
+def _set_funding_ratio(mapper, connection, target) -> None:
+    ratio = funding_ratio(target.funding_current, target.funding_goal)
+    if target.funding_ratio != ratio:
+        target.funding_ratio = ratio
+
+
+def _ratio_sql(row: str, cast_real: bool = False) -> str:
+    current = f"COALESCE({row}.funding_current, 0)"
+    if cast_real:
+        # SQLite drops the fraction when both operands are integers
+        current = f"CAST({current} AS REAL)"
+    return f"CASE WHEN {row}.funding_goal > 0 THEN {current} / {row}.funding_goal END"
+
+
+# Shared with the migration so both create the same objects
+POSTGRES_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION projects_funding_ratio_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.funding_ratio := {_ratio_sql("NEW")};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER projects_funding_ratio_trigger
+    BEFORE INSERT OR UPDATE OF funding_current, funding_goal ON projects
+    FOR EACH ROW EXECUTE FUNCTION projects_funding_ratio_update()
+    """,
+]
+
+# SQLite cannot assign NEW in a trigger, so the row is updated after the write
+_SQLITE_RATIO = _ratio_sql("new", cast_real=True)
+SQLITE_DDL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_funding_ratio_after_insert AFTER INSERT ON projects BEGIN
+        UPDATE projects SET funding_ratio = {_SQLITE_RATIO} WHERE id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_funding_ratio_after_update AFTER UPDATE OF funding_current, funding_goal ON projects BEGIN
+        UPDATE projects SET funding_ratio = {_SQLITE_RATIO} WHERE id = new.id;
+    END
+    """,
+]
+
+
+def install(project_class) -> None:
+    """Keep ``funding_ratio`` of ``project_class`` (Project) in sync."""
+    event.listen(project_class, "before_insert", _set_funding_ratio)
+    event.listen(project_class, "before_update", _set_funding_ratio)
+    table = project_class.__table__
+    for statement in POSTGRES_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
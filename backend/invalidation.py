@@ -0,0 +1,119 @@
+"""
+Cross-worker cache invalidation channel.
+
+In-process caches subscribe to a topic; ``publish()`` runs the local handlers
+immediately and, on PostgreSQL, broadcasts the message to every other worker
+process via LISTEN/NOTIFY. Other databases (SQLite in tests and local
+development) only have a single process, so local delivery is enough.
+
+Handlers receive the published payload dict. After the listener reconnects,
+notifications may have been missed, so every handler is called with
+``{"all": True}`` and must drop everything it caches.
+"""
+import json
+import os
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable
+from sqlalchemy import text
+from config import settings
+from database import engine
+
+_handlers: dict[str, list[Callable[[dict], None]]] = defaultdict(list)
+_origin = uuid.uuid4().hex
+_listener: threading.Thread = None
+_stop = threading.Event()
+
+
+def subscribe(topic: str, handler: Callable[[dict], None]) -> None:
+    """Register ``handler`` for messages published on ``topic``."""
+    _handlers[topic].append(handler)
+
+
+def _dispatch(topic: str, payload: dict) -> None:
+    for handler in list(_handlers.get(topic, [])):
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"Invalidation handler error on '{topic}': {e}", flush=True)
+
+
+def _dispatch_all_reset() -> None:
+    for topic in list(_handlers):
+        _dispatch(topic, {"all": True})
+
+
+def _broadcast_enabled() -> bool:
+    return os.environ.get("TESTING") != "true" and engine.dialect.name == "postgresql"
+
+
+def publish(topic: str, payload: dict) -> None:
+    """Deliver ``payload`` to local subscribers and to all other workers."""
+    _dispatch(topic, payload)
+
+    if not _broadcast_enabled():
+        return
+
+    message = json.dumps({"origin": _origin, "topic": topic, "payload": payload})
+    try:
+        with engine.connect() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :message)"),
+                {"channel": settings.INVALIDATION_CHANNEL, "message": message}
+            )
+            conn.commit()
+    except Exception as e:
+        print(f"Error publishing invalidation on '{topic}': {e}", flush=True)
+
+
+def _listen() -> None:
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = engine.raw_connection()
+            dbapi_conn = conn.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{settings.INVALIDATION_CHANNEL}"')
+
+            # Anything published while we were disconnected is lost
+            _dispatch_all_reset()
+
+            while not _stop.is_set():
+                if select.select([dbapi_conn], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    notify = dbapi_conn.notifies.pop(0)
+                    message = json.loads(notify.payload)
+                    if message.get("origin") != _origin:
+                        _dispatch(message["topic"], message["payload"])
+        except Exception as e:
+            print(f"Invalidation listener error: {e}", flush=True)
+            _stop.wait(5)
+        finally:
+            if conn is not None:
+                try:
+                    conn.invalidate()
+                except Exception:
+                    pass
+
+
+def start() -> None:
+    """Start the background LISTEN thread (PostgreSQL only)."""
+    global _listener
+    if not _broadcast_enabled() or _listener is not None:
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen, name="invalidation-listener", daemon=True)
+    _listener.start()
+
+
+def stop() -> None:
+    global _listener
+    _stop.set()
+    if _listener is not None:
+        _listener.join(timeout=5)
+        _listener = None
@@ -0,0 +1,204 @@
+"""
+Asymmetric JWT signing key ring.
+
+When ``ALGORITHM`` is an asymmetric algorithm (RS256), access tokens are
+signed with the newest active key from ``jwt_signing_keys`` and carry its
+``kid`` header. Public keys are published at ``/.well-known/jwks.json`` so
+other services can verify tokens locally.
+
+Rotation: a new key is created every ``JWT_KEY_ROTATION_DAYS``. It is
+published ``JWT_KEY_PREPUBLISH_MINUTES`` before it starts signing, so
+verifiers that cache the JWKS pick it up first. Superseded keys stay
+published until every token they signed has expired, then they are deleted.
+Private keys are stored encrypted with a key derived from ``SECRET_KEY``.
+Every worker runs the check at startup and hourly; on PostgreSQL an advisory
+lock makes them take turns, so only one of them creates or rotates a key.
+"""
+import base64
+import hashlib
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+from sqlalchemy import func, or_, select
+from config import settings
+from database import SessionLocal
+import models
+
+# Minimum time between reloads triggered by an unknown kid
+_UNKNOWN_KID_RELOAD_SECONDS = 30
+
+# Advisory lock key serializing key creation and rotation across workers
+ROTATION_LOCK_KEY = 0x4A574B52
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """Normalize DB datetimes (naive on SQLite, aware on Postgres) to naive UTC."""
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _fernet() -> Fernet:
+    digest = hashlib.sha256(f"jwt-signing-keys:{settings.SECRET_KEY}".encode("utf-8")).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+class SigningKeyEntry:
+    """Decrypted, in-memory view of a ``jwt_signing_keys`` row."""
+
+    def __init__(self, row: models.SigningKey):
+        self.kid = row.kid
+        self.algorithm = row.algorithm
+        self.private_key = _fernet().decrypt(row.private_key.encode("utf-8")).decode("utf-8")
+        self.public_key = row.public_key
+        self.activates_at = _utc(row.activates_at)
+        self.retires_at = _utc(row.retires_at)
+
+    def public_jwk(self) -> dict:
+        data = jwk.construct(self.public_key, self.algorithm).to_dict()
+        data.update({"kid": self.kid, "use": "sig"})
+        return data
+
+
+class KeyRing:
+    """Per-process cache of the signing keys stored in the database."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self._keys: list[SigningKeyEntry] = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            rows = db.query(models.SigningKey).filter(
+                or_(models.SigningKey.retires_at.is_(None), models.SigningKey.retires_at > now)
+            ).order_by(models.SigningKey.activates_at.desc()).all()
+            keys = [SigningKeyEntry(row) for row in rows]
+        finally:
+            db.close()
+
+        with self._lock:
+            self._keys = keys
+            self._loaded_at = time.monotonic()
+
+    def _refresh_if_stale(self) -> None:
+        if time.monotonic() - self._loaded_at > settings.JWT_KEY_REFRESH_SECONDS:
+            self._load()
+
+    def signing_key(self) -> SigningKeyEntry:
+        """Return the newest key that is already active."""
+        self._refresh_if_stale()
+        key = self._active_key()
+        if key is None:
+            self.ensure_current_key()
+            key = self._active_key()
+        return key
+
+    def _active_key(self) -> Optional[SigningKeyEntry]:
+        now = datetime.utcnow()
+        with self._lock:
+            for key in self._keys:
+                if key.activates_at <= now and (key.retires_at is None or key.retires_at > now):
+                    return key
+        return None
+
+    def verification_key(self, kid: str) -> Optional[SigningKeyEntry]:
+        self._refresh_if_stale()
+        key = self._find(kid)
+        if key is None and time.monotonic() - self._loaded_at > _UNKNOWN_KID_RELOAD_SECONDS:
+            # Possibly created by another worker since our last load
+            self._load()
+            key = self._find(kid)
+        return key
+
+    def _find(self, kid: str) -> Optional[SigningKeyEntry]:
+        with self._lock:
+            return next((key for key in self._keys if key.kid == kid), None)
+
+    def jwks(self) -> dict:
+        self._refresh_if_stale()
+        with self._lock:
+            return {"keys": [key.public_jwk() for key in self._keys]}
+
+    def ensure_current_key(self) -> str:
+        """Create the first key or rotate when due, and delete fully retired keys."""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                # Held until commit: the next worker then sees this one's key and finds it current
+                db.execute(select(func.pg_advisory_xact_lock(ROTATION_LOCK_KEY)))
+
+            deleted = db.query(models.SigningKey).filter(
+                models.SigningKey.retires_at.isnot(None),
+                models.SigningKey.retires_at <= now
+            ).delete(synchronize_session=False)
+
+            newest = db.query(models.SigningKey).order_by(models.SigningKey.activates_at.desc()).first()
+            if newest is None:
+                self._create_key(db, activates_at=now)
+                result = "created"
+            elif _utc(newest.activates_at) <= now - timedelta(days=settings.JWT_KEY_ROTATION_DAYS):
+                self.rotate(db)
+                result = "rotated"
+            else:
+                result = "current"
+
+            db.commit()
+        finally:
+            db.close()
+
+        self._load()
+        return f"{result}, {deleted} retired key(s) deleted"
+
+    def rotate(self, db, activates_at: Optional[datetime] = None) -> models.SigningKey:
+        """Add a new key and schedule retirement of the keys it supersedes."""
+        if activates_at is None:
+            activates_at = datetime.utcnow() + timedelta(minutes=settings.JWT_KEY_PREPUBLISH_MINUTES)
+        # Tokens signed up to activation must stay verifiable until they expire
+        retires_at = activates_at + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES + 5)
+
+        db.query(models.SigningKey).filter(
+            models.SigningKey.retires_at.is_(None)
+        ).update({models.SigningKey.retires_at: retires_at}, synchronize_session=False)
+
+        return self._create_key(db, activates_at=activates_at)
+
+    def _create_key(self, db, activates_at: datetime) -> models.SigningKey:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=settings.JWT_KEY_SIZE)
+        private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+
+        key = models.SigningKey(
+            kid=secrets.token_urlsafe(12),
+            algorithm=settings.ALGORITHM,
+            private_key=_fernet().encrypt(private_pem).decode("utf-8"),
+            public_key=public_pem.decode("utf-8"),
+            activates_at=activates_at,
+        )
+        db.add(key)
+        db.flush()
+        return key
+
+
+def is_asymmetric() -> bool:
+    return settings.ALGORITHM.startswith("RS")
+
+
+key_ring = KeyRing(SessionLocal)
@@ -0,0 +1,98 @@
+"""
+Leader election across worker processes.
+
+Every worker runs the same background tasks. Jobs that must run in one place
+at a time (the project lifecycle scheduler) ask ``is_leader()`` first. On
+PostgreSQL the leader is the worker holding a session-level advisory lock on
+a dedicated connection; it stays leader until that connection closes (worker
+exit or lost connection), and then the next worker to ask takes over. With
+SQLite there is a single process, which is always the leader.
+"""
+import threading
+from sqlalchemy import func, select, text
+from database import engine
+from metrics import register_collector
+
+
+class LeaderElection:
+    def __init__(self, name: str, lock_key: int):
+        self.name = name
+        self.lock_key = lock_key
+        self._connection = None
+        self._lock = threading.Lock()
+        self.elections_won = 0
+
+    def _drop(self) -> None:
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+    def is_leader(self) -> bool:
+        """True if this worker leads, trying to become leader if nobody does."""
+        if engine.dialect.name != "postgresql":
+            return True
+
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(text("SELECT 1"))
+                    self._connection.commit()
+                    return True
+                except Exception as e:
+                    print(f"Leader '{self.name}': lost database connection ({e}), stepping down", flush=True)
+                    self._drop()
+
+            connection = engine.connect()
+            try:
+                acquired = connection.execute(select(func.pg_try_advisory_lock(self.lock_key))).scalar()
+                # The session lock outlives the transaction; don't sit idle in one
+                connection.commit()
+            except Exception:
+                connection.close()
+                raise
+            if not acquired:
+                connection.close()
+                return False
+
+            self._connection = connection
+            self.elections_won += 1
+            print(f"Leader '{self.name}': this worker is now the leader", flush=True)
+            return True
+
+    def resign(self) -> None:
+        """Give up leadership (at shutdown) so another worker takes over at once."""
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(select(func.pg_advisory_unlock(self.lock_key)))
+                self._connection.commit()
+            except Exception:
+                pass
+            self._drop()
+
+    def stats(self) -> dict:
+        return {
+            "leader": engine.dialect.name != "postgresql" or self._connection is not None,
+            "elections_won": self.elections_won,
+        }
+
+
+_elections: dict[str, LeaderElection] = {}
+
+
+def election(name: str, lock_key: int) -> LeaderElection:
+    """The election for ``name``, created on first use."""
+    if name not in _elections:
+        _elections[name] = LeaderElection(name, lock_key)
+    return _elections[name]
+
+
+def resign_all() -> None:
+    for leader in _elections.values():
+        leader.resign()
+
+
+register_collector("leaders", lambda: {name: leader.stats() for name, leader in _elections.items()})
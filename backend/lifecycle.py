@@ -0,0 +1,140 @@
+"""
+Scheduled project lifecycle.
+
+A periodic job moves projects along their dates:
+
+- ``verified`` projects whose ``start_date`` has come start ``financing``
+- ``financing`` projects whose ``financing_end`` has passed end as
+  ``ended_success`` if the pledged total reaches the goal (or there is no
+  goal), otherwise ``ended_failed``
+
+Due projects are found through partial indexes on ``start_date`` (verified
+only) and ``financing_end`` (financing only) and changed in batches of
+``LIFECYCLE_BATCH_SIZE``, one transaction each. The changes go through the
+ORM, so the usual project events invalidate listings and search in every
+worker, and the starter's notice is queued in the email outbox in the same
+transaction.
+
+Only the elected leader worker runs the job (see leader.py); row locks with
+``SKIP LOCKED`` additionally keep a batch from being changed twice should
+leadership move while it runs.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+from email_service import send_project_status_email
+import leader
+import models
+
+STATUS_VERIFIED = "verified"
+STATUS_FINANCING = "financing"
+STATUS_ENDED_SUCCESS = "ended_success"
+STATUS_ENDED_FAILED = "ended_failed"
+
+# Advisory lock key of the scheduler's leader election
+LEADER_LOCK_KEY = 0x4C494645
+
+election = leader.election("lifecycle", LEADER_LOCK_KEY)
+
+
+def _due(db: Session, status: str, column, now: datetime, batch_size: int) -> list[models.Project]:
+    return db.query(models.Project).filter(
+        models.Project.status == status,
+        column <= now
+    ).order_by(column, models.Project.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+
+def _notify_owners(db: Session, projects: list[models.Project]) -> None:
+    owners = {
+        row.id: row for row in db.query(models.User.id, models.User.email, models.User.full_name).filter(
+            models.User.id.in_({project.owner_id for project in projects})
+        )
+    }
+    for project in projects:
+        owner = owners.get(project.owner_id)
+        if owner:
+            send_project_status_email(db, owner.email, project.status, project.title, project.slug, owner.full_name)
+
+
+def pledged_totals(db: Session, project_ids: list[int]) -> dict[int, Decimal]:
+    """
+    Everything pledged to the projects: funding_current plus amounts still
+    in the funding shards or waiting in the pledge queue.
+    """
+    totals = defaultdict(Decimal)
+    queries = [
+        db.query(models.Project.id, func.coalesce(models.Project.funding_current, 0)).filter(
+            models.Project.id.in_(project_ids)
+        ),
+        db.query(models.FundingShard.project_id, func.sum(models.FundingShard.amount)).filter(
+            models.FundingShard.project_id.in_(project_ids)
+        ).group_by(models.FundingShard.project_id),
+        db.query(models.QueuedPledge.project_id, func.sum(models.QueuedPledge.amount)).filter(
+            models.QueuedPledge.project_id.in_(project_ids),
+            models.QueuedPledge.status == "pending"
+        ).group_by(models.QueuedPledge.project_id),
+    ]
+    for query in queries:
+        for project_id, amount in query:
+            totals[project_id] += Decimal(amount or 0)
+    return totals
+
+
+def start_due_campaigns(db: Session, now: Optional[datetime] = None, batch_size: int = 100) -> int:
+    """Start financing for verified projects whose start date has come; returns how many started."""
+    now = now or datetime.utcnow()
+    started = 0
+    while True:
+        projects = _due(db, STATUS_VERIFIED, models.Project.start_date, now, batch_size)
+        for project in projects:
+            project.status = STATUS_FINANCING
+            project.financing_start = now
+        if projects:
+            _notify_owners(db, projects)
+        db.commit()
+
+        started += len(projects)
+        if len(projects) < batch_size:
+            return started
+
+
+def end_due_campaigns(db: Session, now: Optional[datetime] = None, batch_size: int = 100) -> int:
+    """End financing projects whose end date has passed; returns how many ended."""
+    now = now or datetime.utcnow()
+    ended = 0
+    while True:
+        projects = _due(db, STATUS_FINANCING, models.Project.financing_end, now, batch_size)
+        totals = pledged_totals(db, [project.id for project in projects]) if projects else {}
+        for project in projects:
+            reached = project.funding_goal is None or totals[project.id] >= project.funding_goal
+            project.status = STATUS_ENDED_SUCCESS if reached else STATUS_ENDED_FAILED
+        if projects:
+            _notify_owners(db, projects)
+        db.commit()
+
+        ended += len(projects)
+        if len(projects) < batch_size:
+            return ended
+
+
+def run(db: Session, now: Optional[datetime] = None) -> dict:
+    batch_size = settings.LIFECYCLE_BATCH_SIZE
+    return {
+        "started": start_due_campaigns(db, now, batch_size),
+        "ended": end_due_campaigns(db, now, batch_size),
+    }
+
+
+def run_job() -> dict:
+    if not election.is_leader():
+        return {"leader": False}
+    db = SessionLocal()
+    try:
+        return run(db)
+    finally:
+        db.close()
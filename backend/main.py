@@ -1,13 +1,33 @@
+import functools
 import os
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from database import engine, SessionLocal
 import models
-from routers import auth, users, admin, two_factor, projects, profiles, ai_coach, uploads
-from security import get_password_hash
+from routers import auth, users, admin, two_factor, projects, rewards, profiles, ai_coach, uploads, well_known
+from security import get_password_hash, require_metrics_access
 from config import settings
+from bulkhead import configure_default_threadpool
+import metrics
+from pagination import NEXT_CURSOR_HEADER
+import invalidation
+import background
+import jwt_keys
+import password_hashing
+import one_time_tokens
+import session_store
+import rate_limit
+import email_outbox
+import email_templates
+import bulk_email
+import typeahead
+import pledges
+import pledge_queue
+import rewards as reward_reservations
+import lifecycle
+import leader
 
 # Skip migrations in test mode - use create_all instead
 if os.environ.get("TESTING") != "true":
@@ -31,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(auth.router)
@@ -38,9 +59,11 @@ app.include_router(users.router)
 app.include_router(admin.router)
 app.include_router(two_factor.router)
 app.include_router(projects.router)
+app.include_router(rewards.router)
 app.include_router(profiles.router)
 app.include_router(ai_coach.router)
 app.include_router(uploads.router)
+app.include_router(well_known.router)
 
 # Configure static file serving for uploads
 UPLOAD_DIR = Path(os.environ.get("UPLOAD_DIR", "./uploads"))
@@ -48,6 +71,112 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
 
 
+@app.on_event("startup")
+async def configure_executors():
+    configure_default_threadpool()
+
+
+@app.on_event("startup")
+def compile_email_templates():
+    email_templates.registry.compile()
+
+
+@app.on_event("startup")
+def load_typeahead_index():
+    # Tests use their own database; the index is built on the first lookup
+    if os.environ.get("TESTING") == "true":
+        return
+    db = SessionLocal()
+    try:
+        typeahead.index.rebuild(db)
+    except Exception as e:
+        # Retried lazily on the first lookup
+        print(f"Error building typeahead index: {e}", flush=True)
+        typeahead.clear()
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_invalidation_listener():
+    invalidation.start()
+
+
+@app.on_event("shutdown")
+def stop_invalidation_listener():
+    invalidation.stop()
+
+
+@app.on_event("startup")
+def start_background_tasks():
+    if jwt_keys.is_asymmetric():
+        jwt_keys.key_ring.ensure_current_key()
+        background.register_task("jwt_key_rotation", 3600, jwt_keys.key_ring.ensure_current_key)
+    background.register_task(
+        "one_time_token_purge",
+        settings.ONE_TIME_TOKEN_PURGE_INTERVAL_SECONDS,
+        one_time_tokens.purge_expired_job
+    )
+    background.register_task(
+        "session_sweep",
+        settings.SESSION_SWEEP_INTERVAL_SECONDS,
+        session_store.sweep_expired_job
+    )
+    background.register_task(
+        "session_touch_flush",
+        settings.SESSION_TOUCH_FLUSH_SECONDS,
+        session_store.flush_touches_job
+    )
+    background.register_task(
+        email_outbox.WORKER_TASK,
+        settings.EMAIL_OUTBOX_POLL_SECONDS,
+        email_outbox.deliver_pending_job
+    )
+    background.register_task(
+        "email_outbox_purge",
+        settings.EMAIL_OUTBOX_PURGE_INTERVAL_SECONDS,
+        email_outbox.purge_job
+    )
+    background.register_task(
+        bulk_email.WORKER_TASK,
+        settings.EMAIL_BULK_POLL_SECONDS,
+        bulk_email.run_pending_jobs
+    )
+    background.register_task(
+        "funding_compaction",
+        settings.FUNDING_COMPACTION_INTERVAL_SECONDS,
+        pledges.compact_job
+    )
+    for partition in range(settings.PLEDGE_QUEUE_PARTITIONS):
+        background.register_task(
+            pledge_queue.task_name(partition),
+            settings.PLEDGE_QUEUE_POLL_SECONDS,
+            functools.partial(pledge_queue.consume_job, partition)
+        )
+    background.register_task("pledge_queue_purge", 3600, pledge_queue.purge_applied_job)
+    background.register_task(
+        "reward_reservation_expiry",
+        settings.REWARD_EXPIRY_INTERVAL_SECONDS,
+        reward_reservations.expire_job
+    )
+    background.register_task("project_lifecycle", settings.LIFECYCLE_INTERVAL_SECONDS, lifecycle.run_job)
+    if settings.RATE_LIMIT_BACKEND == "database":
+        background.register_task(
+            "rate_limit_purge",
+            settings.RATE_LIMIT_PURGE_INTERVAL_SECONDS,
+            rate_limit.purge_expired_job
+        )
+    background.start()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    background.stop()
+    leader.resign_all()
+    session_store.flush_touches_job()
+    password_hashing.shutdown()
+
+
 @app.on_event("startup")
 def create_admin_user():
     db = SessionLocal()
@@ -88,3 +217,8 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+def get_metrics():
+    return metrics.collect()
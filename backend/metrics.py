@@ -0,0 +1,33 @@
+"""
+In-process metrics registry.
+
+Components register a collector callable under a name; ``collect()`` calls
+every collector and returns a JSON-serialisable snapshot that is served by
+the ``/metrics`` endpoint (admins, or scrapers with ``METRICS_TOKEN``).
+Values are per worker process.
+"""
+import threading
+from typing import Callable
+
+_collectors: dict[str, Callable[[], dict]] = {}
+_lock = threading.Lock()
+
+
+def register_collector(name: str, collector: Callable[[], dict]) -> None:
+    """Register (or replace) the collector for ``name``."""
+    with _lock:
+        _collectors[name] = collector
+
+
+def collect() -> dict:
+    """Return a snapshot of all registered metrics."""
+    with _lock:
+        collectors = dict(_collectors)
+
+    snapshot = {}
+    for name, collector in sorted(collectors.items()):
+        try:
+            snapshot[name] = collector()
+        except Exception as e:
+            snapshot[name] = {"error": str(e)}
+    return snapshot
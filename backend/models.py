@@ -1,7 +1,10 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Numeric
-from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Index, Float
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from database import Base
+import funding
+import text_search
 
 
 class User(Base):
@@ -21,11 +24,11 @@ class User(Base):
     two_factor_enabled = Column(Boolean, default=False)
     two_factor_secret = Column(String(32), nullable=True)
 
-    # Password reset
+    # Password reset (legacy, superseded by one_time_tokens)
     reset_token = Column(String(255), nullable=True)
     reset_token_expires = Column(DateTime(timezone=True), nullable=True)
 
-    # Magic link login
+    # Magic link login (legacy, superseded by one_time_tokens)
     magic_link_token = Column(String(255), nullable=True)
     magic_link_expires = Column(DateTime(timezone=True), nullable=True)
 
@@ -35,6 +38,9 @@ class User(Base):
     # Avatar
     avatar_url = Column(String(500), nullable=True)
 
+    # Incremented on admin changes, password changes and logout to revoke access tokens
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+
     # Relationship to projects
     projects = relationship("Project", back_populates="owner")
 
@@ -52,6 +58,7 @@ class Project(Base):
     # Funding details
     funding_goal = Column(Numeric(12, 2), nullable=True)
     funding_current = Column(Numeric(12, 2), default=0)
+    funding_ratio = Column(Float, nullable=True)  # funding_current / funding_goal, maintained (see funding.py)
 
     # Status: draft, submitted, verified, financing, ended_success, ended_failed
     status = Column(String(50), default="draft")
@@ -81,8 +88,121 @@ class Project(Base):
     ai_generated = Column(Boolean, default=False)
     ai_thread_id = Column(String(36), nullable=True)  # Reference to AI thread that created this
 
+    # Full-text search document, maintained by a database trigger (PostgreSQL only)
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), nullable=True))
+
     # Relationship
     owner = relationship("User", back_populates="projects")
+    reward_tiers = relationship(
+        "RewardTier", back_populates="project", cascade="all, delete-orphan",
+        order_by="(RewardTier.amount, RewardTier.id)"
+    )
+
+    __table_args__ = (
+        # Keyset pagination of the public and admin listings (newest first)
+        Index("ix_projects_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_projects_type_status_created_at", "project_type", "status", "created_at"),
+        # Near-goal listing: range scan over financing projects only
+        Index(
+            "ix_projects_financing_funding_ratio", "funding_ratio",
+            postgresql_where=text("status = 'financing'"),
+            sqlite_where=text("status = 'financing'"),
+        ),
+        # Lifecycle scheduler: verified projects due to start, financing projects due to end
+        Index(
+            "ix_projects_verified_start_date", "start_date",
+            postgresql_where=text("status = 'verified'"),
+            sqlite_where=text("status = 'verified'"),
+        ),
+        Index(
+            "ix_projects_financing_financing_end", "financing_end",
+            postgresql_where=text("status = 'financing'"),
+            sqlite_where=text("status = 'financing'"),
+        ),
+    )
+
+
+text_search.install(Project.__table__)
+funding.install(Project)
+
+
+class RewardTier(Base):
+    """A reward (Dankeschön) backers receive for pledging at least ``amount``."""
+    __tablename__ = "reward_tiers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False)
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=True)
+    amount = Column(Numeric(12, 2), nullable=False)  # Minimum pledge
+    quantity = Column(Integer, nullable=True)  # None = unlimited
+    reserved = Column(Integer, default=0, nullable=False)  # Held and claimed reservations
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    project = relationship("Project", back_populates="reward_tiers")
+
+
+class RewardReservation(Base):
+    """One unit of a reward tier held for a backer until they pledge or the hold expires."""
+    __tablename__ = "reward_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tier_id = Column(Integer, ForeignKey("reward_tiers.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    status = Column(String(16), default="held", nullable=False)  # held, claimed, released, expired
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_reward_reservations_status_expires_at", "status", "expires_at"),
+        # One live hold per backer and tier
+        Index(
+            "uq_reward_reservations_held_tier_user", "tier_id", "user_id", unique=True,
+            postgresql_where=text("status = 'held'"),
+            sqlite_where=text("status = 'held'"),
+        ),
+    )
+
+
+class Pledge(Base):
+    """A backer's pledge to a project (append-only ledger)."""
+    __tablename__ = "pledges"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True, nullable=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    reward_tier_id = Column(Integer, ForeignKey("reward_tiers.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class FundingShard(Base):
+    """Striped counter of pledged amounts not yet folded into projects.funding_current."""
+    __tablename__ = "funding_shards"
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    shard = Column(Integer, primary_key=True)  # 0 .. FUNDING_SHARDS - 1
+    amount = Column(Numeric(12, 2), nullable=False, default=0)
+
+
+class QueuedPledge(Base):
+    """Pledge accepted from a backer and waiting to be applied to the ledger by a queue consumer."""
+    __tablename__ = "pledge_queue"
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    amount = Column(Numeric(12, 2), nullable=False)
+    reward_tier_id = Column(Integer, ForeignKey("reward_tiers.id", ondelete="SET NULL"), nullable=True)
+    partition = Column(Integer, nullable=False)  # project_id % PLEDGE_QUEUE_PARTITIONS
+    status = Column(String(16), default="pending", nullable=False)  # pending, applied
+    pledge_id = Column(Integer, ForeignKey("pledges.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    applied_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_pledge_queue_partition_status_id", "partition", "status", "id"),
+    )
 
 
 class Session(Base):
@@ -92,10 +212,39 @@ class Session(Base):
     user_id = Column(Integer, index=True, nullable=False)
     session_token = Column(String(255), unique=True, index=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)  # Used by the sweeper
     ip_address = Column(String(45), nullable=True)
     user_agent = Column(Text, nullable=True)
 
+    __table_args__ = (
+        # Oldest-first eviction when a user exceeds SESSION_MAX_PER_USER
+        Index("ix_sessions_user_id_created_at", "user_id", "created_at"),
+    )
+
+
+class OneTimeToken(Base):
+    __tablename__ = "one_time_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # HMAC-SHA256 of purpose + token
+    purpose = Column(String(32), nullable=False)  # magic_code, password_reset
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SigningKey(Base):
+    __tablename__ = "jwt_signing_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kid = Column(String(64), unique=True, index=True, nullable=False)
+    algorithm = Column(String(10), nullable=False)
+    private_key = Column(Text, nullable=False)  # PEM, encrypted with a key derived from SECRET_KEY
+    public_key = Column(Text, nullable=False)  # PEM
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    activates_at = Column(DateTime(timezone=True), nullable=False)  # Published in JWKS before it signs
+    retires_at = Column(DateTime(timezone=True), nullable=True)  # Removed from JWKS after this
+
 
 # AI Coach Models
 class AIThread(Base):
@@ -158,3 +307,58 @@ class AIDraft(Base):
     thread = relationship("AIThread", back_populates="draft")
     user = relationship("User")
     converted_project = relationship("Project")
+
+
+class RateLimitBucket(Base):
+    """GCRA state for the shared rate limiter backend."""
+    __tablename__ = "rate_limits"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), unique=True, index=True, nullable=False)  # "<limit name>:<client key>"
+    tat = Column(Float, index=True, nullable=False)  # Theoretical arrival time (unix seconds)
+
+
+class EmailOutbox(Base):
+    """Emails waiting for (or finished with) delivery by the outbox worker."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    html = Column(Text, nullable=False)
+    status = Column(String(16), default="pending", nullable=False)  # pending, sent, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)  # Also the lease while a send is in flight
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class BulkEmailJob(Base):
+    """Admin-initiated notification to an audience, sent in chunks by a background worker."""
+    __tablename__ = "bulk_email_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    audience = Column(String(50), nullable=False)  # all_users, starters, backers
+    project_status = Column(String(50), nullable=True)  # Optional project filter for starters and backers
+    subject = Column(String(500), nullable=False)
+    message = Column(Text, nullable=False)  # Plain text, escaped when rendered
+    locale = Column(String(10), nullable=True)
+
+    # Status: queued, running, completed, failed
+    status = Column(String(20), default="queued", index=True, nullable=False)
+    total_recipients = Column(Integer, default=0, nullable=False)
+    sent_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)  # Handed to the outbox for retries
+    last_user_id = Column(Integer, default=0, nullable=False)  # Resume cursor (users.id)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Stale running jobs are resumed
+    finished_at = Column(DateTime(timezone=True), nullable=True)
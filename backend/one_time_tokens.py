@@ -0,0 +1,100 @@
+"""
+One-time tokens (magic login codes, password reset links).
+
+Tokens are stored in ``one_time_tokens`` as a keyed hash, so verification is
+a single unique-index probe and a leaked table does not reveal usable codes.
+Issuing a token no longer writes to the ``users`` row. Expired rows are
+purged in batches by a background task.
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, delete_in_batches
+import models
+
+PURPOSE_MAGIC_CODE = "magic_code"
+PURPOSE_PASSWORD_RESET = "password_reset"
+
+# Attempts to find an unused token (6-digit codes can collide across users)
+_MAX_ISSUE_ATTEMPTS = 5
+
+
+def hash_token(purpose: str, token: str) -> str:
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"),
+        f"{purpose}:{token}".encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def issue_token(
+    db: Session,
+    user_id: int,
+    purpose: str,
+    expires_in: timedelta,
+    generate: Callable[[], str]
+) -> str:
+    """
+    Replace the user's token for ``purpose`` with a fresh one and return it.
+
+    The caller commits. Collisions with another user's live token are
+    retried with a newly generated token.
+    """
+    db.query(models.OneTimeToken).filter(
+        models.OneTimeToken.user_id == user_id,
+        models.OneTimeToken.purpose == purpose
+    ).delete(synchronize_session=False)
+
+    expires_at = datetime.utcnow() + expires_in
+    for _ in range(_MAX_ISSUE_ATTEMPTS):
+        token = generate()
+        try:
+            with db.begin_nested():
+                db.add(models.OneTimeToken(
+                    token_hash=hash_token(purpose, token),
+                    purpose=purpose,
+                    user_id=user_id,
+                    expires_at=expires_at
+                ))
+            return token
+        except IntegrityError:
+            continue
+
+    raise RuntimeError(f"Could not issue a unique {purpose} token")
+
+
+def consume_token(db: Session, purpose: str, token: str) -> Optional[int]:
+    """Delete a valid token and return its user_id, or None. The caller commits."""
+    record = db.query(models.OneTimeToken).filter(
+        models.OneTimeToken.token_hash == hash_token(purpose, token),
+        models.OneTimeToken.purpose == purpose,
+        models.OneTimeToken.expires_at > datetime.utcnow()
+    ).first()
+
+    if not record:
+        return None
+
+    user_id = record.user_id
+    db.delete(record)
+    return user_id
+
+
+def purge_expired(db: Session, batch_size: int = 1000) -> int:
+    """Delete expired tokens in batches of ``batch_size``; returns rows deleted."""
+    return delete_in_batches(
+        db, models.OneTimeToken,
+        models.OneTimeToken.expires_at <= datetime.utcnow(),
+        batch_size=batch_size
+    )
+
+
+def purge_expired_job() -> int:
+    db = SessionLocal()
+    try:
+        return purge_expired(db, settings.ONE_TIME_TOKEN_PURGE_BATCH_SIZE)
+    finally:
+        db.close()
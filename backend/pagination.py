@@ -0,0 +1,74 @@
+"""
+Keyset (cursor) pagination for newest-first listings.
+
+A cursor is the opaque, URL-safe encoding of the last row's
+``(created_at, id)``. The next page is everything strictly older than that
+pair, so the database seeks straight into the ``(..., created_at, id)``
+index instead of reading and discarding ``OFFSET`` rows, and rows published
+while a user scrolls do not shift the following pages.
+
+Listings keep returning a plain JSON list; the cursor for the next page is
+sent in the ``X-Next-Cursor`` response header and omitted on the last page.
+"""
+import base64
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Query
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor for a row's sort key, e.g. ``(created_at, id)``."""
+    raw = "|".join(value.isoformat() if isinstance(value, datetime) else repr(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor into values of ``types`` (datetime, int, float)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        parts = raw.split("|")
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(part) if kind is datetime else kind(part)
+            for kind, part in zip(types, parts)
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _timestamp(query: Query, value):
+    """
+    ``value`` as a comparable timestamp. SQLite keeps datetimes as text in
+    two shapes (``func.now()`` writes no fraction, the ORM writes
+    microseconds), which do not compare as strings, so both are rewritten
+    to one format there.
+    """
+    if query.session.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%d %H:%M:%f", value)
+    return value
+
+
+def keyset_page(query: Query, model, cursor: Optional[str], limit: int, response: Response) -> list:
+    """
+    Return up to ``limit`` rows of ``query`` newest first, starting after
+    ``cursor``, and set the next page's cursor header when there is one.
+    """
+    created_key = _timestamp(query, model.created_at)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor, datetime, int)
+        query = query.filter(tuple_(created_key, model.id) < tuple_(_timestamp(query, created_at), row_id))
+
+    # One extra row tells us whether another page exists
+    rows = query.order_by(created_key.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows
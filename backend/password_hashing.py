@@ -0,0 +1,113 @@
+"""
+Password hashing service.
+
+bcrypt and Argon2id hashing run in a dedicated process pool so login,
+register and password-reset bursts don't pin the request threadpool or
+hold the GIL. The scheme and cost used for new hashes come from settings.
+Hashes made with another scheme or cost still verify and are reported by
+``needs_rehash`` so login can upgrade them transparently.
+
+With ``PASSWORD_HASH_WORKERS=0`` hashing runs inline in the calling thread.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from config import settings
+
+_executor: ProcessPoolExecutor = None
+_executor_lock = threading.Lock()
+
+
+# Worker functions (module level so they can be pickled into the pool)
+def _hash(password: str, scheme: str, bcrypt_rounds: int, argon2_params: dict) -> str:
+    if scheme == "argon2id":
+        from argon2 import PasswordHasher
+        return PasswordHasher(**argon2_params).hash(password)
+    salt = bcrypt.gensalt(rounds=bcrypt_rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _verify(password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith("$argon2"):
+        from argon2 import PasswordHasher
+        from argon2.exceptions import VerificationError, InvalidHashError
+        try:
+            return PasswordHasher().verify(hashed_password, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def _hash_many(passwords: list[str], scheme: str, bcrypt_rounds: int, argon2_params: dict) -> list[str]:
+    return [_hash(password, scheme, bcrypt_rounds, argon2_params) for password in passwords]
+
+
+def _argon2_params() -> dict:
+    return {
+        "time_cost": settings.ARGON2_TIME_COST,
+        "memory_cost": settings.ARGON2_MEMORY_COST_KIB,
+        "parallelism": settings.ARGON2_PARALLELISM,
+    }
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: forking a process that runs threads is unsafe
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _run(fn, *args):
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    return _get_executor().submit(fn, *args).result()
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password, settings.PASSWORD_HASH_SCHEME, settings.BCRYPT_ROUNDS, _argon2_params())
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords, spread across the pool in chunks."""
+    if not passwords:
+        return []
+    args = (settings.PASSWORD_HASH_SCHEME, settings.BCRYPT_ROUNDS, _argon2_params())
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return _hash_many(passwords, *args)
+
+    chunk_size = max(1, len(passwords) // (settings.PASSWORD_HASH_WORKERS * 4))
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+    futures = [_get_executor().submit(_hash_many, chunk, *args) for chunk in chunks]
+    return [hashed for future in futures for hashed in future.result()]
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return _run(_verify, password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was not made with the configured scheme and cost."""
+    if settings.PASSWORD_HASH_SCHEME == "argon2id":
+        if not hashed_password.startswith("$argon2id$"):
+            return True
+        from argon2 import PasswordHasher
+        return PasswordHasher(**_argon2_params()).check_needs_rehash(hashed_password)
+
+    if not hashed_password.startswith("$2"):
+        return True
+    # bcrypt format: $2b$<cost>$<salt+hash>
+    return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
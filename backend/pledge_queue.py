@@ -0,0 +1,230 @@
+"""
+Durable queue for pledge submissions.
+
+The pledge endpoint only ``enqueue()``s a submission and answers 202 with
+the queue entry, so a burst at the end of a campaign costs each backer one
+small insert instead of a transaction on the ledger and the funding shards.
+
+Entries are partitioned by ``project_id % PLEDGE_QUEUE_PARTITIONS`` and each
+partition has its own background consumer. A consumer takes the oldest
+pending entries of its partition in batches and applies each project's part
+of a batch in a single transaction: the pledges are written to the ledger,
+their sum is added to one funding shard and the entries are marked applied.
+More partitions mean more consumers working in parallel.
+
+Ordering: entries of one project are applied exactly once and in
+submission order (queue id), and the ledger keeps the submission time.
+There is no order across projects. On PostgreSQL an advisory lock per
+partition keeps consumers in other worker processes from applying the same
+partition at the same time; every apply also takes all older pending
+entries of the project, so a project's entries are always applied as a
+prefix of its queue.
+
+Changing ``PLEDGE_QUEUE_PARTITIONS`` is safe at any time. Entries stored
+under a partition that no longer has a consumer (the count was lowered)
+are drained by consumer 0. When workers disagree on the count during a
+rolling deploy, one project's entries can sit in two partitions. They are
+still applied once and in order, because an apply takes every older
+pending entry of the project under row locks, whatever its partition.
+
+Entries accepted while the project was financing are applied even if the
+campaign has ended by the time the consumer reaches them.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+from metrics import register_collector
+import background
+import models
+import pledges
+
+STATUS_PENDING = "pending"
+STATUS_APPLIED = "applied"
+
+# First key of the (classid, partition) advisory lock taken by consumers
+ADVISORY_LOCK_CLASS = 0x504C4551
+
+_stats_lock = threading.Lock()
+_stats = {"applied": 0, "failed_batches": 0}
+
+
+def task_name(partition: int) -> str:
+    return f"pledge_queue_{partition}"
+
+
+def partition_of(project_id: int) -> int:
+    return project_id % settings.PLEDGE_QUEUE_PARTITIONS
+
+
+def enqueue(db: Session, project_id: int, user_id: Optional[int], amount: Decimal,
+            reward_tier_id: Optional[int] = None) -> models.QueuedPledge:
+    """Accept a pledge for asynchronous application. The caller commits."""
+    entry = models.QueuedPledge(
+        project_id=project_id,
+        user_id=user_id,
+        amount=amount,
+        reward_tier_id=reward_tier_id,
+        partition=partition_of(project_id),
+        status=STATUS_PENDING
+    )
+    db.add(entry)
+    db.info.setdefault("pledge_partitions_enqueued", set()).add(entry.partition)
+    return entry
+
+
+def _lock_partition(db: Session, partition: int) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        # SQLite: one process, one consumer thread per partition
+        return True
+    return bool(db.execute(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_CLASS, partition))).scalar())
+
+
+def _apply_project(db: Session, partition: int, project_id: int, up_to_id: int) -> int:
+    """Apply the project's pending entries up to ``up_to_id`` in one transaction."""
+    if not _lock_partition(db, partition):
+        db.rollback()
+        return 0
+
+    entries = db.query(models.QueuedPledge).filter(
+        models.QueuedPledge.project_id == project_id,
+        models.QueuedPledge.status == STATUS_PENDING,
+        models.QueuedPledge.id <= up_to_id
+    ).order_by(models.QueuedPledge.id).with_for_update().all()
+    if not entries:
+        db.rollback()
+        return 0
+
+    ledger = [
+        models.Pledge(
+            project_id=project_id, user_id=entry.user_id, amount=entry.amount,
+            reward_tier_id=entry.reward_tier_id, created_at=entry.created_at
+        )
+        for entry in entries
+    ]
+    db.add_all(ledger)
+    db.flush()
+
+    now = datetime.utcnow()
+    for entry, pledge in zip(entries, ledger):
+        entry.status = STATUS_APPLIED
+        entry.pledge_id = pledge.id
+        entry.applied_at = now
+    pledges.add_to_shard(db, project_id, sum((entry.amount for entry in entries), Decimal("0")))
+    db.commit()
+    return len(entries)
+
+
+def _owned_by(partition: int):
+    """Filter for the entries consumer ``partition`` applies."""
+    stored = models.QueuedPledge.partition
+    if partition == 0:
+        # Orphans of a larger earlier partition count
+        return or_(stored == 0, stored >= settings.PLEDGE_QUEUE_PARTITIONS)
+    return stored == partition
+
+
+def consume(db: Session, partition: int, batch_size: int = 500) -> int:
+    """Apply pending entries of ``partition`` batch by batch; returns how many were applied."""
+    total = 0
+    while True:
+        rows = db.query(models.QueuedPledge.id, models.QueuedPledge.project_id).filter(
+            _owned_by(partition),
+            models.QueuedPledge.status == STATUS_PENDING
+        ).order_by(models.QueuedPledge.id).limit(batch_size).all()
+        db.rollback()
+        if not rows:
+            return total
+
+        # Projects in the order of their oldest entry, each up to its newest entry in the batch
+        up_to = {}
+        for row in rows:
+            up_to[row.project_id] = row.id
+
+        applied = 0
+        for project_id, up_to_id in up_to.items():
+            try:
+                applied += _apply_project(db, partition, project_id, up_to_id)
+            except Exception as e:
+                db.rollback()
+                with _stats_lock:
+                    _stats["failed_batches"] += 1
+                print(f"Pledge queue partition {partition}: applying project {project_id} failed: {e}", flush=True)
+
+        total += applied
+        with _stats_lock:
+            _stats["applied"] += applied
+        # Stop on a short batch, or when another worker holds the partition or applies keep failing
+        if len(rows) < batch_size or not applied:
+            return total
+
+
+def consume_job(partition: int) -> int:
+    db = SessionLocal()
+    try:
+        return consume(db, partition, settings.PLEDGE_QUEUE_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def purge_applied(db: Session) -> int:
+    """Delete applied entries past the retention period."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.PLEDGE_QUEUE_RETENTION_HOURS)
+    deleted = db.query(models.QueuedPledge).filter(
+        models.QueuedPledge.status == STATUS_APPLIED,
+        models.QueuedPledge.applied_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def purge_applied_job() -> int:
+    db = SessionLocal()
+    try:
+        return purge_applied(db)
+    finally:
+        db.close()
+
+
+def stats() -> dict:
+    db = SessionLocal()
+    try:
+        pending = dict(db.query(models.QueuedPledge.partition, func.count(models.QueuedPledge.id)).filter(
+            models.QueuedPledge.status == STATUS_PENDING
+        ).group_by(models.QueuedPledge.partition).all())
+        oldest = db.query(func.min(models.QueuedPledge.created_at)).filter(
+            models.QueuedPledge.status == STATUS_PENDING
+        ).scalar()
+    finally:
+        db.close()
+    lag = 0.0
+    if oldest is not None:
+        if oldest.tzinfo is not None:
+            oldest = oldest.astimezone(timezone.utc).replace(tzinfo=None)
+        lag = (datetime.utcnow() - oldest).total_seconds()
+    with _stats_lock:
+        return {
+            "pending": sum(pending.values()),
+            "pending_by_partition": {str(partition): count for partition, count in sorted(pending.items())},
+            "oldest_pending_seconds": round(max(lag, 0.0), 1),
+            **_stats,
+        }
+
+
+# Apply right after the enqueuing transaction commits instead of waiting for the next poll
+@event.listens_for(Session, "after_commit")
+def _wake_consumers(session):
+    for partition in session.info.pop("pledge_partitions_enqueued", ()):
+        background.wake(task_name(partition))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_enqueued(session):
+    session.info.pop("pledge_partitions_enqueued", None)
+
+
+register_collector("pledge_queue", stats)
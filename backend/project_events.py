@@ -0,0 +1,70 @@
+"""
+Change notifications for projects.
+
+After a commit that inserted, updated or deleted projects through the ORM,
+their ids are published on ``PROJECTS_TOPIC`` together with the names of the
+changed columns, so in-process indexes and caches in every worker can
+refresh them (and ignore edits to columns they do not show). Code that
+changes projects with bulk SQL calls ``projects_changed()`` itself.
+"""
+from typing import Iterable, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+import invalidation
+import models
+
+PROJECTS_TOPIC = "projects"
+
+PROJECT_COLUMNS = frozenset(attr.key for attr in inspect(models.Project).column_attrs)
+
+
+def projects_changed(project_ids, fields: Optional[Iterable[str]] = None) -> None:
+    """
+    Notify this and all other workers that ``project_ids`` changed.
+    ``fields`` names the changed columns; None means any of them.
+    """
+    project_ids = sorted({int(project_id) for project_id in project_ids})
+    if not project_ids:
+        return
+    payload = {"project_ids": project_ids}
+    if fields is not None:
+        payload["fields"] = sorted(fields)
+    invalidation.publish(PROJECTS_TOPIC, payload)
+
+
+def changed_fields(payload: dict) -> frozenset:
+    """Columns a ``PROJECTS_TOPIC`` message may have changed."""
+    if "fields" in payload:
+        return frozenset(payload["fields"])
+    return PROJECT_COLUMNS
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_projects(session, flush_context):
+    changed = session.info.setdefault("changed_project_ids", set())
+    fields = session.info.setdefault("changed_project_fields", set())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, models.Project) and obj.id is not None:
+            changed.add(obj.id)
+            fields.update(PROJECT_COLUMNS)
+    for obj in session.dirty:
+        if isinstance(obj, models.Project) and obj.id is not None:
+            modified = [attr.key for attr in inspect(obj).attrs
+                        if attr.key in PROJECT_COLUMNS and attr.history.has_changes()]
+            if modified:
+                changed.add(obj.id)
+                fields.update(modified)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_changed_projects(session):
+    changed = session.info.pop("changed_project_ids", None)
+    fields = session.info.pop("changed_project_fields", None)
+    if changed:
+        projects_changed(changed, fields)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_projects(session):
+    session.info.pop("changed_project_ids", None)
+    session.info.pop("changed_project_fields", None)
@@ -0,0 +1,237 @@
+"""
+Rate limiting for auth and AI endpoints.
+
+Limits use GCRA (generic cell rate algorithm): each client key stores one
+"theoretical arrival time". This behaves like a token bucket refilled at
+``count / period`` with a burst of ``count``, but needs a single value per key
+and a single atomic update per request.
+
+Limits are attached to routes as FastAPI dependencies and read their rate
+(e.g. ``"5/minute"``, ``"3/15minutes"``) from settings. With
+``RATE_LIMIT_BACKEND=memory`` state is kept per worker process; ``database``
+shares it between workers through the ``rate_limits`` table.
+"""
+import hashlib
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from database import SessionLocal, delete_in_batches, get_db
+from metrics import register_collector
+from security import get_current_principal_optional
+import models
+
+KeyFunc = Callable[[Request, Session], Awaitable[Optional[str]]]
+
+_UNITS = {
+    "s": 1, "sec": 1, "second": 1,
+    "m": 60, "min": 60, "minute": 60,
+    "h": 3600, "hour": 3600,
+    "d": 86400, "day": 86400,
+}
+_RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+?)s?\s*$")
+
+
+@dataclass(frozen=True)
+class Rate:
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+
+@lru_cache(maxsize=64)
+def parse_rate(value: str) -> Rate:
+    """Parse ``"<count>/[<n>]<unit>"``, e.g. ``"5/minute"`` or ``"3/15minutes"``."""
+    match = _RATE_PATTERN.match(value.lower())
+    if not match or match.group(3) not in _UNITS or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid rate limit '{value}', expected e.g. '5/minute' or '3/15minutes'")
+    return Rate(int(match.group(1)), int(match.group(2) or 1) * _UNITS[match.group(3)])
+
+
+def _gcra(tat: Optional[float], now: float, rate: Rate) -> tuple[Optional[float], float]:
+    """Return (new tat or None if limited, seconds until the next request is allowed)."""
+    new_tat = max(tat or now, now) + rate.interval
+    allow_at = new_tat - rate.period
+    if allow_at > now:
+        return None, allow_at - now
+    return new_tat, 0.0
+
+
+class MemoryBackend:
+    """Per-process GCRA state."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._tats: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, db: Session, key: str, rate: Rate) -> float:
+        now = time.time()
+        with self._lock:
+            new_tat, retry_after = _gcra(self._tats.get(key), now, rate)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                if len(self._tats) > self.max_keys:
+                    # Keys whose tat has passed are equivalent to absent keys
+                    self._tats = {k: tat for k, tat in self._tats.items() if tat > now}
+        return retry_after
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+
+class DatabaseBackend:
+    """GCRA state shared by all workers, one atomic upsert per request."""
+
+    def hit(self, db: Session, key: str, rate: Rate) -> float:
+        now = time.time()
+        table = models.RateLimitBucket.__table__
+        if db.get_bind().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            start = func.greatest(table.c.tat, now)
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+            start = func.max(table.c.tat, now)
+
+        # The update only applies when the request conforms; no row returned means limited
+        stmt = insert(table).values(key=key, tat=now + rate.interval)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={"tat": start + rate.interval},
+            where=start + rate.interval - rate.period <= now
+        ).returning(table.c.tat)
+
+        retry_after = 0.0
+        if db.execute(stmt).first() is None:
+            tat = db.execute(select(table.c.tat).where(table.c.key == key)).scalar()
+            retry_after = max(tat + rate.interval - rate.period - now, 0.0)
+        db.commit()
+        return retry_after
+
+    def reset(self) -> None:
+        pass
+
+
+memory_backend = MemoryBackend()
+database_backend = DatabaseBackend()
+
+_stats_lock = threading.Lock()
+_stats: dict[str, dict] = {}
+
+
+def _record(name: str, limited: bool) -> None:
+    with _stats_lock:
+        counters = _stats.setdefault(name, {"allowed": 0, "limited": 0})
+        counters["limited" if limited else "allowed"] += 1
+
+
+def stats() -> dict:
+    with _stats_lock:
+        return {"backend": settings.RATE_LIMIT_BACKEND, **{name: dict(c) for name, c in _stats.items()}}
+
+
+def reset() -> None:
+    """Forget all in-process limiter state."""
+    memory_backend.reset()
+    with _stats_lock:
+        _stats.clear()
+
+
+async def hit(db: Session, key: str, rate: Rate) -> float:
+    """Count a request for ``key``; returns 0 if allowed, else seconds to wait."""
+    if settings.RATE_LIMIT_BACKEND == "database":
+        return await run_in_threadpool(database_backend.hit, db, key, rate)
+    return memory_backend.hit(db, key, rate)
+
+
+# Client key functions. Returning None skips the limit for the request.
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def by_ip(request: Request, db: Session) -> Optional[str]:
+    return client_ip(request)
+
+
+def by_body_field(field: str) -> KeyFunc:
+    """Key by a JSON body field, e.g. the email of a login attempt or an AI session_id."""
+    async def key(request: Request, db: Session) -> Optional[str]:
+        try:
+            body = await request.json()
+        except ValueError:
+            return None
+        value = body.get(field) if isinstance(body, dict) else None
+        return str(value).strip().lower() if value else None
+    return key
+
+
+async def by_user(request: Request, db: Session) -> Optional[str]:
+    principal = await get_current_principal_optional(request, db)
+    return str(principal.id) if principal else None
+
+
+async def by_anonymous_ip(request: Request, db: Session) -> Optional[str]:
+    principal = await get_current_principal_optional(request, db)
+    return None if principal else client_ip(request)
+
+
+class RateLimit:
+    """
+    Dependency enforcing the rate in ``settings.<setting>`` per client key.
+
+    An empty setting disables the limit.
+    """
+
+    def __init__(self, name: str, setting: str, key: KeyFunc):
+        self.name = name
+        self.setting = setting
+        self.key = key
+
+    async def __call__(self, request: Request, db: Session = Depends(get_db)) -> None:
+        value = getattr(settings, self.setting)
+        if not settings.RATE_LIMIT_ENABLED or not value:
+            return
+
+        client_key = await self.key(request, db)
+        if client_key is None:
+            return
+
+        # Hashed so emails and IPs are not stored in the rate_limits table
+        digest = hashlib.sha256(client_key.encode("utf-8")).hexdigest()[:32]
+        retry_after = await hit(db, f"{self.name}:{digest}", parse_rate(value))
+        _record(self.name, retry_after > 0)
+
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+
+def purge_expired_job() -> int:
+    """Delete shared limiter rows whose state has fully drained."""
+    db = SessionLocal()
+    try:
+        return delete_in_batches(db, models.RateLimitBucket, models.RateLimitBucket.tat <= time.time())
+    finally:
+        db.close()
+
+
+register_collector("rate_limits", stats)
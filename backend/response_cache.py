@@ -0,0 +1,89 @@
+"""
+Cache for the public homepage listings.
+
+``/featured``, ``/near-goal`` and the starter leaderboards run the same sort
+and aggregate queries for every visitor. Their responses are cached per
+worker as ready-to-send JSON, keyed by endpoint and query parameters, each
+endpoint with its own TTL.
+
+Stampede protection: on a miss only one request per key runs the query
+(striped locks); concurrent requests for the same key wait and then read
+the fresh entry.
+
+Entries are dropped when a project column the listings show changes
+(``PROJECTS_TOPIC``), and when a user whose name or avatar is part of a
+cached response changes (``USERS_TOPIC``). The TTL bounds staleness for
+anything missed, e.g. bulk SQL that does not publish.
+"""
+import json
+import threading
+from typing import Any, Callable, Iterable
+from fastapi import Response
+from pydantic import TypeAdapter
+from auth_cache import USERS_TOPIC
+from cache import TTLCache
+from config import settings
+from metrics import register_collector
+from project_events import PROJECTS_TOPIC, changed_fields
+import invalidation
+
+# Project columns shown in (or deciding membership of) the cached listings
+LISTED_FIELDS = frozenset({
+    "owner_id", "title", "slug", "short_description", "status", "project_type", "plan", "provision",
+    "funding_goal", "funding_current", "funding_ratio", "image_url", "ai_generated", "created_at",
+})
+
+_cache = TTLCache(max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES, default_ttl=60)
+_locks = [threading.Lock() for _ in range(16)]
+_adapters: dict[Any, TypeAdapter] = {}
+
+
+def cached_json(
+    name: str,
+    params: tuple,
+    ttl: int,
+    response_model,
+    compute: Callable[[], Any],
+    user_ids: Callable[[dict], Iterable[int]],
+) -> Response:
+    """
+    Return the cached response for ``name`` and ``params``, running
+    ``compute()`` once on a miss. ``user_ids`` maps a serialized item to the
+    users it shows, so their profile changes drop the entry.
+    """
+    key = (name, params)
+    entry = _cache.get(key)
+    if entry is None:
+        with _locks[hash(key) % len(_locks)]:
+            entry = _cache.get(key)
+            if entry is None:
+                adapter = _adapters.get(response_model)
+                if adapter is None:
+                    adapter = _adapters.setdefault(response_model, TypeAdapter(response_model))
+                data = adapter.dump_python(adapter.validate_python(compute(), from_attributes=True), mode="json")
+                body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                entry = (body, frozenset(user_id for item in data for user_id in user_ids(item)))
+                _cache.set(key, entry, ttl)
+    return Response(content=entry[0], media_type="application/json")
+
+
+def clear() -> None:
+    _cache.clear()
+
+
+def _on_projects_changed(payload: dict) -> None:
+    if payload.get("all") or changed_fields(payload) & LISTED_FIELDS:
+        _cache.clear()
+
+
+def _on_users_changed(payload: dict) -> None:
+    if payload.get("all"):
+        _cache.clear()
+        return
+    user_ids = set(payload.get("user_ids", []))
+    _cache.delete_where(lambda key, entry: not entry[1].isdisjoint(user_ids))
+
+
+invalidation.subscribe(PROJECTS_TOPIC, _on_projects_changed)
+invalidation.subscribe(USERS_TOPIC, _on_users_changed)
+register_collector("response_cache", _cache.stats)
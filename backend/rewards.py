@@ -0,0 +1,175 @@
+"""
+Reward tier (Dankeschön) stock and reservations.
+
+``reward_tiers.reserved`` counts the held and claimed units of a tier. A
+backer reserves a unit before pledging with a single conditional update,
+
+    UPDATE reward_tiers SET reserved = reserved + 1
+    WHERE id = :tier AND (quantity IS NULL OR reserved < quantity)
+
+so the check and the increment are one atomic step on the tier's row: of
+two backers racing for the last unit exactly one update matches. Only that
+row is locked, and only until the reserving transaction commits.
+
+A reservation is held for ``REWARD_RESERVATION_MINUTES``. The pledge claims
+it; otherwise it is released by the backer or expires and its unit goes back
+to stock. Every state change is an update conditioned on the current state
+(``status = 'held'``), so a claim racing with an expiry or release can only
+succeed once and the stock is returned exactly once.
+
+A backer holds at most one unit of a tier at a time (a partial unique
+index on held reservations), so one account cannot keep a limited tier
+sold out by piling up holds.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+import models
+
+STATUS_HELD = "held"
+STATUS_CLAIMED = "claimed"
+STATUS_RELEASED = "released"
+STATUS_EXPIRED = "expired"
+
+
+class AlreadyHeld(Exception):
+    """The backer already holds a unit of this tier."""
+
+    def __init__(self, reservation_id: Optional[int]):
+        super().__init__("Reward is already reserved")
+        self.reservation_id = reservation_id
+
+
+def remaining(tier: models.RewardTier) -> Optional[int]:
+    """Units still available, or None for unlimited tiers."""
+    if tier.quantity is None:
+        return None
+    return max(tier.quantity - tier.reserved, 0)
+
+
+def _take_unit(db: Session, tier_id: int) -> bool:
+    tiers = models.RewardTier.__table__
+    result = db.execute(
+        update(tiers).where(
+            tiers.c.id == tier_id,
+            or_(tiers.c.quantity.is_(None), tiers.c.reserved < tiers.c.quantity)
+        ).values(reserved=tiers.c.reserved + 1)
+    )
+    return result.rowcount == 1
+
+
+def _return_units(db: Session, tier_id: int, count: int) -> None:
+    tiers = models.RewardTier.__table__
+    db.execute(update(tiers).where(tiers.c.id == tier_id).values(reserved=tiers.c.reserved - count))
+
+
+def _own_hold(db: Session, tier_id: int, user_id: int, now: datetime):
+    return db.query(
+        models.RewardReservation.id, (models.RewardReservation.expires_at > now).label("live")
+    ).filter(
+        models.RewardReservation.tier_id == tier_id,
+        models.RewardReservation.user_id == user_id,
+        models.RewardReservation.status == STATUS_HELD
+    ).first()
+
+
+def reserve(db: Session, tier_id: int, user_id: int) -> Optional[models.RewardReservation]:
+    """
+    Hold one unit of the tier for the user. Returns None when the tier is
+    sold out and raises AlreadyHeld if the user holds one already. The
+    caller commits.
+    """
+    now = datetime.utcnow()
+    own = _own_hold(db, tier_id, user_id, now)
+    if own is not None:
+        if own.live:
+            raise AlreadyHeld(own.id)
+        # The user's own hold has lapsed: expire it so it makes room
+        expire(db, tier_id)
+
+    if not _take_unit(db, tier_id):
+        # Sold out, unless some holds have lapsed and the expiry job has not run yet
+        if not expire(db, tier_id) or not _take_unit(db, tier_id):
+            return None
+
+    reservation = models.RewardReservation(
+        tier_id=tier_id,
+        user_id=user_id,
+        status=STATUS_HELD,
+        expires_at=now + timedelta(minutes=settings.REWARD_RESERVATION_MINUTES)
+    )
+    try:
+        with db.begin_nested():
+            db.add(reservation)
+    except IntegrityError:
+        # A concurrent request of the same user won; give the unit back
+        _return_units(db, tier_id, 1)
+        own = _own_hold(db, tier_id, user_id, now)
+        raise AlreadyHeld(own.id if own else None)
+    return reservation
+
+
+def _transition(db: Session, reservation_id: int, user_id: int, new_status: str, unexpired: bool) -> bool:
+    reservations = models.RewardReservation.__table__
+    stmt = update(reservations).where(
+        reservations.c.id == reservation_id,
+        reservations.c.user_id == user_id,
+        reservations.c.status == STATUS_HELD
+    )
+    if unexpired:
+        stmt = stmt.where(reservations.c.expires_at > datetime.utcnow())
+    return db.execute(stmt.values(status=new_status)).rowcount == 1
+
+
+def claim(db: Session, reservation: models.RewardReservation) -> bool:
+    """Turn a live hold into a claimed unit. The caller commits."""
+    return _transition(db, reservation.id, reservation.user_id, STATUS_CLAIMED, unexpired=True)
+
+
+def release(db: Session, reservation: models.RewardReservation) -> bool:
+    """Give a held unit back to stock. The caller commits."""
+    if not _transition(db, reservation.id, reservation.user_id, STATUS_RELEASED, unexpired=False):
+        return False
+    _return_units(db, reservation.tier_id, 1)
+    return True
+
+
+def expire(db: Session, tier_id: Optional[int] = None) -> int:
+    """Expire lapsed holds (of one tier, or all) and return their units; the caller commits."""
+    reservations = models.RewardReservation.__table__
+    now = datetime.utcnow()
+    lapsed = db.query(models.RewardReservation.tier_id).filter(
+        models.RewardReservation.status == STATUS_HELD,
+        models.RewardReservation.expires_at <= now
+    )
+    if tier_id is not None:
+        lapsed = lapsed.filter(models.RewardReservation.tier_id == tier_id)
+
+    expired = 0
+    for (lapsed_tier_id,) in lapsed.distinct().all():
+        # Only the holds this statement moved out of 'held' are returned
+        count = db.execute(
+            update(reservations).where(
+                reservations.c.tier_id == lapsed_tier_id,
+                reservations.c.status == STATUS_HELD,
+                reservations.c.expires_at <= now
+            ).values(status=STATUS_EXPIRED)
+        ).rowcount
+        if count:
+            _return_units(db, lapsed_tier_id, count)
+            expired += count
+    return expired
+
+
+def expire_job() -> int:
+    db = SessionLocal()
+    try:
+        expired = expire(db)
+        db.commit()
+        return expired
+    finally:
+        db.close()
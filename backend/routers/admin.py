@@ -1,11 +1,15 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from database import get_db
 import models
 import schemas
-from security import get_current_admin_user
+from security import get_current_admin_user, get_current_admin_principal, revoke_access_tokens, Principal
 from email_service import send_test_email
+from pagination import keyset_page
+import bulk_email
+import bulk_import
+import export
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -14,17 +18,81 @@ router = APIRouter(prefix="/api/admin", tags=["Admin"])
 def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_admin: models.User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_principal),
     db: Session = Depends(get_db)
 ):
     users = db.query(models.User).offset(skip).limit(limit).all()
     return users
 
 
+@router.get("/export/users")
+def export_users(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    is_active: Optional[bool] = Query(None, description="Filter by active flag"),
+    is_starter: Optional[bool] = Query(None, description="Filter by starter flag"),
+    current_admin: Principal = Depends(get_current_admin_principal),
+    db: Session = Depends(get_db)
+):
+    """Stream all users as NDJSON or CSV (gzip-compressed if the client accepts it)."""
+    filters = []
+    if is_active is not None:
+        filters.append(models.User.is_active.is_(is_active))
+    if is_starter is not None:
+        filters.append(models.User.is_starter.is_(is_starter))
+    return export.stream_rows(request, db, "users", export.USER_COLUMNS, format, filters)
+
+
+@router.get("/export/projects")
+def export_projects(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    project_type: Optional[str] = Query(None, description="Filter by project type: crowdfunding, fundraising, private"),
+    current_admin: Principal = Depends(get_current_admin_principal),
+    db: Session = Depends(get_db)
+):
+    """Stream all projects (including drafts) as NDJSON or CSV (gzip-compressed if the client accepts it)."""
+    filters = []
+    if status:
+        filters.append(models.Project.status == status)
+    if project_type:
+        filters.append(models.Project.project_type == project_type)
+    return export.stream_rows(request, db, "projects", export.PROJECT_COLUMNS, format, filters)
+
+
+def _import_format(file: UploadFile, format: Optional[str]) -> str:
+    if format:
+        return format
+    return "csv" if (file.filename or "").lower().endswith(".csv") else "ndjson"
+
+
+@router.post("/import/users", response_model=schemas.ImportResult)
+def import_users(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Default: from the file name"),
+    current_admin: models.User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Create users from an NDJSON or CSV file; bad rows are reported and skipped. No emails are sent."""
+    return bulk_import.import_users(db, file.file, _import_format(file, format))
+
+
+@router.post("/import/projects", response_model=schemas.ImportResult)
+def import_projects(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="Default: from the file name"),
+    current_admin: models.User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Create projects (owners by email) from an NDJSON or CSV file; bad rows are reported and skipped."""
+    return bulk_import.import_projects(db, file.file, _import_format(file, format))
+
+
 @router.get("/users/{user_id}", response_model=schemas.UserResponse)
 def get_user(
     user_id: int,
-    current_admin: models.User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_principal),
     db: Session = Depends(get_db)
 ):
     user = db.query(models.User).filter(models.User.id == user_id).first()
@@ -55,6 +123,10 @@ def update_user(
             )
         user.is_admin = user_update.is_admin
 
+    # Claims in already issued tokens are now stale
+    if db.is_modified(user):
+        revoke_access_tokens(user)
+
     db.commit()
     db.refresh(user)
 
@@ -120,17 +192,74 @@ def send_test_email_endpoint(
     return {"message": f"Test email '{test_email_data.email_type}' sent successfully to {test_email_data.email}"}
 
 
+@router.post("/bulk-emails", response_model=schemas.BulkEmailJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_bulk_email(
+    bulk_data: schemas.BulkEmailCreate,
+    current_admin: models.User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Notify an audience by email. Sending happens in the background;
+    poll GET /bulk-emails/{job_id} for progress.
+
+    Audiences:
+    - all_users: All active users
+    - starters: Users owning a project (optionally only in project_status)
+    - backers: Users who pledged to a project (optionally only in project_status)
+    """
+    if bulk_data.audience not in bulk_email.AUDIENCES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid audience. Must be one of: {', '.join(bulk_email.AUDIENCES)}"
+        )
+
+    return bulk_email.create_job(
+        db,
+        created_by=current_admin.id,
+        audience=bulk_data.audience,
+        subject=bulk_data.subject,
+        message=bulk_data.message,
+        project_status=bulk_data.project_status,
+        locale=bulk_data.locale
+    )
+
+
+@router.get("/bulk-emails", response_model=List[schemas.BulkEmailJobResponse])
+def list_bulk_emails(
+    limit: int = Query(50, ge=1, le=200),
+    current_admin: Principal = Depends(get_current_admin_principal),
+    db: Session = Depends(get_db)
+):
+    """List recent bulk email jobs, newest first."""
+    return db.query(models.BulkEmailJob).order_by(models.BulkEmailJob.id.desc()).limit(limit).all()
+
+
+@router.get("/bulk-emails/{job_id}", response_model=schemas.BulkEmailJobResponse)
+def get_bulk_email(
+    job_id: int,
+    current_admin: Principal = Depends(get_current_admin_principal),
+    db: Session = Depends(get_db)
+):
+    """Get the progress of a bulk email job."""
+    job = db.query(models.BulkEmailJob).filter(models.BulkEmailJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Bulk email job not found")
+    return job
+
+
 # Admin Project Management Endpoints
 @router.get("/projects", response_model=List[schemas.AdminProjectResponse])
 def list_all_projects(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     project_type: Optional[str] = Query(None, description="Filter by project type: crowdfunding, fundraising, private"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
-    current_admin: models.User = Depends(get_current_admin_user),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
+    current_admin: Principal = Depends(get_current_admin_principal),
     db: Session = Depends(get_db)
 ):
-    """List all projects (including drafts and submitted) for admin."""
+    """List all projects (including drafts and submitted) for admin, newest first."""
     query = db.query(models.Project)
 
     if status:
@@ -139,14 +268,19 @@ def list_all_projects(
     if project_type:
         query = query.filter(models.Project.project_type == project_type)
 
-    projects = query.order_by(models.Project.created_at.desc()).offset(skip).limit(limit).all()
+    if cursor or not skip:
+        return keyset_page(query, models.Project, cursor, limit, response)
+
+    projects = query.order_by(
+        models.Project.created_at.desc(), models.Project.id.desc()
+    ).offset(skip).limit(limit).all()
     return projects
 
 
 @router.get("/projects/{project_id}", response_model=schemas.AdminProjectResponse)
 def get_project_admin(
     project_id: int,
-    current_admin: models.User = Depends(get_current_admin_user),
+    current_admin: Principal = Depends(get_current_admin_principal),
     db: Session = Depends(get_db)
 ):
     """Get a project by ID for admin."""
@@ -4,8 +4,17 @@ from sqlalchemy import func
 from database import get_db
 import models
 import schemas
-from security import get_current_user, get_current_user_optional
+from security import (
+    get_current_user,
+    get_current_user_optional,
+    get_current_principal,
+    get_current_principal_optional,
+    Principal
+)
 from config import settings
+from bulkhead import ai_bulkhead
+from rate_limit import RateLimit, by_user, by_anonymous_ip
+from slugs import add_with_unique_slug, slugify
 from typing import Optional, List
 import uuid
 import openai
@@ -16,6 +25,9 @@ from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/api/ai-coach", tags=["AI Coach"])
 
+ai_user_limit = RateLimit("ai_user", "RATE_LIMIT_AI_PER_USER", by_user)
+ai_anonymous_limit = RateLimit("ai_anonymous_ip", "RATE_LIMIT_AI_ANONYMOUS_PER_IP", by_anonymous_ip)
+
 # Initialize OpenAI client
 client = None
 if settings.OPENAI_API_KEY and settings.OPENAI_API_KEY not in ["", "your-key", "your-openai-api-key"]:
@@ -131,7 +143,8 @@ def build_conversation_history(thread: models.AIThread, include_system: bool = F
 async def get_ai_response(openai_client, messages: list[dict], max_tokens: int = 500) -> tuple[str, int]:
     """Get response from OpenAI Chat API."""
     try:
-        response = openai_client.chat.completions.create(
+        response = await ai_bulkhead.run(
+            openai_client.chat.completions.create,
             model=settings.OPENAI_MODEL if hasattr(settings, 'OPENAI_MODEL') else "gpt-4o-mini",
             messages=messages,
             max_tokens=max_tokens,
@@ -164,7 +177,11 @@ def get_ai_settings():
     }
 
 
-@router.post("/generate", response_model=schemas.AIGenerateResponse)
+@router.post(
+    "/generate",
+    response_model=schemas.AIGenerateResponse,
+    dependencies=[Depends(ai_user_limit), Depends(ai_anonymous_limit)]
+)
 async def generate_message(
     request: schemas.AIGenerateRequest,
     current_user: Optional[models.User] = Depends(get_current_user_optional),
@@ -263,7 +280,7 @@ async def generate_message(
 @router.get("/threads/{thread_id}", response_model=schemas.AIThreadResponse)
 def get_thread(
     thread_id: str,
-    current_user: Optional[models.User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_principal_optional),
     db: Session = Depends(get_db)
 ):
     """Get a thread with all messages."""
@@ -290,7 +307,7 @@ def get_thread(
 
 @router.get("/threads", response_model=List[schemas.AIThreadListItem])
 def list_threads(
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all threads for the current user."""
@@ -354,7 +371,7 @@ def claim_thread(
 def get_draft(
     thread_id: str,
     session_id: Optional[str] = None,
-    current_user: Optional[models.User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_principal_optional),
     db: Session = Depends(get_db)
 ):
     """Get the draft for a thread. Anonymous users can access with session_id."""
@@ -488,13 +505,17 @@ extrahiere die angeforderten Informationen. Antworte NUR mit dem gefragten Wert,
         ]
 
         try:
-            response = openai_client.chat.completions.create(
+            response = await ai_bulkhead.run(
+                openai_client.chat.completions.create,
                 model=settings.OPENAI_MODEL if hasattr(settings, 'OPENAI_MODEL') else "gpt-4o-mini",
                 messages=extraction_messages,
                 max_tokens=1000 if field == "description" else 200,
                 temperature=0.3
             )
             generated_data[field] = response.choices[0].message.content.strip()
+        except HTTPException:
+            # AI pool saturated - fail the request instead of returning a partial draft
+            raise
         except Exception as e:
             print(f"Error generating {field}: {e}")
             continue
@@ -665,13 +686,7 @@ def convert_draft_to_project(
             detail="Draft must have a title"
         )
 
-    # Ensure unique slug
-    slug = draft.slug or re.sub(r'[^a-z0-9-]', '-', draft.title.lower())[:50]
-    base_slug = slug
-    counter = 1
-    while db.query(models.Project).filter(models.Project.slug == slug).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
+    base_slug = draft.slug or slugify(draft.title)[:50] or f"project-{uuid.uuid4().hex[:8]}"
 
     # Calculate financing_end
     financing_end = None
@@ -692,7 +707,6 @@ def convert_draft_to_project(
     project = models.Project(
         owner_id=current_user.id,
         title=draft.title,
-        slug=slug,
         description=draft.description,
         short_description=draft.short_description,
         funding_goal=draft.funding_goal,
@@ -705,7 +719,7 @@ def convert_draft_to_project(
         ai_generated=True,
         ai_thread_id=thread_id
     )
-    db.add(project)
+    add_with_unique_slug(db, project, models.Project.slug, base_slug)
 
     # Mark user as starter
     if not current_user.is_starter:
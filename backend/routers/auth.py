@@ -1,5 +1,4 @@
-from datetime import datetime, timedelta
-import re
+from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from database import get_db
@@ -8,55 +7,28 @@ import schemas
 from security import (
     verify_password,
     get_password_hash,
+    password_needs_rehash,
     create_access_token,
-    create_session_token,
     create_reset_token,
     create_verification_code,
     get_current_user,
-    validate_session
+    revoke_access_tokens,
+    user_token_claims
 )
 from two_factor import verify_2fa_code
 from email_service import send_password_reset_email, send_welcome_email, send_magic_link_email
 from config import settings
+import one_time_tokens
+import session_store
+from rate_limit import RateLimit, by_ip, by_body_field
+from slugs import add_with_unique_slug, slugify
 
 
-def generate_profile_slug(name: str) -> str:
-    """Generate a URL-safe slug from a name."""
-    if not name:
-        return ""
-    # Convert to lowercase
-    slug = name.lower()
-    # Replace umlauts and special chars
-    replacements = {
-        'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss',
-        'á': 'a', 'à': 'a', 'â': 'a', 'ã': 'a',
-        'é': 'e', 'è': 'e', 'ê': 'e',
-        'í': 'i', 'ì': 'i', 'î': 'i',
-        'ó': 'o', 'ò': 'o', 'ô': 'o', 'õ': 'o',
-        'ú': 'u', 'ù': 'u', 'û': 'u',
-        'ñ': 'n', 'ç': 'c'
-    }
-    for char, replacement in replacements.items():
-        slug = slug.replace(char, replacement)
-    # Replace spaces and non-alphanumeric with hyphens
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    # Remove leading/trailing hyphens
-    slug = slug.strip('-')
-    return slug
-
-
-def get_unique_profile_slug(db: Session, base_slug: str, exclude_user_id: int = None) -> str:
-    """Get a unique profile slug by appending numbers if necessary."""
-    slug = base_slug
-    counter = 1
-    while True:
-        query = db.query(models.User).filter(models.User.profile_slug == slug)
-        if exclude_user_id:
-            query = query.filter(models.User.id != exclude_user_id)
-        if not query.first():
-            return slug
-        slug = f"{base_slug}-{counter}"
-        counter += 1
+login_ip_limit = RateLimit("login_ip", "RATE_LIMIT_LOGIN_PER_IP", by_ip)
+login_email_limit = RateLimit("login_email", "RATE_LIMIT_LOGIN_PER_EMAIL", by_body_field("email"))
+email_ip_limit = RateLimit("email_ip", "RATE_LIMIT_EMAIL_PER_IP", by_ip)
+email_address_limit = RateLimit("email_address", "RATE_LIMIT_EMAIL_PER_ADDRESS", by_body_field("email"))
+
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -67,32 +39,33 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Generate unique profile slug from full_name
-    base_slug = generate_profile_slug(user.full_name)
+    # Profile slug from full_name; a numbered suffix is added if it is taken
+    base_slug = slugify(user.full_name)
     if not base_slug:
         raise HTTPException(status_code=400, detail="Full name is required")
-    profile_slug = get_unique_profile_slug(db, base_slug)
 
     hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         hashed_password=hashed_password,
         full_name=user.full_name,
-        profile_slug=profile_slug,
         is_active=True,
         is_admin=False
     )
 
-    db.add(db_user)
+    add_with_unique_slug(db, db_user, models.User.profile_slug, base_slug)
+    send_welcome_email(db, db_user.email, db_user.full_name)
     db.commit()
     db.refresh(db_user)
 
-    send_welcome_email(db_user.email, db_user.full_name)
-
     return db_user
 
 
-@router.post("/login", response_model=schemas.LoginResponse)
+@router.post(
+    "/login",
+    response_model=schemas.LoginResponse,
+    dependencies=[Depends(login_ip_limit), Depends(login_email_limit)]
+)
 def login(
     login_data: schemas.LoginRequest,
     request: Request,
@@ -122,21 +95,18 @@ def login(
                 detail="Invalid two-factor authentication code"
             )
 
+    # Upgrade hashes made with an older scheme or cost once every factor has
+    # passed (saved with the session below)
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = get_password_hash(login_data.password)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=user_token_claims(user),
         expires_delta=access_token_expires
     )
 
-    session_token = create_session_token()
-    session = models.Session(
-        user_id=user.id,
-        session_token=session_token,
-        expires_at=datetime.utcnow() + timedelta(hours=settings.SESSION_TOKEN_EXPIRE_HOURS),
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
-    )
-    db.add(session)
+    session_token = session_store.create_session(db, user, request)
     db.commit()
 
     return {
@@ -153,21 +123,19 @@ def refresh_token(
     db: Session = Depends(get_db)
 ):
     """Refresh the access token using a valid session token"""
-    user = validate_session(db, refresh_data.session_token)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = session_store.refresh_access_token(
+        db,
+        refresh_data.session_token,
+        lambda user: create_access_token(data=user_token_claims(user), expires_delta=access_token_expires)
+    )
 
-    if not user:
+    if not access_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired session"
         )
 
-    # Create new access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)},
-        expires_delta=access_token_expires
-    )
-
     return {
         "access_token": access_token,
         "token_type": "bearer"
@@ -180,6 +148,7 @@ def logout(
     db: Session = Depends(get_db)
 ):
     db.query(models.Session).filter(models.Session.user_id == current_user.id).delete()
+    revoke_access_tokens(current_user)
     db.commit()
 
     return {"message": "Successfully logged out"}
@@ -190,7 +159,11 @@ def get_current_user_info(current_user: models.User = Depends(get_current_user))
     return current_user
 
 
-@router.post("/password-reset-request", response_model=schemas.MessageResponse)
+@router.post(
+    "/password-reset-request",
+    response_model=schemas.MessageResponse,
+    dependencies=[Depends(email_ip_limit), Depends(email_address_limit)]
+)
 def password_reset_request(
     request_data: schemas.PasswordResetRequest,
     db: Session = Depends(get_db)
@@ -198,13 +171,14 @@ def password_reset_request(
     user = db.query(models.User).filter(models.User.email == request_data.email).first()
 
     if user:
-        reset_token = create_reset_token()
-        user.reset_token = reset_token
-        user.reset_token_expires = datetime.utcnow() + timedelta(hours=1)
+        reset_token = one_time_tokens.issue_token(
+            db, user.id, one_time_tokens.PURPOSE_PASSWORD_RESET,
+            expires_in=timedelta(hours=1),
+            generate=create_reset_token
+        )
+        send_password_reset_email(db, user.email, reset_token, user.full_name)
         db.commit()
 
-        send_password_reset_email(user.email, reset_token, user.full_name)
-
     return {"message": "If the email exists, a password reset link has been sent"}
 
 
@@ -213,10 +187,8 @@ def password_reset_confirm(
     reset_data: schemas.PasswordResetConfirm,
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.User).filter(
-        models.User.reset_token == reset_data.token,
-        models.User.reset_token_expires > datetime.utcnow()
-    ).first()
+    user_id = one_time_tokens.consume_token(db, one_time_tokens.PURPOSE_PASSWORD_RESET, reset_data.token)
+    user = db.query(models.User).filter(models.User.id == user_id).first() if user_id else None
 
     if not user:
         raise HTTPException(
@@ -225,8 +197,7 @@ def password_reset_confirm(
         )
 
     user.hashed_password = get_password_hash(reset_data.new_password)
-    user.reset_token = None
-    user.reset_token_expires = None
+    revoke_access_tokens(user)
 
     db.query(models.Session).filter(models.Session.user_id == user.id).delete()
 
@@ -236,7 +207,11 @@ def password_reset_confirm(
 
 
 # Magic Code endpoints (passwordless login with 6-digit code)
-@router.post("/magic-link/request", response_model=schemas.MessageResponse)
+@router.post(
+    "/magic-link/request",
+    response_model=schemas.MessageResponse,
+    dependencies=[Depends(email_ip_limit), Depends(email_address_limit)]
+)
 def request_magic_code(
     request_data: schemas.MagicLinkRequest,
     db: Session = Depends(get_db)
@@ -245,18 +220,23 @@ def request_magic_code(
     user = db.query(models.User).filter(models.User.email == request_data.email).first()
 
     if user and user.is_active:
-        verification_code = create_verification_code()
-        user.magic_link_token = verification_code
-        user.magic_link_expires = datetime.utcnow() + timedelta(minutes=15)
+        verification_code = one_time_tokens.issue_token(
+            db, user.id, one_time_tokens.PURPOSE_MAGIC_CODE,
+            expires_in=timedelta(minutes=15),
+            generate=create_verification_code
+        )
+        send_magic_link_email(db, user.email, verification_code, user.full_name)
         db.commit()
 
-        send_magic_link_email(user.email, verification_code, user.full_name)
-
     # Always return success to prevent email enumeration
     return {"message": "Wenn die E-Mail existiert, wurde ein Bestätigungscode gesendet"}
 
 
-@router.post("/magic-link/verify", response_model=schemas.LoginResponse)
+@router.post(
+    "/magic-link/verify",
+    response_model=schemas.LoginResponse,
+    dependencies=[Depends(login_ip_limit)]
+)
 def verify_magic_code(
     verify_data: schemas.MagicLinkVerify,
     request: Request,
@@ -266,10 +246,9 @@ def verify_magic_code(
     # Normalize the code (remove spaces, dashes)
     code = verify_data.token.replace(" ", "").replace("-", "")
 
-    user = db.query(models.User).filter(
-        models.User.magic_link_token == code,
-        models.User.magic_link_expires > datetime.utcnow()
-    ).first()
+    # Consumes the code, so it can't be reused
+    user_id = one_time_tokens.consume_token(db, one_time_tokens.PURPOSE_MAGIC_CODE, code)
+    user = db.query(models.User).filter(models.User.id == user_id).first() if user_id else None
 
     if not user:
         raise HTTPException(
@@ -280,27 +259,15 @@ def verify_magic_code(
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Account ist deaktiviert")
 
-    # Clear the verification code
-    user.magic_link_token = None
-    user.magic_link_expires = None
-
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=user_token_claims(user),
         expires_delta=access_token_expires
     )
 
     # Create session
-    session_token = create_session_token()
-    session = models.Session(
-        user_id=user.id,
-        session_token=session_token,
-        expires_at=datetime.utcnow() + timedelta(hours=settings.SESSION_TOKEN_EXPIRE_HOURS),
-        ip_address=request.client.host if request.client else None,
-        user_agent=request.headers.get("user-agent")
-    )
-    db.add(session)
+    session_token = session_store.create_session(db, user, request)
     db.commit()
 
     return {
@@ -5,6 +5,8 @@ from database import get_db
 import models
 import schemas
 from typing import List
+from config import settings
+import response_cache
 
 router = APIRouter(prefix="/api/profiles", tags=["Profiles"])
 
@@ -16,6 +18,17 @@ def get_all_starters(
     db: Session = Depends(get_db)
 ):
     """Get all users who have created at least one project (visible to public)."""
+    return response_cache.cached_json(
+        "starters_all", (skip, limit), settings.RESPONSE_CACHE_STARTERS_TTL_SECONDS,
+        List[schemas.StarterResponse], lambda: _all_starters(db, skip, limit), _starter_ids
+    )
+
+
+def _starter_ids(starter: dict) -> list[int]:
+    return [starter["id"]]
+
+
+def _all_starters(db: Session, skip: int, limit: int) -> list[dict]:
     # Find users with public projects (verified, financing, ended_success, ended_failed)
     starters = db.query(
         models.User.id,
@@ -55,6 +68,13 @@ def get_successful_starters(
     db: Session = Depends(get_db)
 ):
     """Get users who have successfully funded projects."""
+    return response_cache.cached_json(
+        "starters_successful", (limit,), settings.RESPONSE_CACHE_STARTERS_TTL_SECONDS,
+        List[schemas.SuccessfulStarterResponse], lambda: _successful_starters(db, limit), _starter_ids
+    )
+
+
+def _successful_starters(db: Session, limit: int) -> list[dict]:
     # Find users with ended_success projects
     successful_starters = db.query(
         models.User.id,
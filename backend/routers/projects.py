@@ -1,56 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from database import get_db
 import models
 import schemas
-from security import get_current_user, get_current_user_optional
-import re
+from security import get_current_user, get_current_principal, get_current_principal_optional, Principal
 from typing import Optional, List
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_page
+from slugs import SlugTaken, add_with_unique_slug, next_free_slug, slugify
+import text_search
+import typeahead
+import response_cache
+import pledges
+import pledge_queue
+import rewards
+from config import settings
 
 router = APIRouter(prefix="/api/projects", tags=["Projects"])
 
 
-def generate_slug(title: str) -> str:
-    """Generate a URL-friendly slug from a title."""
-    slug = title.lower()
-    # Replace German umlauts
-    replacements = {
-        'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss',
-        'Ä': 'ae', 'Ö': 'oe', 'Ü': 'ue'
-    }
-    for char, replacement in replacements.items():
-        slug = slug.replace(char, replacement)
-    # Replace spaces and special chars with hyphens
-    slug = re.sub(r'[^a-z0-9]+', '-', slug)
-    # Remove leading/trailing hyphens
-    slug = slug.strip('-')
-    return slug
-
-
-def ensure_unique_slug(db: Session, slug: str, exclude_id: Optional[int] = None) -> str:
-    """Ensure the slug is unique, adding a number suffix if necessary."""
-    base_slug = slug
-    counter = 1
-    while True:
-        query = db.query(models.Project).filter(models.Project.slug == slug)
-        if exclude_id:
-            query = query.filter(models.Project.id != exclude_id)
-        if not query.first():
-            return slug
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-
-
 @router.get("/suggest-slug", response_model=schemas.SlugSuggestion)
 def suggest_slug(
     title: str = Query(..., min_length=1),
     db: Session = Depends(get_db)
 ):
     """Generate a unique slug suggestion from a title."""
-    base_slug = generate_slug(title)
-    unique_slug = ensure_unique_slug(db, base_slug)
-    return {"slug": unique_slug}
+    return {"slug": next_free_slug(db, models.Project.slug, slugify(title))}
 
 
 @router.post("", response_model=schemas.ProjectResponse, status_code=status.HTTP_201_CREATED)
@@ -60,18 +35,9 @@ def create_project(
     db: Session = Depends(get_db)
 ):
     """Create a new project."""
-    # Ensure slug is unique
-    unique_slug = ensure_unique_slug(db, project.slug)
-    if unique_slug != project.slug:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Slug '{project.slug}' is already taken. Try '{unique_slug}' instead."
-        )
-
     db_project = models.Project(
         owner_id=current_user.id,
         title=project.title,
-        slug=project.slug,
         description=project.description,
         short_description=project.short_description,
         funding_goal=project.funding_goal,
@@ -84,7 +50,15 @@ def create_project(
         start_date=project.start_date,
         status="draft"
     )
-    db.add(db_project)
+
+    # Inserted against the unique index, so concurrent creates cannot both win
+    try:
+        add_with_unique_slug(db, db_project, models.Project.slug, project.slug, exact=True)
+    except SlugTaken as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Slug '{e.slug}' is already taken. Try '{e.suggestion}' instead."
+        )
 
     # Mark user as starter if not already
     if not current_user.is_starter:
@@ -98,12 +72,19 @@ def create_project(
 
 @router.get("", response_model=List[schemas.ProjectListResponse])
 def list_projects(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page (replaces skip)"),
     db: Session = Depends(get_db)
 ):
-    """List all public projects (verified, financing, ended_success, ended_failed)."""
+    """
+    List all public projects (verified, financing, ended_success, ended_failed).
+
+    Pass the previous page's X-Next-Cursor header as ``cursor`` to page
+    without OFFSET; ``skip`` is kept for existing clients.
+    """
     query = db.query(models.Project).options(
         joinedload(models.Project.owner)
     ).filter(
@@ -113,24 +94,83 @@ def list_projects(
     if status:
         query = query.filter(models.Project.status == status)
 
-    projects = query.order_by(models.Project.created_at.desc()).offset(skip).limit(limit).all()
+    if cursor or not skip:
+        return keyset_page(query, models.Project, cursor, limit, response)
+
+    projects = query.order_by(
+        models.Project.created_at.desc(), models.Project.id.desc()
+    ).offset(skip).limit(limit).all()
     return projects
 
 
+@router.get("/typeahead", response_model=List[schemas.TypeaheadSuggestion])
+def typeahead_suggestions(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Optional[str] = Query(None, pattern="^(project|starter)$", description="Only projects or only starters"),
+    limit: int = Query(8, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """Search-as-you-type over public project titles/slugs and starter names."""
+    return typeahead.index.lookup(db, q, limit, kind)
+
+
+@router.get("/search", response_model=List[schemas.ProjectListResponse])
+def search_projects(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200, description="Search terms"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    project_type: Optional[str] = Query(None, description="Filter by project type"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    db: Session = Depends(get_db)
+):
+    """Full-text search over public projects, best matches first."""
+    query = db.query(models.Project).options(
+        joinedload(models.Project.owner)
+    ).filter(
+        models.Project.status.in_(["verified", "financing", "ended_success", "ended_failed"])
+    )
+
+    if status:
+        query = query.filter(models.Project.status == status)
+
+    if project_type:
+        query = query.filter(models.Project.project_type == project_type)
+
+    query = text_search.search(query, models.Project, q, decode_cursor(cursor, float, int) if cursor else None)
+    if query is None:
+        return []
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].score, rows[-1][0].id)
+    return [project for project, _ in rows]
+
+
+def _owner_ids(project: dict) -> list[int]:
+    return [project["owner"]["id"]] if project.get("owner") else []
+
+
 @router.get("/featured", response_model=List[schemas.ProjectListResponse])
 def list_featured_projects(
     limit: int = Query(4, ge=1, le=20),
     db: Session = Depends(get_db)
 ):
     """Get featured projects (financing projects, ordered by funding progress)."""
-    projects = db.query(models.Project).options(
-        joinedload(models.Project.owner)
-    ).filter(
-        models.Project.status == "financing"
-    ).order_by(
-        models.Project.funding_current.desc()
-    ).limit(limit).all()
-    return projects
+    def featured():
+        return db.query(models.Project).options(
+            joinedload(models.Project.owner)
+        ).filter(
+            models.Project.status == "financing"
+        ).order_by(
+            models.Project.funding_current.desc()
+        ).limit(limit).all()
+
+    return response_cache.cached_json(
+        "featured", (limit,), settings.RESPONSE_CACHE_FEATURED_TTL_SECONDS,
+        List[schemas.ProjectListResponse], featured, _owner_ids
+    )
 
 
 @router.get("/near-goal", response_model=List[schemas.ProjectListResponse])
@@ -140,22 +180,26 @@ def list_near_goal_projects(
     db: Session = Depends(get_db)
 ):
     """Get projects that are near their funding goal (default 80%+)."""
-    # Get financing projects where funding_current >= min_percentage% of funding_goal
-    projects = db.query(models.Project).options(
-        joinedload(models.Project.owner)
-    ).filter(
-        models.Project.status == "financing",
-        models.Project.funding_goal > 0,
-        models.Project.funding_current >= models.Project.funding_goal * (min_percentage / 100)
-    ).order_by(
-        (models.Project.funding_current / models.Project.funding_goal).desc()
-    ).limit(limit).all()
-    return projects
+    def near_goal():
+        # Financing projects at min_percentage% of their goal or more, via the partial funding_ratio index
+        return db.query(models.Project).options(
+            joinedload(models.Project.owner)
+        ).filter(
+            models.Project.status == "financing",
+            models.Project.funding_ratio >= min_percentage / 100
+        ).order_by(
+            models.Project.funding_ratio.desc()
+        ).limit(limit).all()
+
+    return response_cache.cached_json(
+        "near_goal", (min_percentage, limit), settings.RESPONSE_CACHE_NEAR_GOAL_TTL_SECONDS,
+        List[schemas.ProjectListResponse], near_goal, _owner_ids
+    )
 
 
 @router.get("/my-projects", response_model=List[schemas.ProjectListResponse])
 def list_my_projects(
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """List all projects owned by the current user."""
@@ -168,7 +212,7 @@ def list_my_projects(
 @router.get("/{slug}", response_model=schemas.ProjectResponse)
 def get_project(
     slug: str,
-    current_user: Optional[models.User] = Depends(get_current_user_optional),
+    current_user: Optional[Principal] = Depends(get_current_principal_optional),
     db: Session = Depends(get_db)
 ):
     """Get a project by slug."""
@@ -196,7 +240,99 @@ def get_project(
                 detail="Project not found"
             )
 
-    return project
+    # Pledges not yet folded into funding_current are still in the shards
+    response = schemas.ProjectResponse.model_validate(project)
+    response.funding_current = pledges.funding_total(db, project)
+    return response
+
+
+@router.post("/{slug}/pledges", response_model=schemas.QueuedPledgeResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_pledge(
+    slug: str,
+    pledge: schemas.PledgeCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Pledge an amount to a project that is currently financing, optionally
+    claiming a held reward reservation.
+
+    The pledge is queued and applied to the project within seconds; poll
+    its status with GET /api/projects/{slug}/pledges/{id}.
+    """
+    project = db.query(models.Project.id, models.Project.status).filter(models.Project.slug == slug).first()
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    if project.status != "financing":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Project is not accepting pledges"
+        )
+
+    reward_tier_id = None
+    if pledge.reservation_id is not None:
+        reservation = db.query(models.RewardReservation).join(
+            models.RewardTier, models.RewardTier.id == models.RewardReservation.tier_id
+        ).filter(
+            models.RewardReservation.id == pledge.reservation_id,
+            models.RewardReservation.user_id == current_user.id,
+            models.RewardTier.project_id == project.id
+        ).first()
+
+        if not reservation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reservation not found"
+            )
+
+        tier = db.get(models.RewardTier, reservation.tier_id)
+        if pledge.amount < tier.amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pledge is below the reward's minimum amount"
+            )
+
+        # Claimed in the same transaction as the queue entry
+        if not rewards.claim(db, reservation):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Reservation is no longer held"
+            )
+        reward_tier_id = tier.id
+
+    entry = pledge_queue.enqueue(db, project.id, current_user.id, pledge.amount, reward_tier_id)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+@router.get("/{slug}/pledges/{pledge_id}", response_model=schemas.QueuedPledgeResponse)
+def get_pledge_status(
+    slug: str,
+    pledge_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Status of one of the current user's queued pledges."""
+    entry = db.query(models.QueuedPledge).join(
+        models.Project, models.Project.id == models.QueuedPledge.project_id
+    ).filter(
+        models.QueuedPledge.id == pledge_id,
+        models.QueuedPledge.user_id == current_user.id,
+        models.Project.slug == slug
+    ).first()
+
+    if not entry:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Pledge not found"
+        )
+    return entry
 
 
 @router.put("/{slug}", response_model=schemas.ProjectResponse)
@@ -234,25 +370,24 @@ def update_project(
 
     update_data = project_update.model_dump(exclude_unset=True)
 
-    # If slug is being updated, slugify it first and ensure it's unique
-    if "slug" in update_data and update_data["slug"]:
-        # Slugify the input
-        slugified = generate_slug(update_data["slug"])
-        if slugified != project.slug:
-            unique_slug = ensure_unique_slug(db, slugified, project.id)
-            if unique_slug != slugified:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Slug '{slugified}' is already taken. Try '{unique_slug}' instead."
-                )
-            update_data["slug"] = slugified
-        else:
-            # No change needed
-            del update_data["slug"]
+    # A new slug is slugified and claimed against the unique index after the other fields
+    new_slug = None
+    requested_slug = update_data.pop("slug", None)
+    if requested_slug and slugify(requested_slug) != project.slug:
+        new_slug = slugify(requested_slug)
 
     for field, value in update_data.items():
         setattr(project, field, value)
 
+    if new_slug:
+        try:
+            add_with_unique_slug(db, project, models.Project.slug, new_slug, exact=True)
+        except SlugTaken as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Slug '{e.slug}' is already taken. Try '{e.suggestion}' instead."
+            )
+
     db.commit()
     db.refresh(project)
 
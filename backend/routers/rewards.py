@@ -0,0 +1,158 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from database import get_db
+import models
+import schemas
+from security import get_current_user, get_current_principal_optional, Principal
+from typing import Optional, List
+import rewards
+
+router = APIRouter(prefix="/api/projects", tags=["Rewards"])
+
+
+def _tier_response(tier: models.RewardTier) -> schemas.RewardTierResponse:
+    response = schemas.RewardTierResponse.model_validate(tier)
+    response.remaining = rewards.remaining(tier)
+    return response
+
+
+def _get_visible_project(db: Session, slug: str, current_user: Optional[Principal]) -> models.Project:
+    project = db.query(models.Project).filter(models.Project.slug == slug).first()
+
+    # Draft and submitted projects are only visible to owner and admins
+    if project and project.status in ["draft", "submitted"]:
+        if not current_user or (current_user.id != project.owner_id and not current_user.is_admin):
+            project = None
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    return project
+
+
+@router.get("/{slug}/rewards", response_model=List[schemas.RewardTierResponse])
+def list_reward_tiers(
+    slug: str,
+    current_user: Optional[Principal] = Depends(get_current_principal_optional),
+    db: Session = Depends(get_db)
+):
+    """Get a project's reward tiers (Dankeschöns) with the units still available."""
+    project = _get_visible_project(db, slug, current_user)
+    return [_tier_response(tier) for tier in project.reward_tiers]
+
+
+@router.post("/{slug}/rewards", response_model=schemas.RewardTierResponse, status_code=status.HTTP_201_CREATED)
+def create_reward_tier(
+    slug: str,
+    tier: schemas.RewardTierCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a reward tier (owner or admin; non-admins only before the campaign has ended)."""
+    project = db.query(models.Project).filter(models.Project.slug == slug).first()
+
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    if project.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this project"
+        )
+
+    if not current_user.is_admin and project.status in ["ended_success", "ended_failed", "rejected"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot add rewards to a closed project"
+        )
+
+    db_tier = models.RewardTier(project_id=project.id, reserved=0, **tier.model_dump())
+    db.add(db_tier)
+    db.commit()
+    db.refresh(db_tier)
+    return _tier_response(db_tier)
+
+
+@router.post(
+    "/{slug}/rewards/{tier_id}/reservations",
+    response_model=schemas.RewardReservationResponse,
+    status_code=status.HTTP_201_CREATED
+)
+def reserve_reward(
+    slug: str,
+    tier_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Hold one unit of a reward tier for the current user (one at a time per
+    tier). Pledge with the returned reservation id before ``expires_at`` to
+    claim it.
+    """
+    tier = db.query(models.RewardTier.id, models.Project.status).join(
+        models.Project, models.Project.id == models.RewardTier.project_id
+    ).filter(
+        models.RewardTier.id == tier_id,
+        models.Project.slug == slug
+    ).first()
+
+    if not tier:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reward not found"
+        )
+
+    if tier.status != "financing":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Project is not accepting pledges"
+        )
+
+    try:
+        reservation = rewards.reserve(db, tier.id, current_user.id)
+    except rewards.AlreadyHeld:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="You already hold this reward. Pledge with it or release it first."
+        )
+    if reservation is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reward is sold out"
+        )
+    db.commit()
+    db.refresh(reservation)
+    return reservation
+
+
+@router.delete("/{slug}/rewards/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+def release_reservation(
+    slug: str,
+    reservation_id: int,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Give a held reward back before it expires."""
+    reservation = db.query(models.RewardReservation).join(
+        models.RewardTier, models.RewardTier.id == models.RewardReservation.tier_id
+    ).join(
+        models.Project, models.Project.id == models.RewardTier.project_id
+    ).filter(
+        models.RewardReservation.id == reservation_id,
+        models.RewardReservation.user_id == current_user.id,
+        models.Project.slug == slug
+    ).first()
+
+    if not reservation or not rewards.release(db, reservation):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reservation not found"
+        )
+    db.commit()
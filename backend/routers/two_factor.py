@@ -20,11 +20,15 @@ def setup_2fa(
             detail="Two-factor authentication is already enabled"
         )
 
-    secret = generate_2fa_secret()
-    qr_code_url = generate_qr_code(secret, current_user.email)
+    # Repeated setup attempts keep the pending secret, so an authenticator
+    # that already scanned the code stays valid
+    secret = current_user.two_factor_secret
+    if not secret:
+        secret = generate_2fa_secret()
+        current_user.two_factor_secret = secret
+        db.commit()
 
-    current_user.two_factor_secret = secret
-    db.commit()
+    qr_code_url = generate_qr_code(secret, current_user.email)
 
     return {
         "secret": secret,
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 import models
 import schemas
-from security import get_current_user, get_password_hash
+from security import get_current_user, get_password_hash, revoke_access_tokens
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -24,6 +24,7 @@ def update_profile(
 
     if user_update.password is not None:
         current_user.hashed_password = get_password_hash(user_update.password)
+        revoke_access_tokens(current_user)
 
     db.commit()
     db.refresh(current_user)
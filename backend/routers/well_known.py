@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+import jwt_keys
+
+router = APIRouter(prefix="/.well-known", tags=["Well-Known"])
+
+
+@router.get("/jwks.json")
+def get_jwks(response: Response):
+    """Public keys for verifying access tokens (empty when tokens are HS256-signed)."""
+    response.headers["Cache-Control"] = "public, max-age=300"
+    if not jwt_keys.is_asymmetric():
+        return {"keys": []}
+    return jwt_keys.key_ring.jwks()
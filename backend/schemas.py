@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
 
@@ -91,6 +92,68 @@ class TestEmailRequest(BaseModel):
     user_name: Optional[str] = None
 
 
+class BulkEmailCreate(BaseModel):
+    audience: str = Field(..., description="Audience: all_users, starters, backers")
+    project_status: Optional[str] = Field(None, description="Only starters/backers of a project in this status")
+    subject: str = Field(..., min_length=1, max_length=500)
+    message: str = Field(..., min_length=1, description="Plain text; line breaks are kept")
+    locale: Optional[str] = Field(None, max_length=10)
+
+
+class BulkEmailJobResponse(BaseModel):
+    id: int
+    audience: str
+    project_status: Optional[str] = None
+    subject: str
+    status: str
+    total_recipients: int
+    sent_count: int
+    failed_count: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserImport(BaseModel):
+    email: EmailStr
+    full_name: str = Field(..., min_length=2)
+    password: Optional[str] = Field(None, min_length=8, description="Omitted: a random one (use password reset)")
+
+
+class ProjectImport(BaseModel):
+    owner_email: EmailStr
+    title: str = Field(..., min_length=1, max_length=255)
+    slug: Optional[str] = Field(None, max_length=255, description="Slugified; omitted: derived from the title")
+    description: Optional[str] = None
+    short_description: Optional[str] = Field(None, max_length=500)
+    funding_goal: Optional[Decimal] = Field(None, ge=0)
+    funding_current: Decimal = Field(Decimal("0"), ge=0)
+    image_url: Optional[str] = Field(None, max_length=500)
+    video_url: Optional[str] = Field(None, max_length=500)
+    project_type: str = Field("crowdfunding", pattern="^(crowdfunding|fundraising|private)$")
+    status: str = Field(
+        "draft", pattern="^(draft|submitted|verified|financing|ended_success|ended_failed|rejected)$"
+    )
+    start_date: Optional[datetime] = None
+    financing_start: Optional[datetime] = None
+    financing_end: Optional[datetime] = None
+
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row (CSV: after the header; NDJSON: line)
+    error: str
+
+
+class ImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: list[ImportRowError]
+
+
 # Token refresh schemas
 class RefreshTokenRequest(BaseModel):
     session_token: str
@@ -192,10 +255,76 @@ class ProjectListResponse(BaseModel):
         from_attributes = True
 
 
+class PledgeCreate(BaseModel):
+    amount: Decimal = Field(..., gt=0, le=1000000, decimal_places=2)
+    reservation_id: Optional[int] = Field(None, description="Held reward reservation this pledge claims")
+
+
+class PledgeResponse(BaseModel):
+    id: int
+    project_id: int
+    amount: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class QueuedPledgeResponse(BaseModel):
+    id: int
+    project_id: int
+    amount: float
+    reward_tier_id: Optional[int] = None
+    status: str  # pending, applied
+    pledge_id: Optional[int] = None  # Ledger entry once applied
+    created_at: datetime
+    applied_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RewardTierCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: Optional[str] = None
+    amount: Decimal = Field(..., gt=0, le=1000000, decimal_places=2)
+    quantity: Optional[int] = Field(None, ge=1, description="Units available; omit for unlimited")
+
+
+class RewardTierResponse(BaseModel):
+    id: int
+    project_id: int
+    title: str
+    description: Optional[str] = None
+    amount: float
+    quantity: Optional[int] = None
+    remaining: Optional[int] = None  # None for unlimited tiers
+
+    class Config:
+        from_attributes = True
+
+
+class RewardReservationResponse(BaseModel):
+    id: int
+    tier_id: int
+    status: str  # held, claimed, released, expired
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class SlugSuggestion(BaseModel):
     slug: str
 
 
+class TypeaheadSuggestion(BaseModel):
+    kind: str  # project, starter
+    id: int
+    label: str
+    slug: str
+
+
 # Admin Project schemas
 class AdminProjectUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -1,7 +1,7 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-import bcrypt
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -9,17 +9,32 @@ from config import settings
 from database import get_db
 import models
 import secrets
+import auth_cache
+import jwt_keys
+import password_hashing
 
 security = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authorization claims carried by an access token (no DB row attached)."""
+    id: int
+    is_admin: bool
+    is_active: bool
+    token_version: int
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return password_hashing.verify_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    return password_hashing.hash_password(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return password_hashing.needs_rehash(hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -29,8 +44,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    if "ver" in to_encode:
+        auth_cache.remember_token_version(int(to_encode["sub"]), to_encode["ver"])
+    return encode_jwt(to_encode)
+
+
+def encode_jwt(claims: dict) -> str:
+    """Sign claims with SECRET_KEY (HS*) or the current key ring key (RS*)."""
+    if not jwt_keys.is_asymmetric():
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    key = jwt_keys.key_ring.signing_key()
+    return jwt.encode(claims, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+
+def decode_jwt(token: str) -> dict:
+    """Verify a token signed by ``encode_jwt``. Raises JWTError if invalid."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid:
+        key = jwt_keys.key_ring.verification_key(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+    if not jwt_keys.is_asymmetric():
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    # Tokens signed with SECRET_KEY before switching to the key ring
+    if settings.JWT_ACCEPT_LEGACY_HS256:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+
+    raise JWTError("Token has no key id")
+
+
+def user_token_claims(user: models.User) -> dict:
+    """Claims embedded in a user's access token so reads can skip the users lookup."""
+    return {
+        "sub": str(user.id),
+        "adm": bool(user.is_admin),
+        "act": bool(user.is_active),
+        "ver": user.token_version or 0,
+    }
+
+
+def revoke_access_tokens(user: models.User) -> None:
+    """Invalidate all access tokens issued to ``user`` (takes effect on commit)."""
+    user.token_version = (user.token_version or 0) + 1
 
 
 def create_session_token() -> str:
@@ -46,6 +105,53 @@ def create_verification_code() -> str:
     return ''.join([str(secrets.randbelow(10)) for _ in range(6)])
 
 
+def _resolve_token_user(db: Session, token: str) -> Optional[models.User]:
+    """Return the user for a valid access token, or None. Uses the auth cache."""
+    user = auth_cache.get_user(db, token)
+    if user is not None:
+        return user
+
+    try:
+        payload = decode_jwt(token)
+        user_id: int = payload.get("sub")
+        if user_id is None:
+            return None
+    except JWTError:
+        return None
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is None or payload.get("ver", 0) != (user.token_version or 0):
+        return None
+
+    auth_cache.put_user(token, user, payload["exp"])
+    return user
+
+
+def _resolve_token_principal(db: Session, token: str) -> Optional[Principal]:
+    """Return the principal for a valid access token, or None. Usually needs no DB query."""
+    try:
+        payload = decode_jwt(token)
+        user_id = payload.get("sub")
+        if user_id is None:
+            return None
+        user_id = int(user_id)
+    except (JWTError, ValueError):
+        return None
+
+    if "adm" not in payload or "act" not in payload:
+        # Token issued before claims were added - fall back to the users row
+        user = _resolve_token_user(db, token)
+        if user is None:
+            return None
+        return Principal(user.id, bool(user.is_admin), bool(user.is_active), user.token_version or 0)
+
+    version = auth_cache.get_token_version(db, user_id)
+    if version is None or payload.get("ver", 0) != version:
+        return None
+
+    return Principal(user_id, bool(payload["adm"]), bool(payload["act"]), version)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -56,16 +162,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = _resolve_token_user(db, credentials.credentials)
     if user is None:
         raise credentials_exception
 
@@ -95,30 +192,80 @@ async def get_current_user_optional(
     if not auth_header or not auth_header.startswith("Bearer "):
         return None
 
-    try:
-        token = auth_header.split(" ")[1]
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            return None
-    except JWTError:
-        return None
-
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    token = auth_header.split(" ")[1]
+    user = _resolve_token_user(db, token)
     if user is None or not user.is_active:
         return None
 
     return user
 
 
-def validate_session(db: Session, session_token: str) -> Optional[models.User]:
-    session = db.query(models.Session).filter(
-        models.Session.session_token == session_token,
-        models.Session.expires_at > datetime.utcnow()
-    ).first()
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """Authorize from token claims only. Use for read-only endpoints that don't need the user row."""
+    principal = _resolve_token_principal(db, credentials.credentials)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    return principal
+
+
+async def get_current_admin_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return principal
+
+
+async def require_metrics_access(
+    request: Request,
+    db: Session = Depends(get_db)
+) -> None:
+    """Allow admins, or scrapers presenting ``METRICS_TOKEN`` as a bearer token."""
+    auth_header = request.headers.get("Authorization", "")
+    if settings.METRICS_TOKEN and secrets.compare_digest(
+        auth_header.encode("utf-8"), f"Bearer {settings.METRICS_TOKEN}".encode("utf-8")
+    ):
+        return
+
+    principal = await get_current_principal_optional(request, db)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not principal.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+
+async def get_current_principal_optional(
+    request: Request,
+    db: Session = Depends(get_db)
+) -> Optional[Principal]:
+    """Get the current principal if authenticated, otherwise return None."""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
 
-    if not session:
+    principal = _resolve_token_principal(db, auth_header.split(" ")[1])
+    if principal is None or not principal.is_active:
         return None
 
-    user = db.query(models.User).filter(models.User.id == session.user_id).first()
-    return user if user and user.is_active else None
+    return principal
@@ -0,0 +1,294 @@
+"""
+Login session lifecycle.
+
+Sessions are created on login and magic-code verification. Each user keeps
+at most ``SESSION_MAX_PER_USER`` sessions (oldest evicted first), and a
+background sweeper deletes expired sessions in small batches.
+
+``/api/auth/refresh`` validates sessions through a short-TTL per-process
+cache of session -> user snapshot, dropped whenever the user's row changes
+(logout, password reset, deactivation) or the session is evicted. Sliding
+expiration is write-behind: refreshes only record the new expiry in memory
+and a background task writes all pending expiries in one batched UPDATE.
+Concurrent refreshes of the same session within
+``SESSION_REFRESH_COALESCE_SECONDS`` receive the same access token.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from fastapi import Request
+from sqlalchemy import bindparam, event, func, update
+from sqlalchemy.orm import Session, make_transient_to_detached
+from cache import TTLCache
+from config import settings
+from database import SessionLocal, delete_in_batches
+from metrics import register_collector
+from security import create_session_token
+import auth_cache
+import invalidation
+import models
+
+SESSIONS_TOPIC = "sessions"
+
+# session_token -> {"session_id", "expires_at", "user": user snapshot}
+session_cache = TTLCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    default_ttl=settings.SESSION_CACHE_TTL_SECONDS,
+)
+
+# session_token -> {"session_id", "user_id", "access_token"}
+issued_tokens = TTLCache(
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES,
+    default_ttl=settings.SESSION_REFRESH_COALESCE_SECONDS,
+)
+
+# Striped locks so concurrent refreshes of one session run one at a time
+_refresh_locks = [threading.Lock() for _ in range(64)]
+
+# session_id -> new expires_at, written by flush_touches()
+_pending_touches: dict[int, datetime] = {}
+_touch_lock = threading.Lock()
+
+_sweep_lock = threading.Lock()
+_sweep_stats = {
+    "table_rows": None,
+    "runs": 0,
+    "deleted_total": 0,
+    "last_deleted": 0,
+    "last_duration_seconds": 0.0,
+    "last_rows_per_second": 0.0,
+    "evicted_total": 0,
+    "touches_flushed": 0,
+}
+
+
+def _utc(dt: datetime) -> datetime:
+    """Naive UTC, whatever the driver returns (aware on Postgres, naive on SQLite)."""
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def create_session(db: Session, user: models.User, request: Request) -> str:
+    """Add a session for ``user`` (caller commits) and return its token."""
+    evict_excess_sessions(db, user.id, keep=settings.SESSION_MAX_PER_USER - 1)
+
+    session_token = create_session_token()
+    db.add(models.Session(
+        user_id=user.id,
+        session_token=session_token,
+        expires_at=datetime.utcnow() + timedelta(hours=settings.SESSION_TOKEN_EXPIRE_HOURS),
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent")
+    ))
+    return session_token
+
+
+def evict_excess_sessions(db: Session, user_id: int, keep: int) -> int:
+    """Delete all but the ``keep`` newest sessions of a user (caller commits)."""
+    excess = db.query(models.Session.id).filter(
+        models.Session.user_id == user_id
+    ).order_by(
+        models.Session.created_at.desc(), models.Session.id.desc()
+    ).offset(max(keep, 0)).all()
+
+    if not excess:
+        return 0
+
+    session_ids = [row.id for row in excess]
+    db.query(models.Session).filter(
+        models.Session.id.in_(session_ids)
+    ).delete(synchronize_session=False)
+    # Published after commit, so no refresh can cache the rows again meanwhile
+    db.info.setdefault("evicted_session_ids", set()).update(session_ids)
+
+    with _sweep_lock:
+        _sweep_stats["evicted_total"] += len(excess)
+    return len(excess)
+
+
+def validate_session(db: Session, session_token: str) -> Optional[models.User]:
+    """Return the active user owning a live session, or None."""
+    now = datetime.utcnow()
+    entry = session_cache.get(session_token)
+
+    if entry is None or entry["expires_at"] <= now:
+        row = db.query(models.Session.id, models.Session.expires_at, models.User).join(
+            models.User, models.User.id == models.Session.user_id
+        ).filter(
+            models.Session.session_token == session_token,
+            models.Session.expires_at > now
+        ).first()
+
+        if row is None:
+            return None
+
+        entry = {
+            "session_id": row.id,
+            "expires_at": _utc(row.expires_at),
+            "user": {key: getattr(row.User, key) for key in auth_cache.USER_COLUMNS},
+        }
+
+    if settings.SESSION_SLIDING_EXPIRATION:
+        entry["expires_at"] = now + timedelta(hours=settings.SESSION_TOKEN_EXPIRE_HOURS)
+        with _touch_lock:
+            _pending_touches[entry["session_id"]] = entry["expires_at"]
+
+    ttl = min(settings.SESSION_CACHE_TTL_SECONDS, (entry["expires_at"] - now).total_seconds())
+    session_cache.set(session_token, entry, ttl)
+
+    if not entry["user"]["is_active"]:
+        return None
+
+    user = models.User(**entry["user"])
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def refresh_access_token(
+    db: Session,
+    session_token: str,
+    issue: Callable[[models.User], str]
+) -> Optional[str]:
+    """
+    Return an access token for a live session, or None.
+
+    ``issue`` creates the token for the session's user. A token issued for the
+    same session within the coalescing window is returned instead.
+    """
+    with _refresh_locks[hash(session_token) % len(_refresh_locks)]:
+        recent = issued_tokens.get(session_token)
+        if recent is not None:
+            return recent["access_token"]
+
+        user = validate_session(db, session_token)
+        if user is None:
+            return None
+
+        access_token = issue(user)
+        entry = session_cache.get(session_token)
+        issued_tokens.set(session_token, {
+            "session_id": entry["session_id"] if entry else None,
+            "user_id": user.id,
+            "access_token": access_token,
+        })
+        return access_token
+
+
+def flush_touches(db: Session) -> int:
+    """Write pending sliding-expiration updates in one batch; returns sessions touched."""
+    with _touch_lock:
+        pending = dict(_pending_touches)
+        _pending_touches.clear()
+
+    if not pending:
+        return 0
+
+    table = models.Session.__table__
+    db.execute(
+        update(table).where(
+            table.c.id == bindparam("session_id"),
+            table.c.expires_at < bindparam("new_expires_at")
+        ).values(expires_at=bindparam("new_expires_at")),
+        [{"session_id": session_id, "new_expires_at": expires_at} for session_id, expires_at in pending.items()]
+    )
+    db.commit()
+
+    with _sweep_lock:
+        _sweep_stats["touches_flushed"] += len(pending)
+    return len(pending)
+
+
+def flush_touches_job() -> int:
+    db = SessionLocal()
+    try:
+        return flush_touches(db)
+    finally:
+        db.close()
+
+
+def sweep_expired(db: Session, batch_size: int = 500) -> int:
+    """Delete expired sessions in batches and record sweep metrics."""
+    # Leave a grace period so expiries still pending in some worker's
+    # write-behind buffer are flushed before the session is swept
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.SESSION_TOUCH_FLUSH_SECONDS * 2)
+
+    started = time.monotonic()
+    deleted = delete_in_batches(
+        db, models.Session,
+        models.Session.expires_at <= cutoff,
+        batch_size=batch_size
+    )
+    duration = time.monotonic() - started
+    table_rows = db.query(func.count(models.Session.id)).scalar()
+
+    with _sweep_lock:
+        _sweep_stats["table_rows"] = table_rows
+        _sweep_stats["runs"] += 1
+        _sweep_stats["deleted_total"] += deleted
+        _sweep_stats["last_deleted"] = deleted
+        _sweep_stats["last_duration_seconds"] = round(duration, 4)
+        _sweep_stats["last_rows_per_second"] = round(deleted / duration, 1) if duration > 0 else 0.0
+    return deleted
+
+
+def sweep_expired_job() -> int:
+    db = SessionLocal()
+    try:
+        return sweep_expired(db, settings.SESSION_SWEEP_BATCH_SIZE)
+    finally:
+        db.close()
+
+
+def clear() -> None:
+    """Drop everything cached in this worker."""
+    session_cache.clear()
+    issued_tokens.clear()
+    with _touch_lock:
+        _pending_touches.clear()
+
+
+def stats() -> dict:
+    with _touch_lock:
+        pending = len(_pending_touches)
+    with _sweep_lock:
+        return {**_sweep_stats, "touches_pending": pending}
+
+
+def _on_users_invalidated(payload: dict) -> None:
+    if payload.get("all"):
+        session_cache.clear()
+        issued_tokens.clear()
+        return
+    user_ids = set(payload.get("user_ids", []))
+    session_cache.delete_where(lambda token, entry: entry["user"]["id"] in user_ids)
+    issued_tokens.delete_where(lambda token, entry: entry["user_id"] in user_ids)
+
+
+def _on_sessions_invalidated(payload: dict) -> None:
+    if payload.get("all"):
+        session_cache.clear()
+        issued_tokens.clear()
+        return
+    session_ids = set(payload.get("session_ids", []))
+    session_cache.delete_where(lambda token, entry: entry["session_id"] in session_ids)
+    issued_tokens.delete_where(lambda token, entry: entry["session_id"] in session_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_evicted_sessions(session):
+    session_ids = session.info.pop("evicted_session_ids", None)
+    if session_ids:
+        invalidation.publish(SESSIONS_TOPIC, {"session_ids": sorted(session_ids)})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_evicted_sessions(session):
+    session.info.pop("evicted_session_ids", None)
+
+
+invalidation.subscribe(auth_cache.USERS_TOPIC, _on_users_invalidated)
+invalidation.subscribe(SESSIONS_TOPIC, _on_sessions_invalidated)
+register_collector("sessions", stats)
+register_collector("session_cache", session_cache.stats)
@@ -0,0 +1,136 @@
+"""
+Slug generation and unique slug allocation for projects and profiles.
+
+``next_free_slug`` finds the first free ``<base>``, ``<base>-1``, ``<base>-2``
+... with one prefix query on the slug's unique index instead of one query per
+candidate. The unique constraint stays the source of truth:
+``add_with_unique_slug`` inserts inside a savepoint and, if a concurrent
+request took the slug in the meantime, picks the next one and retries.
+``next_free_slugs`` does the same lookup for many rows of a bulk import.
+"""
+import re
+from typing import Iterable, Optional
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+TRANSLITERATIONS = {
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss',
+    'á': 'a', 'à': 'a', 'â': 'a', 'ã': 'a',
+    'é': 'e', 'è': 'e', 'ê': 'e',
+    'í': 'i', 'ì': 'i', 'î': 'i',
+    'ó': 'o', 'ò': 'o', 'ô': 'o', 'õ': 'o',
+    'ú': 'u', 'ù': 'u', 'û': 'u',
+    'ñ': 'n', 'ç': 'c'
+}
+
+# Attempts before giving up when concurrent requests keep taking our slug
+_MAX_ATTEMPTS = 5
+
+
+class SlugTaken(Exception):
+    """The requested slug is in use; ``suggestion`` is the next free one."""
+
+    def __init__(self, slug: str, suggestion: str):
+        super().__init__(f"Slug '{slug}' is already taken")
+        self.slug = slug
+        self.suggestion = suggestion
+
+
+def transliterate(text: str) -> str:
+    """Lowercase ``text`` and spell out umlauts and accents (ä -> ae, é -> e)."""
+    text = text.lower()
+    for char, replacement in TRANSLITERATIONS.items():
+        text = text.replace(char, replacement)
+    return text
+
+
+def slugify(text: str) -> str:
+    """Generate a URL-safe slug from a title or name."""
+    if not text:
+        return ""
+    slug = transliterate(text)
+    # Replace spaces and non-alphanumeric with hyphens
+    slug = re.sub(r'[^a-z0-9]+', '-', slug)
+    return slug.strip('-')
+
+
+def next_free_slug(db: Session, column, base: str, exclude_id: Optional[int] = None) -> str:
+    """Return ``base`` or the lowest free ``base-N`` using a single query."""
+    model = column.class_
+    query = db.query(column).filter(
+        (column == base) | column.startswith(f"{base}-", autoescape=True)
+    )
+    if exclude_id is not None:
+        query = query.filter(model.id != exclude_id)
+    taken = {row[0] for row in query.all()}
+
+    if base not in taken:
+        return base
+
+    prefix = f"{base}-"
+    used = {int(slug[len(prefix):]) for slug in taken if slug[len(prefix):].isdigit()}
+    counter = 1
+    while counter in used:
+        counter += 1
+    return f"{base}-{counter}"
+
+
+def next_free_slugs(db: Session, column, bases: list[str], reserved: Iterable[str] = ()) -> list[str]:
+    """
+    ``next_free_slug`` for many bases with one query per 100 distinct bases.
+    The returned slugs are unique among themselves and avoid ``reserved``.
+    """
+    distinct = sorted(set(bases))
+    taken = set(reserved)
+    for start in range(0, len(distinct), 100):
+        chunk = distinct[start:start + 100]
+        conditions = [column.in_(chunk)] + [column.startswith(f"{base}-", autoescape=True) for base in chunk]
+        taken.update(row[0] for row in db.query(column).filter(or_(*conditions)))
+
+    slugs = []
+    counters: dict[str, int] = {}
+    for base in bases:
+        slug = base
+        while slug in taken:
+            counters[base] = counters.get(base, 0) + 1
+            slug = f"{base}-{counters[base]}"
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def _slug_taken(db: Session, column, slug: str, exclude_id: Optional[int]) -> bool:
+    query = db.query(column.class_.id).filter(column == slug)
+    if exclude_id is not None:
+        query = query.filter(column.class_.id != exclude_id)
+    return query.first() is not None
+
+
+def add_with_unique_slug(db: Session, obj, column, base: str, exact: bool = False) -> str:
+    """
+    Add (or update) ``obj`` with a unique slug derived from ``base`` and flush it.
+
+    With ``exact=True`` only ``base`` itself is acceptable and ``SlugTaken``
+    is raised if it is in use. Other integrity errors are re-raised. The caller
+    commits.
+    """
+    exclude_id = obj.id if obj.id is not None else None
+    slug = base if exact else next_free_slug(db, column, base, exclude_id)
+
+    for _ in range(_MAX_ATTEMPTS):
+        setattr(obj, column.key, slug)
+        try:
+            with db.begin_nested():
+                db.add(obj)
+                db.flush()
+            return slug
+        except IntegrityError:
+            if not _slug_taken(db, column, slug, exclude_id):
+                raise
+            suggestion = next_free_slug(db, column, base, exclude_id)
+            if exact:
+                raise SlugTaken(base, suggestion)
+            slug = suggestion
+
+    raise RuntimeError(f"Could not allocate a unique slug for '{base}'")
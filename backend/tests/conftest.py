@@ -12,6 +12,8 @@ os.environ["ADMIN_EMAIL"] = "admin@test.com"
 os.environ["ADMIN_PASSWORD"] = "testpassword123"
 os.environ["FRONTEND_URL"] = "http://localhost:5173"
 os.environ["BACKEND_URL"] = "http://localhost:8000"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
 
 import pytest
 from sqlalchemy import create_engine
@@ -82,6 +84,18 @@ def client(db_session):
         db_session.execute(table.delete())
     db_session.commit()
 
+    # Cached auth state refers to rows that no longer exist
+    import auth_cache
+    import rate_limit
+    import response_cache
+    import session_store
+    import typeahead
+    auth_cache.clear()
+    session_store.clear()
+    rate_limit.reset()
+    typeahead.clear()
+    response_cache.clear()
+
     with TestClient(app, raise_server_exceptions=False) as test_client:
         yield test_client
 
@@ -146,3 +160,26 @@ def admin_headers(client, db_session):
     assert response.status_code == 200, f"Admin login failed: {response.json()}"
     token = response.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def project_owner(client, db_session):
+    """A starter account (no password) that owns test projects."""
+    owner = models.User(email="owner@example.com", hashed_password="x", full_name="Owner", profile_slug="owner")
+    db_session.add(owner)
+    db_session.commit()
+    return owner
+
+
+@pytest.fixture
+def make_project(db_session, project_owner):
+    """Factory for committed projects, owned by ``project_owner`` unless ``owner_id`` is given."""
+    def make(slug, **fields):
+        fields.setdefault("owner_id", project_owner.id)
+        fields.setdefault("title", slug.title())
+        project = models.Project(slug=slug, **fields)
+        db_session.add(project)
+        db_session.commit()
+        return project
+
+    return make
@@ -1,5 +1,7 @@
 """Tests for authentication endpoints."""
+import re
 import pytest
+from sqlalchemy import event
 
 
 class TestRegistration:
@@ -96,3 +98,332 @@ class TestAuthenticatedUser:
         """Test user logout."""
         response = client.post("/api/auth/logout", headers=auth_headers)
         assert response.status_code == 200
+
+
+class TestAuthCache:
+    """Test caching of verified tokens and user lookups."""
+
+    def test_repeated_requests_hit_cache(self, client, auth_headers):
+        """Test the second authenticated request is served from the cache."""
+        from auth_cache import user_cache
+
+        client.get("/api/auth/me", headers=auth_headers)
+        hits = user_cache.hits
+        response = client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 200
+        assert user_cache.hits == hits + 1
+
+    def test_deactivation_invalidates_cache(self, client, auth_headers, admin_headers):
+        """Test a deactivated user is rejected even with a cached token."""
+        me = client.get("/api/auth/me", headers=auth_headers).json()
+
+        response = client.patch(
+            f"/api/admin/users/{me['id']}",
+            json={"is_active": False},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        # Deactivation also revokes the user's access tokens
+        response = client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 401
+
+    def test_profile_update_invalidates_cache(self, client, auth_headers):
+        """Test profile changes are visible on the next request."""
+        client.get("/api/auth/me", headers=auth_headers)
+        client.put("/api/users/profile", json={"full_name": "Cached Name"}, headers=auth_headers)
+
+        response = client.get("/api/auth/me", headers=auth_headers)
+        assert response.json()["full_name"] == "Cached Name"
+
+    def test_logout_invalidates_cache(self, client, auth_headers):
+        """Test logout drops the user's cached tokens."""
+        from auth_cache import user_cache
+
+        client.get("/api/auth/me", headers=auth_headers)
+        assert len(user_cache) > 0
+        client.post("/api/auth/logout", headers=auth_headers)
+        assert len(user_cache) == 0
+
+
+class TestAccessTokenClaims:
+    """Test authorization claims and versioning of access tokens."""
+
+    def test_token_carries_claims(self, client, registered_user):
+        """Test access tokens include admin, active and version claims."""
+        from jose import jwt
+        from config import settings
+
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        payload = jwt.decode(response.json()["access_token"], settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        assert payload["adm"] is False
+        assert payload["act"] is True
+        assert payload["ver"] == 0
+
+    def test_principal_endpoint_without_user_query(self, client, auth_headers, db_session):
+        """Test read-only endpoints authorize from claims without selecting the user row."""
+        user_selects = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and re.search(r"\bFROM users\b", statement):
+                user_selects.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = client.get("/api/projects/my-projects", headers=auth_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == 200
+        assert user_selects == []
+
+    def test_logout_revokes_access_token(self, client, auth_headers):
+        """Test tokens issued before logout are rejected afterwards."""
+        client.post("/api/auth/logout", headers=auth_headers)
+
+        response = client.get("/api/projects/my-projects", headers=auth_headers)
+        assert response.status_code == 401
+        response = client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 401
+
+    def test_admin_principal_required(self, client, auth_headers, admin_headers):
+        """Test admin read endpoints check the admin claim."""
+        assert client.get("/api/admin/users", headers=auth_headers).status_code == 403
+        assert client.get("/api/admin/users", headers=admin_headers).status_code == 200
+
+
+class TestOneTimeTokens:
+    """Test magic codes and password resets backed by one_time_tokens."""
+
+    @pytest.fixture
+    def sent_tokens(self, monkeypatch):
+        """Capture tokens instead of sending emails."""
+        sent = {}
+        monkeypatch.setattr("routers.auth.send_magic_link_email", lambda db, email, code, name=None: sent.update(code=code))
+        monkeypatch.setattr("routers.auth.send_password_reset_email", lambda db, email, token, name=None: sent.update(reset=token))
+        return sent
+
+    def test_magic_code_login_once(self, client, registered_user, sent_tokens):
+        """Test a magic code logs in exactly once."""
+        client.post("/api/auth/magic-link/request", json={"email": registered_user["email"]})
+        code = sent_tokens["code"]
+
+        response = client.post("/api/auth/magic-link/verify", json={"token": f"{code[:3]} {code[3:]}"})
+        assert response.status_code == 200
+        assert "session_token" in response.json()
+
+        response = client.post("/api/auth/magic-link/verify", json={"token": code})
+        assert response.status_code == 400
+
+    def test_new_code_replaces_old(self, client, registered_user, sent_tokens):
+        """Test requesting a new code invalidates the previous one."""
+        client.post("/api/auth/magic-link/request", json={"email": registered_user["email"]})
+        first = sent_tokens["code"]
+        client.post("/api/auth/magic-link/request", json={"email": registered_user["email"]})
+
+        if first != sent_tokens["code"]:
+            response = client.post("/api/auth/magic-link/verify", json={"token": first})
+            assert response.status_code == 400
+
+    def test_password_reset(self, client, registered_user, sent_tokens):
+        """Test a reset token sets a new password and cannot be reused."""
+        client.post("/api/auth/password-reset-request", json={"email": registered_user["email"]})
+        token = sent_tokens["reset"]
+
+        response = client.post("/api/auth/password-reset-confirm", json={"token": token, "new_password": "NewPassword456!"})
+        assert response.status_code == 200
+        response = client.post("/api/auth/password-reset-confirm", json={"token": token, "new_password": "Other789!!"})
+        assert response.status_code == 400
+
+        response = client.post("/api/auth/login", json={"email": registered_user["email"], "password": "NewPassword456!"})
+        assert response.status_code == 200
+
+    def test_purge_expired(self, client, registered_user, db_session):
+        """Test expired tokens are purged in batches."""
+        from datetime import datetime, timedelta
+        import models
+        import one_time_tokens
+
+        user = db_session.query(models.User).first()
+        for i in range(5):
+            db_session.add(models.OneTimeToken(
+                token_hash=one_time_tokens.hash_token("magic_code", str(i)),
+                purpose="magic_code",
+                user_id=user.id,
+                expires_at=datetime.utcnow() - timedelta(minutes=1) if i < 4 else datetime.utcnow() + timedelta(minutes=5)
+            ))
+        db_session.commit()
+
+        assert one_time_tokens.purge_expired(db_session, batch_size=3) == 4
+        assert db_session.query(models.OneTimeToken).count() == 1
+
+
+class TestSessionStore:
+    """Test the per-user session cap and the expired-session sweeper."""
+
+    def test_oldest_sessions_evicted(self, client, registered_user, db_session, monkeypatch):
+        """Test logins beyond the cap evict the oldest sessions."""
+        from config import settings
+        import models
+
+        monkeypatch.setattr(settings, "SESSION_MAX_PER_USER", 2)
+        tokens = []
+        for _ in range(3):
+            response = client.post("/api/auth/login", json={
+                "email": registered_user["email"],
+                "password": registered_user["password"]
+            })
+            tokens.append(response.json()["session_token"])
+
+        remaining = {s.session_token for s in db_session.query(models.Session).all()}
+        assert remaining == set(tokens[1:])
+
+    def test_eviction_published_after_commit(self, client, registered_user, db_session, monkeypatch):
+        """Test evicted sessions are announced only once the delete is committed."""
+        import invalidation
+        import models
+        import session_store
+
+        published = []
+        monkeypatch.setattr(invalidation, "publish", lambda topic, payload: published.append((topic, payload)))
+        client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        session_id, user_id = db_session.query(models.Session.id, models.Session.user_id).one()
+        eviction = (session_store.SESSIONS_TOPIC, {"session_ids": [session_id]})
+
+        assert session_store.evict_excess_sessions(db_session, user_id, keep=0) == 1
+        assert eviction not in published
+        db_session.commit()
+        assert eviction in published
+
+    def test_sweep_expired(self, client, registered_user, db_session):
+        """Test expired sessions are deleted in batches and counted."""
+        from datetime import datetime, timedelta
+        import models
+        import session_store
+
+        user = db_session.query(models.User).first()
+        for i in range(5):
+            db_session.add(models.Session(
+                user_id=user.id,
+                session_token=f"session-{i}",
+                expires_at=datetime.utcnow() - timedelta(minutes=10) if i < 4 else datetime.utcnow() + timedelta(hours=1)
+            ))
+        db_session.commit()
+
+        assert session_store.sweep_expired(db_session, batch_size=3) == 4
+        assert db_session.query(models.Session).count() == 1
+        stats = session_store.stats()
+        assert stats["last_deleted"] == 4
+        assert stats["table_rows"] == 1
+
+
+class TestSessionRefresh:
+    """Test the cached /api/auth/refresh path."""
+
+    @pytest.fixture
+    def session_token(self, client, registered_user):
+        """Log in and return the session token."""
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        return response.json()["session_token"]
+
+    def test_refresh_uses_cache(self, client, session_token):
+        """Test a second refresh is served from the session cache."""
+        import session_store
+
+        response = client.post("/api/auth/refresh", json={"session_token": session_token})
+        assert response.status_code == 200
+        session_store.issued_tokens.clear()
+        hits = session_store.session_cache.hits
+
+        response = client.post("/api/auth/refresh", json={"session_token": session_token})
+        assert response.status_code == 200
+        assert session_store.session_cache.hits > hits
+
+    def test_concurrent_refreshes_share_token(self, client, session_token):
+        """Test refreshes within the coalescing window get the same token."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def refresh(_):
+            return client.post("/api/auth/refresh", json={"session_token": session_token}).json()["access_token"]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            tokens = set(pool.map(refresh, range(8)))
+        assert len(tokens) == 1
+
+    def test_logout_invalidates_session_cache(self, client, session_token):
+        """Test a cached session stops working after logout."""
+        response = client.post("/api/auth/refresh", json={"session_token": session_token})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        client.post("/api/auth/logout", headers=headers)
+        response = client.post("/api/auth/refresh", json={"session_token": session_token})
+        assert response.status_code == 401
+
+    def test_sliding_expiry_written_behind(self, client, session_token, db_session):
+        """Test refreshes extend the session only when touches are flushed."""
+        from datetime import datetime, timedelta
+        import models
+        import session_store
+
+        session = db_session.query(models.Session).filter(models.Session.session_token == session_token).first()
+        session.expires_at = datetime.utcnow() + timedelta(minutes=5)
+        db_session.commit()
+
+        client.post("/api/auth/refresh", json={"session_token": session_token})
+        db_session.refresh(session)
+        assert session.expires_at < datetime.utcnow() + timedelta(minutes=10)
+
+        assert session_store.flush_touches(db_session) == 1
+        db_session.refresh(session)
+        assert session.expires_at > datetime.utcnow() + timedelta(hours=1)
+
+    def test_fixed_expiry_with_aware_datetimes(self, client, session_token, db_session, monkeypatch):
+        """Test refreshes without sliding expiration when the driver returns aware datetimes."""
+        from datetime import timezone
+        from types import SimpleNamespace
+        from config import settings
+        import models
+        import session_store
+
+        monkeypatch.setattr(settings, "SESSION_SLIDING_EXPIRATION", False)
+        real_query = db_session.query
+
+        class AwareExpiry:
+            # Postgres returns timestamptz columns aware; SQLite cannot
+            def __init__(self, query):
+                self.query = query
+
+            def join(self, *args, **kwargs):
+                return AwareExpiry(self.query.join(*args, **kwargs))
+
+            def filter(self, *args):
+                return AwareExpiry(self.query.filter(*args))
+
+            def first(self):
+                row = self.query.first()
+                if row is None:
+                    return None
+                return SimpleNamespace(
+                    id=row.id, User=row.User, expires_at=row.expires_at.replace(tzinfo=timezone.utc)
+                )
+
+        def query(*entities):
+            if entities and entities[0] is models.Session.id:
+                return AwareExpiry(real_query(*entities))
+            return real_query(*entities)
+
+        monkeypatch.setattr(db_session, "query", query)
+        session_store.clear()
+        # A miss loads the row, a hit compares the cached expiry
+        for _ in range(2):
+            assert session_store.validate_session(db_session, session_token) is not None
+        assert session_store.session_cache.get(session_token)["expires_at"].tzinfo is None
@@ -0,0 +1,151 @@
+"""Tests for admin bulk email notifications."""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from config import settings
+import bulk_email
+import email_outbox
+import models
+
+
+class FakeTransport:
+    """Records batch calls; rejects recipients listed in ``reject``."""
+
+    def __init__(self, reject=()):
+        self.batches = []
+        self.reject = set(reject)
+
+    def send_batch(self, messages):
+        self.batches.append(messages)
+        return [RuntimeError("rejected") if m["to"][0] in self.reject else None for m in messages]
+
+
+@pytest.fixture
+def users(db_session):
+    """Five active users, the first two owning a project."""
+    created = []
+    for i in range(5):
+        user = models.User(email=f"user{i}@example.com", hashed_password="x", full_name=f"User {i}", profile_slug=f"user-{i}", is_active=True)
+        db_session.add(user)
+        created.append(user)
+    db_session.flush()
+    for i, user in enumerate(created[:2]):
+        db_session.add(models.Project(owner_id=user.id, title=f"P{i}", slug=f"p{i}", status="financing" if i == 0 else "draft"))
+    db_session.commit()
+    return created
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    fake = FakeTransport()
+    monkeypatch.setattr(bulk_email, "get_transport", lambda: fake)
+    monkeypatch.setattr(settings, "EMAIL_BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "EMAIL_BULK_RATE_PER_SECOND", 0)
+    return fake
+
+
+class TestBulkEmailApi:
+    """Test the admin endpoints."""
+
+    def test_create_job(self, client, admin_headers, users):
+        """Test a job is queued with its audience size."""
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "starters", "subject": "Neuigkeiten", "message": "Hallo\nWelt"
+        })
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+        assert response.json()["total_recipients"] == 2
+
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "starters", "project_status": "financing", "subject": "S", "message": "M"
+        })
+        assert response.json()["total_recipients"] == 1
+
+    def test_backers_audience(self, client, admin_headers, users, db_session):
+        """Test backers are users who pledged, optionally by project status."""
+        project = db_session.query(models.Project).filter(models.Project.slug == "p0").first()
+        for user in users[2:4]:
+            db_session.add(models.Pledge(project_id=project.id, user_id=user.id, amount=10))
+        db_session.commit()
+
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "backers", "subject": "Danke", "message": "M"
+        })
+        assert response.json()["total_recipients"] == 2
+
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "backers", "project_status": "ended_success", "subject": "Danke", "message": "M"
+        })
+        assert response.json()["total_recipients"] == 0
+
+    def test_invalid_audience(self, client, admin_headers):
+        """Test unknown audiences are rejected."""
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "everyone", "subject": "S", "message": "M"
+        })
+        assert response.status_code == 400
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test non-admins cannot send bulk emails."""
+        response = client.post("/api/admin/bulk-emails", headers=auth_headers, json={
+            "audience": "all_users", "subject": "S", "message": "M"
+        })
+        assert response.status_code == 403
+
+    def test_demoted_admin_cannot_send(self, client, admin_headers, users, db_session):
+        """Test the admin flag is read from the user row, not the token's claims."""
+        db_session.execute(update(models.User).where(models.User.email == "admin@test.com").values(is_admin=False))
+        db_session.commit()
+        response = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "all_users", "subject": "S", "message": "M"
+        })
+        assert response.status_code == 403
+        assert db_session.query(models.BulkEmailJob).count() == 0
+
+
+class TestBulkEmailWorker:
+    """Test chunked sending, failures and resuming."""
+
+    def test_sends_in_chunks(self, client, admin_headers, users, transport, db_session):
+        """Test recipients are streamed in chunks and progress is recorded."""
+        job_id = client.post("/api/admin/bulk-emails", headers=admin_headers, json={
+            "audience": "all_users", "subject": "Update <1>", "message": "Zeile 1\nZeile 2"
+        }).json()["id"]
+
+        assert bulk_email.claim_next_job(db_session) == job_id
+        assert bulk_email.claim_next_job(db_session) is None
+        assert bulk_email.run_job(db_session, job_id) == 6
+
+        assert [len(batch) for batch in transport.batches] == [2, 2, 2]
+        html = transport.batches[0][1]["html"]
+        assert "Update &lt;1&gt;" in html
+        assert "Zeile 1<br>" in html
+        assert "Hallo User 0," in html
+
+        response = client.get(f"/api/admin/bulk-emails/{job_id}", headers=admin_headers)
+        assert response.json()["status"] == "completed"
+        assert response.json()["sent_count"] == 6
+
+    def test_rejected_messages_go_to_outbox(self, client, admin_headers, users, transport, db_session):
+        """Test provider rejections are handed to the outbox for retries."""
+        transport.reject = {"user3@example.com"}
+        job = bulk_email.create_job(db_session, None, "all_users", "S", "M")
+        bulk_email.run_job(db_session, bulk_email.claim_next_job(db_session))
+
+        db_session.refresh(job)
+        assert job.failed_count == 1
+        queued = db_session.query(models.EmailOutbox).filter(models.EmailOutbox.to_email == "user3@example.com").one()
+        assert queued.status == email_outbox.STATUS_PENDING
+
+    def test_stale_job_resumes_from_cursor(self, client, users, transport, db_session):
+        """Test a job whose worker died continues after its last recipient."""
+        job = bulk_email.create_job(db_session, None, "all_users", "S", "M")
+        job.status = bulk_email.STATUS_RUNNING
+        job.last_user_id = users[2].id
+        job.heartbeat_at = datetime.utcnow() - timedelta(hours=1)
+        db_session.commit()
+
+        assert bulk_email.claim_next_job(db_session) == job.id
+        bulk_email.run_job(db_session, job.id)
+        sent_to = [m["to"][0] for batch in transport.batches for m in batch]
+        assert sent_to == ["user3@example.com", "user4@example.com"]
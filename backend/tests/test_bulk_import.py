@@ -0,0 +1,189 @@
+"""Tests for the admin bulk import of users and projects."""
+import io
+import json
+from sqlalchemy import update
+import bulk_import
+import models
+from config import settings
+
+
+def _ndjson(*rows) -> bytes:
+    return "".join((row if isinstance(row, str) else json.dumps(row)) + "\n" for row in rows).encode("utf-8")
+
+
+def _upload(client, headers, kind, filename, content, **params):
+    return client.post(
+        f"/api/admin/import/{kind}", params=params, headers=headers,
+        files={"file": (filename, content, "application/octet-stream")}
+    )
+
+
+class TestUserImport:
+    """Test user rows, per-row errors and derived profile slugs."""
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test regular users cannot import."""
+        response = _upload(client, auth_headers, "users", "users.csv", b"email,full_name\n")
+        assert response.status_code == 403
+
+    def test_demoted_admin_cannot_import(self, client, admin_headers, db_session):
+        """Test the admin flag is read from the user row, not the token's claims."""
+        db_session.execute(update(models.User).where(models.User.email == "admin@test.com").values(is_admin=False))
+        db_session.commit()
+        response = _upload(client, admin_headers, "users", "users.csv", b"email,full_name\nx@example.com,X\n")
+        assert response.status_code == 403
+
+    def test_csv_with_row_errors(self, client, admin_headers, db_session):
+        """Test valid rows are created and bad rows reported by row number."""
+        content = (
+            "email,full_name,password\n"
+            "anna@example.com,Anna Müller,geheim123\n"
+            "no-email,Bernd,\n"
+            "admin@test.com,Taken Already,\n"
+            "anna@example.com,Anna Again,\n"
+            "carl@example.com,Anna Müller,\n"
+        ).encode("utf-8")
+        response = _upload(client, admin_headers, "users", "users.csv", content)
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["created"], body["failed"]) == (2, 3)
+        assert [error["row"] for error in body["errors"]] == [2, 3, 4]
+        assert body["errors"][1]["error"] == "Email already registered"
+
+        slugs = dict(db_session.query(models.User.email, models.User.profile_slug).filter(
+            models.User.email.in_(["anna@example.com", "carl@example.com"])
+        ).all())
+        assert slugs == {"anna@example.com": "anna-mueller", "carl@example.com": "anna-mueller-1"}
+
+    def test_imported_password_logs_in(self, client, admin_headers):
+        """Test imported users can log in with their given password."""
+        content = _ndjson({"email": "dora@example.com", "full_name": "Dora", "password": "geheim123"})
+        assert _upload(client, admin_headers, "users", "users.ndjson", content).json()["created"] == 1
+
+        response = client.post("/api/auth/login", json={"email": "dora@example.com", "password": "geheim123"})
+        assert response.status_code == 200
+
+    def test_ndjson_bad_lines(self, client, admin_headers):
+        """Test unreadable lines and schema errors do not stop the import."""
+        content = _ndjson(
+            {"email": "eva@example.com", "full_name": "Eva"},
+            "{not json",
+            "[1, 2]",
+            {"email": "fritz@example.com", "full_name": "F"},
+            {"email": "gina@example.com", "full_name": "Gina"},
+        )
+        body = _upload(client, admin_headers, "users", "users.txt", content, format="ndjson").json()
+        assert body["created"] == 2
+        assert [error["row"] for error in body["errors"]] == [2, 3, 4]
+        assert body["errors"][0]["error"].startswith("Invalid JSON")
+        assert body["errors"][2]["error"].startswith("full_name:")
+
+    def test_unreadable_input_is_reported(self, client, admin_headers):
+        """Test invalid UTF-8 and broken CSV are row errors, not server errors."""
+        content = _ndjson({"email": "hans@example.com", "full_name": "Hans"}) + b'{"full_name": "\xff"}\n'
+        body = _upload(client, admin_headers, "users", "users.ndjson", content).json()
+        assert body["created"] == 1
+        assert body["errors"][0]["row"] == 2
+        assert body["errors"][0]["error"].startswith("Invalid UTF-8")
+
+        content = b"email,full_name\nina@example.com,Ina\nkai@example.com,K\xe4i\nleo@example.com,Leo\n"
+        response = _upload(client, admin_headers, "users", "users.csv", content)
+        assert response.status_code == 200
+        assert response.json()["created"] == 1
+        assert response.json()["errors"][0]["row"] == 2
+
+        # Longer than csv.field_size_limit()
+        content = b"email,full_name\nmia@example.com," + b"M" * 200_000 + b"\n"
+        response = _upload(client, admin_headers, "users", "users.csv", content)
+        assert response.status_code == 200
+        assert response.json()["errors"][0]["error"].startswith("Unreadable CSV")
+
+    def test_chunks_across_the_file(self, client, db_session, monkeypatch):
+        """Test duplicates and slugs are resolved across chunk boundaries."""
+        monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+        content = _ndjson(*(
+            {"email": f"user{n % 4}@example.com", "full_name": "Same Name"} for n in range(7)
+        ))
+        report = bulk_import.import_users(db_session, io.BytesIO(content), "ndjson")
+        assert (report["created"], report["failed"]) == (4, 3)
+        slugs = sorted(row[0] for row in db_session.query(models.User.profile_slug).filter(
+            models.User.email.like("user%@example.com")
+        ))
+        assert slugs == ["same-name", "same-name-1", "same-name-2", "same-name-3"]
+
+
+class TestProjectImport:
+    """Test project rows, slugs, starters and derived data."""
+
+    def test_slugs_and_owners(self, client, admin_headers, db_session, project_owner, make_project):
+        """Test explicit slugs are checked and derived slugs avoid them."""
+        make_project("alt")
+        content = _ndjson(
+            {"owner_email": "owner@example.com", "title": "Gemeinschaftsgarten"},
+            {"owner_email": "owner@example.com", "title": "Anderer Garten", "slug": "gemeinschaftsgarten"},
+            {"owner_email": "owner@example.com", "title": "Alt", "slug": "alt"},
+            {"owner_email": "nobody@example.com", "title": "Ohne Starter"},
+            {"owner_email": "owner@example.com", "title": "Gemeinschaftsgarten"},
+            {"owner_email": "owner@example.com", "title": "Zweiter", "slug": "Gemeinschaftsgarten"},
+        )
+        body = _upload(client, admin_headers, "projects", "projects.ndjson", content).json()
+        assert body["created"] == 3
+        assert [(error["row"], error["error"]) for error in body["errors"]] == [
+            (3, "Slug 'alt' is already taken"),
+            (4, "Unknown owner_email 'nobody@example.com'"),
+            (6, "Slug 'gemeinschaftsgarten' is already taken"),
+        ]
+
+        titles = dict(db_session.query(models.Project.slug, models.Project.title).filter(
+            models.Project.slug.like("gemeinschaftsgarten%")
+        ).all())
+        assert titles == {
+            "gemeinschaftsgarten": "Anderer Garten",
+            "gemeinschaftsgarten-1": "Gemeinschaftsgarten",
+            "gemeinschaftsgarten-2": "Gemeinschaftsgarten",
+        }
+        db_session.refresh(project_owner)
+        assert project_owner.is_starter is True
+
+    def test_imported_projects_are_listed_and_searchable(self, client, admin_headers, project_owner):
+        """Test triggers and change events cover rows written by the import."""
+        # Warm the listing caches before the import
+        assert client.get("/api/projects/near-goal").json() == []
+        assert client.get("/api/projects/typeahead", params={"q": "fahr"}).json() == []
+
+        content = (
+            "owner_email,title,short_description,funding_goal,funding_current,status\n"
+            "owner@example.com,Fahrrad Werkstatt,Reparaturen für alle,1000,900,financing\n"
+            "owner@example.com,Buchladen,Bücher im Kiez,1000,100,financing\n"
+        ).encode("utf-8")
+        assert _upload(client, admin_headers, "projects", "projects.csv", content).json()["created"] == 2
+
+        near_goal = client.get("/api/projects/near-goal").json()
+        assert [project["slug"] for project in near_goal] == ["fahrrad-werkstatt"]
+        search = client.get("/api/projects/search", params={"q": "bücher"}).json()
+        assert [project["slug"] for project in search] == ["buchladen"]
+        suggestions = client.get("/api/projects/typeahead", params={"q": "fahr"}).json()
+        assert "Fahrrad Werkstatt" in [suggestion["label"] for suggestion in suggestions]
+
+    def test_conflict_falls_back_to_single_rows(self, db_session, make_project, monkeypatch):
+        """Test a chunk that hits a unique constraint is retried row by row."""
+        real_query = db_session.query
+
+        def query(*entities):
+            # Hide existing slugs from the checks, as if a concurrent request took one meanwhile
+            if entities == (models.Project.slug,):
+                return real_query(*entities).filter(False)
+            return real_query(*entities)
+
+        make_project("taken")
+        monkeypatch.setattr(db_session, "query", query)
+        content = _ndjson(
+            {"owner_email": "owner@example.com", "title": "Eins", "slug": "eins"},
+            {"owner_email": "owner@example.com", "title": "Zwei", "slug": "taken"},
+            {"owner_email": "owner@example.com", "title": "Drei", "slug": "drei"},
+        )
+        report = bulk_import.import_projects(db_session, io.BytesIO(content), "ndjson")
+        assert report["created"] == 2
+        assert report["errors"] == [{"row": 2, "error": "Slug was taken during the import"}]
+        slugs = {row[0] for row in real_query(models.Project.slug)}
+        assert slugs == {"taken", "eins", "drei"}
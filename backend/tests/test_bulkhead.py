@@ -0,0 +1,87 @@
+"""Tests for executor bulkheads."""
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from bulkhead import Bulkhead
+
+
+class TestBulkhead:
+    """Test bulkhead admission and load shedding."""
+
+    async def test_run_returns_result(self):
+        """Test work is executed in the bulkhead pool."""
+        bulkhead = Bulkhead("test-result", max_workers=1, max_queue=0, queue_timeout=1)
+        result = await bulkhead.run(lambda a, b: a + b, 2, 3)
+        assert result == 5
+        assert bulkhead.stats()["completed"] == 1
+
+    async def test_sheds_load_when_saturated(self):
+        """Test requests beyond workers + queue are rejected with 503."""
+        bulkhead = Bulkhead("test-shed", max_workers=1, max_queue=1, queue_timeout=5)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(bulkhead.run(release.wait))
+        second = asyncio.ensure_future(bulkhead.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await bulkhead.run(release.wait)
+        assert exc_info.value.status_code == 503
+
+        stats = bulkhead.stats()
+        assert stats["active"] == 1
+        assert stats["queue_depth"] == 1
+        assert stats["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert bulkhead.stats()["completed"] == 2
+
+
+    async def test_queued_work_times_out(self):
+        """Test queued callers get a 503 after the queue timeout, not after the slow call."""
+        bulkhead = Bulkhead("test-timeout", max_workers=1, max_queue=1, queue_timeout=0.1)
+        release = threading.Event()
+        ran = threading.Event()
+
+        first = asyncio.ensure_future(bulkhead.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await asyncio.wait_for(bulkhead.run(ran.set), timeout=2)
+        assert exc_info.value.status_code == 503
+        assert not release.is_set()
+
+        stats = bulkhead.stats()
+        assert (stats["timed_out"], stats["queue_depth"], stats["active"]) == (1, 0, 1)
+
+        release.set()
+        await first
+        await asyncio.sleep(0.05)
+        assert not ran.is_set()
+        assert bulkhead.stats()["completed"] == 1
+
+
+class TestMetricsEndpoint:
+    """Test the metrics endpoint."""
+
+    def test_metrics_include_pools(self, client, admin_headers):
+        """Test AI and default pool metrics are exposed."""
+        response = client.get("/metrics", headers=admin_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert "queue_depth" in data["bulkhead_ai"]
+        assert "wait_seconds_avg" in data["bulkhead_ai"]
+        assert "threadpool_default" in data
+
+    def test_metrics_require_admin_or_token(self, client, auth_headers, monkeypatch):
+        """Test anonymous and regular users are refused, scrapers with the token are not."""
+        from config import settings
+
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers=auth_headers).status_code == 403
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+        assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
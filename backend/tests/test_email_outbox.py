@@ -0,0 +1,176 @@
+"""Tests for the email outbox and its delivery worker."""
+import json
+import socketserver
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from config import settings
+import email_outbox
+import email_transport
+import models
+
+
+@pytest.fixture
+def http_stand_in(monkeypatch):
+    """Local HTTP mail stand-in; set ``fail`` to make it answer 500."""
+    received = []
+    state = {"fail": False}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if state["fail"]:
+                self.send_response(500)
+            else:
+                received.append(json.loads(body))
+                self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(settings, "EMAIL_TRANSPORT", "http")
+    monkeypatch.setattr(settings, "EMAIL_HTTP_URL", f"http://127.0.0.1:{server.server_port}/emails")
+    yield received, state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def smtp_stand_in(monkeypatch):
+    """Minimal local SMTP server collecting message bodies."""
+    received = []
+
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write(f"{line}\r\n".encode())
+
+        def handle(self):
+            self.reply("220 localhost")
+            while True:
+                line = self.rfile.readline().decode().strip()
+                if not line:
+                    return
+                command = line.split(" ")[0].upper()
+                if command in ("EHLO", "HELO"):
+                    self.reply("250 localhost")
+                elif command == "DATA":
+                    self.reply("354 go ahead")
+                    lines = []
+                    while (data := self.rfile.readline().decode()) != ".\r\n":
+                        lines.append(data)
+                    received.append("".join(lines))
+                    self.reply("250 queued")
+                elif command == "QUIT":
+                    self.reply("221 bye")
+                    return
+                else:
+                    self.reply("250 ok")
+
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(settings, "EMAIL_TRANSPORT", "smtp")
+    monkeypatch.setattr(settings, "EMAIL_SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMAIL_SMTP_PORT", server.server_address[1])
+    yield received
+    server.shutdown()
+    server.server_close()
+
+
+class TestEnqueue:
+    """Test handlers only enqueue emails."""
+
+    def test_register_enqueues_welcome_email(self, client, registered_user, db_session):
+        """Test registration stores the welcome email in the outbox."""
+        message = db_session.query(models.EmailOutbox).one()
+        assert message.to_email == registered_user["email"]
+        assert message.status == email_outbox.STATUS_PENDING
+        assert message.attempts == 0
+
+
+class TestDelivery:
+    """Test the delivery worker against local stand-ins."""
+
+    def test_deliver_over_http(self, client, registered_user, db_session, http_stand_in):
+        """Test pending messages are delivered and marked sent."""
+        received, _ = http_stand_in
+        client.post("/api/auth/password-reset-request", json={"email": registered_user["email"]})
+
+        assert email_outbox.deliver_pending(db_session, batch_size=1) == 2
+        assert {m["subject"] for m in received} == {"Willkommen bei der Nutzerverwaltung", "Passwort zurücksetzen"}
+        assert all(m.status == email_outbox.STATUS_SENT for m in db_session.query(models.EmailOutbox).all())
+        assert email_outbox.deliver_pending(db_session) == 0
+
+    def test_deliver_over_smtp(self, client, registered_user, db_session, smtp_stand_in):
+        """Test delivery through an SMTP server."""
+        assert email_outbox.deliver_pending(db_session) == 1
+        assert len(smtp_stand_in) == 1
+        assert "Subject: Willkommen bei der Nutzerverwaltung" in smtp_stand_in[0]
+
+    def test_transport_must_implement_send(self):
+        """Test an incomplete transport fails when created, not on its first send."""
+        class Incomplete(email_transport.Transport):
+            pass
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_retry_then_dead_letter(self, client, registered_user, db_session, http_stand_in, monkeypatch):
+        """Test failures back off and are dead-lettered after the last attempt."""
+        _, state = http_stand_in
+        state["fail"] = True
+        monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", 2)
+
+        assert email_outbox.deliver_pending(db_session) == 0
+        message = db_session.query(models.EmailOutbox).one()
+        db_session.refresh(message)
+        assert message.status == email_outbox.STATUS_PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > datetime.utcnow()
+        assert message.last_error
+
+        # Backoff not over yet: nothing is claimed
+        assert email_outbox.deliver_pending(db_session) == 0
+        db_session.refresh(message)
+        assert message.attempts == 1
+
+        message.next_attempt_at = datetime.utcnow()
+        db_session.commit()
+        email_outbox.deliver_pending(db_session)
+        db_session.refresh(message)
+        assert message.status == email_outbox.STATUS_DEAD
+        assert message.attempts == 2
+
+
+class TestRetention:
+    """Test sent bodies are blanked and old rows purged."""
+
+    def test_sent_body_is_blanked(self, client, registered_user, db_session, http_stand_in):
+        """Test a delivered message no longer stores its (secret-bearing) body."""
+        client.post("/api/auth/password-reset-request", json={"email": registered_user["email"]})
+        email_outbox.deliver_pending(db_session)
+
+        assert {m.html for m in db_session.query(models.EmailOutbox)} == {""}
+
+    def test_purge_by_status_and_age(self, client, db_session, monkeypatch):
+        """Test sent and dead rows are deleted after their retention, pending rows never."""
+        monkeypatch.setattr(settings, "EMAIL_SENT_RETENTION_HOURS", 1)
+        monkeypatch.setattr(settings, "EMAIL_DEAD_RETENTION_DAYS", 1)
+        now = datetime.utcnow()
+        for status, age in (
+            ("sent", timedelta(hours=2)), ("sent", timedelta(minutes=5)),
+            ("dead", timedelta(days=2)), ("dead", timedelta(hours=2)),
+            ("pending", timedelta(days=30)),
+        ):
+            db_session.add(models.EmailOutbox(
+                to_email="a@example.com", subject=f"{status} {age}", html="", status=status,
+                attempts=1, next_attempt_at=now - age
+            ))
+        db_session.commit()
+
+        assert email_outbox.purge(db_session, batch_size=1) == 2
+        remaining = sorted((m.status, m.subject) for m in db_session.query(models.EmailOutbox))
+        assert [status for status, _ in remaining] == ["dead", "pending", "sent"]
@@ -0,0 +1,52 @@
+"""Tests for the precompiled email templates."""
+import pytest
+from config import settings
+from email_templates import registry, TemplateRegistry
+import email_service
+
+
+class TestTemplates:
+    """Test rendering, escaping and locale fallback."""
+
+    def test_render_fills_slots(self):
+        """Test slots are filled and the shared layout is included."""
+        subject, html = email_service.password_reset_email("abc123", "Anna")
+        assert subject == "Passwort zurücksetzen"
+        assert f"{settings.FRONTEND_URL}/reset-password?token=abc123" in html
+        assert "Hallo Anna," in html
+        assert ".button {" in html
+        assert "Bitte antworte nicht darauf" in html
+        assert "{" not in html.split("</style>")[1]
+
+    def test_values_are_escaped(self):
+        """Test user-controlled values cannot inject HTML."""
+        _, html = email_service.welcome_email("<script>x</script>")
+        assert "<script>" not in html
+        assert "&lt;script&gt;" in html
+
+    def test_magic_code_subject(self):
+        """Test subjects have slots too."""
+        subject, html = email_service.magic_link_email("123456")
+        assert subject == "Dein Login-Code: 123 456"
+        assert "Hallo," in html
+
+    def test_locale_variant_and_fallback(self):
+        """Test a locale variant is used and missing ones fall back."""
+        subject, html = registry.render("welcome", "en", name="", login_url="/login")
+        assert subject == "Welcome to Startnext"
+        assert 'lang="en"' in html
+
+        subject, _ = registry.render("test_simple", "en", name="")
+        assert subject == "Test-E-Mail von der Nutzerverwaltung"
+
+    def test_compiled_once(self):
+        """Test templates are compiled once and reused."""
+        local = TemplateRegistry()
+        local.register("t", "de", subject="Hi {x}", body="<p>{x}</p>")
+        local.compile()
+        compiled = local.get("t")
+        assert local.get("t") is compiled
+        assert compiled[1].slots == {"x"}
+
+        with pytest.raises(KeyError):
+            local.get("missing")
@@ -0,0 +1,92 @@
+"""Tests for the streaming admin exports."""
+import csv
+import gzip
+import io
+import json
+import pytest
+import export
+
+
+@pytest.fixture
+def projects(make_project):
+    for n in range(30):
+        make_project(
+            f"projekt-{n}", funding_goal=1000,
+            status="financing" if n % 3 else "draft", project_type="fundraising" if n % 2 else "crowdfunding"
+        )
+
+
+def _get(client, path, headers, **params):
+    # Identity: keep the client from asking for (and transparently undoing) gzip
+    return client.get(path, params=params, headers={**headers, "Accept-Encoding": "identity"})
+
+
+class TestAdminExport:
+    """Test NDJSON and CSV exports with filters and compression."""
+
+    def test_requires_admin(self, client, auth_headers):
+        """Test regular users cannot export."""
+        assert client.get("/api/admin/export/users", headers=auth_headers).status_code == 403
+
+    def test_projects_ndjson_with_filters(self, client, admin_headers, projects):
+        """Test filtered projects stream as one JSON object per line in id order."""
+        response = _get(client, "/api/admin/export/projects", admin_headers,
+                        status="financing", project_type="fundraising")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in response.headers["content-disposition"]
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 10
+        assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+        assert {(row["status"], row["project_type"]) for row in rows} == {("financing", "fundraising")}
+        assert rows[0]["funding_goal"] == 1000.0
+        assert "hashed_password" not in rows[0] and "search_vector" not in rows[0]
+
+    def test_users_csv(self, client, admin_headers, projects):
+        """Test users export as CSV with a header row and no password hashes."""
+        response = _get(client, "/api/admin/export/users", admin_headers, format="csv", is_active=True)
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert {row["email"] for row in rows} >= {"owner@example.com", "admin@test.com"}
+        assert "hashed_password" not in rows[0]
+        assert rows[0]["id"] and rows[0]["created_at"]
+
+    def test_gzip_on_the_fly(self, client, admin_headers, projects, monkeypatch):
+        """Test a gzip-accepting client gets the chunked stream compressed."""
+        monkeypatch.setattr(export, "CHUNK_BYTES", 512)
+        with client.stream("GET", "/api/admin/export/projects", headers={
+            **admin_headers, "Accept-Encoding": "gzip"
+        }) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            raw = b"".join(response.iter_raw())
+
+        lines = gzip.decompress(raw).decode("utf-8").splitlines()
+        assert len(lines) == 30
+        assert json.loads(lines[-1])["slug"] == "projekt-29"
+
+    def test_rows_are_streamed(self, client, admin_headers, projects, monkeypatch):
+        """Test rows are read through yield_per and sent before the last row is read."""
+        monkeypatch.setattr(export, "YIELD_PER", 7)
+        monkeypatch.setattr(export, "CHUNK_BYTES", 1)
+        state = {"read": 0, "read_at_first_chunk": None, "yield_per": None}
+        real_encode = export._encode
+
+        def counted(rows):
+            for row in rows:
+                state["read"] += 1
+                yield row
+
+        def encode(rows, names, fmt):
+            state["yield_per"] = rows.context.execution_options.get("yield_per")
+            for chunk in real_encode(counted(rows), names, fmt):
+                if state["read_at_first_chunk"] is None:
+                    state["read_at_first_chunk"] = state["read"]
+                yield chunk
+
+        monkeypatch.setattr(export, "_encode", encode)
+        response = _get(client, "/api/admin/export/projects", admin_headers)
+        assert len(response.text.splitlines()) == 30
+        assert state["yield_per"] == 7
+        assert state["read_at_first_chunk"] == 1
@@ -0,0 +1,109 @@
+"""Tests for asymmetric JWT signing and the JWKS endpoint."""
+from datetime import datetime, timedelta
+import pytest
+from jose import jwt
+from config import settings
+import jwt_keys
+import models
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def rs256(client, monkeypatch):
+    """Switch token signing to RS256 with a key ring on the test database."""
+    monkeypatch.setattr(settings, "ALGORITHM", "RS256")
+    monkeypatch.setattr(settings, "JWT_KEY_SIZE", 1024)
+    ring = jwt_keys.KeyRing(TestingSessionLocal)
+    monkeypatch.setattr(jwt_keys, "key_ring", ring)
+    ring.ensure_current_key()
+    return ring
+
+
+class TestKeyRing:
+    """Test key ring signing and rotation."""
+
+    def test_token_has_kid_and_verifies(self, client, rs256, registered_user):
+        """Test RS256 tokens carry a kid and authenticate requests."""
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        token = response.json()["access_token"]
+        header = jwt.get_unverified_header(token)
+        assert header["alg"] == "RS256"
+        assert header["kid"] == rs256.signing_key().kid
+
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+
+    def test_rotation_prepublishes_new_key(self, client, rs256):
+        """Test a rotated key is published before it signs."""
+        old_kid = rs256.signing_key().kid
+
+        db = TestingSessionLocal()
+        new_key = rs256.rotate(db)
+        db.commit()
+        new_kid = new_key.kid
+        db.close()
+        rs256.ensure_current_key()
+
+        kids = {key["kid"] for key in rs256.jwks()["keys"]}
+        assert kids == {old_kid, new_kid}
+        assert rs256.signing_key().kid == old_kid
+
+    def test_activated_key_signs(self, client, rs256):
+        """Test the newest key signs once active and the old one stays verifiable."""
+        old_kid = rs256.signing_key().kid
+
+        db = TestingSessionLocal()
+        db.query(models.SigningKey).update({models.SigningKey.activates_at: datetime.utcnow() - timedelta(days=31)})
+        new_key = rs256.rotate(db, activates_at=datetime.utcnow() - timedelta(seconds=1))
+        db.commit()
+        new_kid = new_key.kid
+        db.close()
+        rs256.ensure_current_key()
+
+        assert rs256.signing_key().kid == new_kid
+        assert rs256.verification_key(old_kid) is not None
+
+    def test_legacy_hs256_token_accepted(self, client, rs256, registered_user, monkeypatch):
+        """Test tokens issued before the switch still work during migration."""
+        me = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        }).json()["user"]
+        legacy = jwt.encode(
+            {"sub": str(me["id"]), "exp": datetime.utcnow() + timedelta(minutes=5)},
+            settings.SECRET_KEY,
+            algorithm="HS256"
+        )
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+        assert response.status_code == 200
+
+        monkeypatch.setattr(settings, "JWT_ACCEPT_LEGACY_HS256", False)
+        import auth_cache
+        auth_cache.clear()
+        response = client.get("/api/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+        assert response.status_code == 401
+
+
+class TestJWKS:
+    """Test the JWKS endpoint."""
+
+    def test_jwks_empty_for_hs256(self, client):
+        """Test no keys are published for symmetric signing."""
+        response = client.get("/.well-known/jwks.json")
+        assert response.status_code == 200
+        assert response.json() == {"keys": []}
+
+    def test_jwks_verifies_token(self, client, rs256):
+        """Test a token can be verified with the published key alone."""
+        from security import create_access_token
+
+        token = create_access_token({"sub": "42"})
+        jwks = client.get("/.well-known/jwks.json").json()
+        kid = jwt.get_unverified_header(token)["kid"]
+        key = next(k for k in jwks["keys"] if k["kid"] == kid)
+
+        payload = jwt.decode(token, key, algorithms=["RS256"])
+        assert payload["sub"] == "42"
@@ -0,0 +1,89 @@
+"""Tests for the scheduled project lifecycle."""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import text
+import lifecycle
+import models
+import pledge_queue
+import pledges
+
+
+def _outbox(db_session):
+    return [(m.to_email, m.subject) for m in db_session.query(models.EmailOutbox).order_by(models.EmailOutbox.id)]
+
+
+class TestLifecycle:
+    """Test due transitions, notices and listing invalidation."""
+
+    def test_verified_projects_start_on_their_date(self, db_session, make_project):
+        """Test only verified projects whose start date has come start financing."""
+        now = datetime.utcnow()
+        due = make_project("due", status="verified", start_date=now - timedelta(minutes=5))
+        later = make_project("later", status="verified", start_date=now + timedelta(days=1))
+        draft = make_project("draft", status="draft", start_date=now - timedelta(days=1))
+
+        assert lifecycle.run(db_session, now) == {"started": 1, "ended": 0}
+        for project in (due, later, draft):
+            db_session.refresh(project)
+        assert (due.status, later.status, draft.status) == ("financing", "verified", "draft")
+        assert due.financing_start is not None
+        assert _outbox(db_session) == [("owner@example.com", "Deine Finanzierungsphase hat begonnen: Due")]
+
+    def test_ended_campaigns_count_unfolded_pledges(self, db_session, make_project):
+        """Test the outcome includes shard and queued amounts that are not folded yet."""
+        past = datetime.utcnow() - timedelta(minutes=1)
+        funded = make_project("funded", status="financing", funding_goal=100, funding_current=40, financing_end=past)
+        short = make_project("short", status="financing", funding_goal=100, funding_current=40, financing_end=past)
+        open_ended = make_project("donations", status="financing", financing_end=past)
+        pledges.add_pledge(db_session, funded.id, None, Decimal("30.00"))
+        pledge_queue.enqueue(db_session, funded.id, None, Decimal("30.00"))
+        db_session.commit()
+
+        assert lifecycle.run(db_session) == {"started": 0, "ended": 3}
+        for project in (funded, short, open_ended):
+            db_session.refresh(project)
+        assert funded.status == "ended_success"
+        assert short.status == "ended_failed"
+        assert open_ended.status == "ended_success"
+        subjects = sorted(subject for _, subject in _outbox(db_session))
+        assert subjects == [
+            "Die Finanzierungsphase von „Short“ ist beendet",
+            "Geschafft! „Donations“ ist erfolgreich finanziert",
+            "Geschafft! „Funded“ ist erfolgreich finanziert",
+        ]
+
+    def test_batches_until_done(self, db_session, make_project, monkeypatch):
+        """Test more due projects than one batch are all moved."""
+        past = datetime.utcnow() - timedelta(hours=1)
+        for n in range(5):
+            make_project(f"campaign-{n}", status="verified", start_date=past)
+
+        assert lifecycle.start_due_campaigns(db_session, batch_size=2) == 5
+        assert db_session.query(models.Project).filter(models.Project.status == "financing").count() == 5
+        assert lifecycle.start_due_campaigns(db_session, batch_size=2) == 0
+
+    def test_status_change_refreshes_listings(self, client, db_session, make_project):
+        """Test started campaigns appear in the cached featured listing."""
+        make_project("soon", status="verified", start_date=datetime.utcnow() - timedelta(seconds=1))
+        assert client.get("/api/projects/featured").json() == []
+
+        lifecycle.run(db_session)
+        assert [p["slug"] for p in client.get("/api/projects/featured").json()] == ["soon"]
+
+    def test_only_the_leader_runs(self, monkeypatch):
+        """Test workers that lost the election skip the job."""
+        monkeypatch.setattr(lifecycle.election, "is_leader", lambda: False)
+        assert lifecycle.run_job() == {"leader": False}
+
+    def test_due_queries_use_partial_indexes(self, db_session):
+        """Test both due queries can be served by their partial index."""
+        for index, column, status in (
+            ("ix_projects_verified_start_date", "start_date", "verified"),
+            ("ix_projects_financing_financing_end", "financing_end", "financing"),
+        ):
+            # INDEXED BY fails if the partial index cannot serve the query
+            plan = db_session.execute(text(
+                f"EXPLAIN QUERY PLAN SELECT id FROM projects INDEXED BY {index} "
+                f"WHERE status = '{status}' AND {column} <= '2030-01-01' ORDER BY {column}"
+            )).fetchall()
+            assert not any("TEMP B-TREE" in row[-1] for row in plan)
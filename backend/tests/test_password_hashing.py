@@ -0,0 +1,106 @@
+"""Tests for the password hashing service."""
+from config import settings
+import models
+import password_hashing
+
+
+class TestPasswordHashing:
+    """Test hashing schemes and rehash detection."""
+
+    def test_bcrypt_roundtrip(self):
+        """Test bcrypt hashes verify and use the configured cost."""
+        hashed = password_hashing.hash_password("SecurePassword123!")
+        assert hashed.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+        assert password_hashing.verify_password("SecurePassword123!", hashed)
+        assert not password_hashing.verify_password("wrong", hashed)
+        assert not password_hashing.needs_rehash(hashed)
+
+    def test_bcrypt_cost_change_needs_rehash(self, monkeypatch):
+        """Test hashes with another bcrypt cost are flagged for rehash."""
+        hashed = password_hashing.hash_password("SecurePassword123!")
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", settings.BCRYPT_ROUNDS + 1)
+        assert password_hashing.needs_rehash(hashed)
+
+    def test_argon2id_roundtrip(self, monkeypatch):
+        """Test Argon2id hashes verify and bcrypt hashes still work."""
+        bcrypt_hash = password_hashing.hash_password("SecurePassword123!")
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "argon2id")
+        monkeypatch.setattr(settings, "ARGON2_MEMORY_COST_KIB", 1024)
+
+        hashed = password_hashing.hash_password("SecurePassword123!")
+        assert hashed.startswith("$argon2id$")
+        assert password_hashing.verify_password("SecurePassword123!", hashed)
+        assert not password_hashing.verify_password("wrong", hashed)
+        assert password_hashing.verify_password("SecurePassword123!", bcrypt_hash)
+        assert password_hashing.needs_rehash(bcrypt_hash)
+
+    def test_process_pool(self, monkeypatch):
+        """Test hashing through the process pool."""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+        try:
+            hashed = password_hashing.hash_password("SecurePassword123!")
+            assert password_hashing.verify_password("SecurePassword123!", hashed)
+            assert len(password_hashing.hash_passwords(["a" * 8, "b" * 8, "c" * 8])) == 3
+        finally:
+            password_hashing.shutdown()
+
+
+class TestRehashOnLogin:
+    """Test transparent hash upgrades on login."""
+
+    def test_login_upgrades_to_argon2id(self, client, registered_user, db_session, monkeypatch):
+        """Test a bcrypt hash is replaced by Argon2id after a successful login."""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "argon2id")
+        monkeypatch.setattr(settings, "ARGON2_MEMORY_COST_KIB", 1024)
+
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        assert response.status_code == 200
+
+        user = db_session.query(models.User).filter(models.User.email == registered_user["email"]).first()
+        db_session.refresh(user)
+        assert user.hashed_password.startswith("$argon2id$")
+
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"]
+        })
+        assert response.status_code == 200
+
+    def test_no_rehash_without_second_factor(self, client, registered_user, db_session, monkeypatch):
+        """Test a login that fails two-factor authentication leaves the stored hash alone."""
+        import pyotp
+
+        user = db_session.query(models.User).filter(models.User.email == registered_user["email"]).first()
+        user.two_factor_enabled = True
+        user.two_factor_secret = pyotp.random_base32()
+        db_session.commit()
+        old_hash = user.hashed_password
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "argon2id")
+        monkeypatch.setattr(settings, "ARGON2_MEMORY_COST_KIB", 1024)
+        import routers.auth
+        rehashed = []
+        real_hash = routers.auth.get_password_hash
+        monkeypatch.setattr(routers.auth, "get_password_hash", lambda password: rehashed.append(1) or real_hash(password))
+
+        for code in (None, "000000"):
+            response = client.post("/api/auth/login", json={
+                "email": registered_user["email"],
+                "password": registered_user["password"],
+                "two_factor_code": code
+            })
+            assert response.status_code in (401, 403)
+        db_session.refresh(user)
+        assert user.hashed_password == old_hash
+        assert rehashed == []
+
+        response = client.post("/api/auth/login", json={
+            "email": registered_user["email"],
+            "password": registered_user["password"],
+            "two_factor_code": pyotp.TOTP(user.two_factor_secret).now()
+        })
+        assert response.status_code == 200
+        db_session.refresh(user)
+        assert user.hashed_password.startswith("$argon2id$")
@@ -0,0 +1,216 @@
+"""Tests for pledges and the sharded funding counters."""
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy import update
+from config import settings
+import models
+import pledges
+import pledge_queue
+
+
+@pytest.fixture
+def financing_project(make_project):
+    return make_project("campaign", status="financing", funding_goal=1000, funding_current=100)
+
+
+class TestPledgeApi:
+    """Test the pledge endpoint."""
+
+    def test_pledge_is_queued_then_applied(self, client, auth_headers, financing_project, db_session):
+        """Test pledges are accepted as pending and count once a consumer applied them."""
+        for amount in ("25.50", "74.50"):
+            response = client.post("/api/projects/campaign/pledges", json={"amount": amount}, headers=auth_headers)
+            assert response.status_code == 202
+        queued = response.json()
+        assert queued["status"] == "pending"
+        assert queued["amount"] == 74.5
+        assert client.get("/api/projects/campaign").json()["funding_current"] == 100.0
+
+        assert pledge_queue.consume(db_session, pledge_queue.partition_of(financing_project.id)) == 2
+        assert client.get("/api/projects/campaign").json()["funding_current"] == 200.0
+
+        status = client.get(f"/api/projects/campaign/pledges/{queued['id']}", headers=auth_headers).json()
+        assert status["status"] == "applied"
+        assert db_session.get(models.Pledge, status["pledge_id"]).amount == Decimal("74.50")
+
+    def test_pledge_status_is_private(self, client, auth_headers, financing_project):
+        """Test only the backer can see a queued pledge."""
+        queued = client.post("/api/projects/campaign/pledges", json={"amount": "5"}, headers=auth_headers).json()
+        client.post("/api/auth/register", json={
+            "email": "other@example.com", "password": "OtherPassword123!", "full_name": "Other"
+        })
+        login = client.post("/api/auth/login", json={"email": "other@example.com", "password": "OtherPassword123!"})
+        other_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        assert client.get(f"/api/projects/campaign/pledges/{queued['id']}", headers=other_headers).status_code == 404
+        assert client.get(f"/api/projects/campaign/pledges/{queued['id']}", headers=auth_headers).status_code == 200
+
+    def test_pledge_requires_financing(self, client, auth_headers, db_session, financing_project):
+        """Test drafts and ended projects do not accept pledges."""
+        financing_project.status = "ended_success"
+        db_session.commit()
+        response = client.post("/api/projects/campaign/pledges", json={"amount": "10"}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_pledge_validation(self, client, auth_headers, financing_project):
+        """Test non-positive amounts and anonymous pledges are rejected."""
+        assert client.post("/api/projects/campaign/pledges", json={"amount": "0"}, headers=auth_headers).status_code == 422
+        assert client.post("/api/projects/campaign/pledges", json={"amount": "5"}).status_code == 401
+
+    def test_pledge_loads_the_current_user(self, client, auth_headers, db_session, financing_project):
+        """Test a backer deactivated after login cannot pledge on their token's claims."""
+        db_session.execute(update(models.User).where(models.User.email == "testuser@example.com").values(is_active=False))
+        db_session.commit()
+        response = client.post("/api/projects/campaign/pledges", json={"amount": "5"}, headers=auth_headers)
+        assert response.status_code == 400
+        assert db_session.query(models.QueuedPledge).count() == 0
+
+
+class TestFundingShards:
+    """Test striping and compaction."""
+
+    def test_pledges_spread_over_shards(self, db_session, financing_project, monkeypatch):
+        """Test concurrent pledges land on different counter rows."""
+        monkeypatch.setattr(settings, "FUNDING_SHARDS", 4)
+        for _ in range(40):
+            pledges.add_pledge(db_session, financing_project.id, None, Decimal("1.00"))
+        db_session.commit()
+
+        shards = db_session.query(models.FundingShard).filter(
+            models.FundingShard.project_id == financing_project.id
+        ).all()
+        assert 1 < len(shards) <= 4
+        assert sum(shard.amount for shard in shards) == Decimal("40.00")
+        assert db_session.query(models.Pledge).count() == 40
+
+    def test_compaction_folds_shards(self, db_session, financing_project):
+        """Test compaction moves shard totals into funding_current and the ratio."""
+        for amount in ("150.00", "250.00"):
+            pledges.add_pledge(db_session, financing_project.id, None, Decimal(amount))
+        db_session.commit()
+
+        assert pledges.compact(db_session) == 1
+        db_session.refresh(financing_project)
+        assert financing_project.funding_current == Decimal("500.00")
+        assert financing_project.funding_ratio == 0.5
+        assert pledges.unfolded_amount(db_session, financing_project.id) == 0
+        assert pledges.funding_total(db_session, financing_project) == 500.0
+
+        # Nothing left to fold
+        assert pledges.compact(db_session) == 0
+
+    def test_compaction_subtracts_only_what_it_read(self, db_session, financing_project, monkeypatch):
+        """Test a pledge landing after the shards were read is kept for the next round."""
+        pledges.add_pledge(db_session, financing_project.id, None, Decimal("10.00"))
+        db_session.commit()
+
+        real_execute = db_session.execute
+        state = {"late_pledge": False}
+
+        def execute(statement, *args, **kwargs):
+            result = real_execute(statement, *args, **kwargs)
+            if not state["late_pledge"] and str(statement).lstrip().startswith("SELECT"):
+                # Another backer pledges between the read and the fold
+                state["late_pledge"] = True
+                shards = models.FundingShard.__table__
+                real_execute(shards.update().values(amount=shards.c.amount + 5))
+            return result
+
+        monkeypatch.setattr(db_session, "execute", execute)
+        pledges.compact(db_session)
+        monkeypatch.undo()
+
+        db_session.refresh(financing_project)
+        assert financing_project.funding_current == Decimal("110.00")
+        assert pledges.unfolded_amount(db_session, financing_project.id) == Decimal("5.00")
+
+    def test_compaction_invalidates_listings(self, client, db_session, financing_project):
+        """Test the homepage shows compacted totals."""
+        assert client.get("/api/projects/featured").json()[0]["funding_current"] == 100.0
+        pledges.add_pledge(db_session, financing_project.id, None, Decimal("50.00"))
+        db_session.commit()
+        pledges.compact(db_session)
+        assert client.get("/api/projects/featured").json()[0]["funding_current"] == 150.0
+
+
+class TestPledgeQueue:
+    """Test partitioned consumers of the pledge queue."""
+
+    @pytest.fixture
+    def projects(self, make_project, financing_project, monkeypatch):
+        monkeypatch.setattr(settings, "PLEDGE_QUEUE_PARTITIONS", 2)
+        other = make_project("other", status="financing", funding_goal=1000, funding_current=0)
+        return financing_project, other
+
+    def test_entries_are_partitioned_by_project(self, db_session, projects):
+        """Test each consumer only applies its own partition."""
+        for project in projects:
+            pledge_queue.enqueue(db_session, project.id, None, Decimal("10.00"))
+        db_session.commit()
+        first, second = projects
+        assert pledge_queue.partition_of(first.id) != pledge_queue.partition_of(second.id)
+
+        assert pledge_queue.consume(db_session, pledge_queue.partition_of(first.id)) == 1
+        assert pledges.unfolded_amount(db_session, first.id) == Decimal("10.00")
+        assert pledges.unfolded_amount(db_session, second.id) == 0
+        assert db_session.query(models.QueuedPledge).filter(models.QueuedPledge.status == "pending").count() == 1
+
+    def test_batch_applies_in_submission_order(self, db_session, projects):
+        """Test a project's entries reach the ledger once, in queue order, with one shard update."""
+        project = projects[0]
+        for amount in ("1.00", "2.00", "3.00", "4.00", "5.00"):
+            pledge_queue.enqueue(db_session, project.id, None, Decimal(amount))
+        db_session.commit()
+
+        partition = pledge_queue.partition_of(project.id)
+        assert pledge_queue.consume(db_session, partition, batch_size=2) == 5
+        assert pledge_queue.consume(db_session, partition) == 0
+
+        ledger = db_session.query(models.Pledge).order_by(models.Pledge.id).all()
+        assert [pledge.amount for pledge in ledger] == [Decimal(f"{n}.00") for n in range(1, 6)]
+        # One shard row per applied batch of the project
+        assert db_session.query(models.FundingShard).count() <= 3
+        assert pledges.unfolded_amount(db_session, project.id) == Decimal("15.00")
+
+    def test_failed_apply_stays_pending(self, db_session, projects, monkeypatch):
+        """Test an entry whose apply fails is retried on the next run."""
+        project = projects[0]
+        pledge_queue.enqueue(db_session, project.id, None, Decimal("7.00"))
+        db_session.commit()
+        partition = pledge_queue.partition_of(project.id)
+
+        def fail(*args):
+            raise RuntimeError("shard table unavailable")
+
+        monkeypatch.setattr(pledges, "add_to_shard", fail)
+        assert pledge_queue.consume(db_session, partition) == 0
+        assert db_session.query(models.Pledge).count() == 0
+        monkeypatch.undo()
+
+        assert pledge_queue.consume(db_session, partition) == 1
+        assert pledges.unfolded_amount(db_session, project.id) == Decimal("7.00")
+
+    def test_purge_keeps_recent_entries(self, db_session, projects):
+        """Test applied entries are purged after the retention period only."""
+        project = projects[0]
+        pledge_queue.enqueue(db_session, project.id, None, Decimal("1.00"))
+        db_session.commit()
+        pledge_queue.consume(db_session, pledge_queue.partition_of(project.id))
+
+        assert pledge_queue.purge_applied(db_session) == 0
+        db_session.query(models.QueuedPledge).update({"applied_at": datetime.utcnow() - timedelta(days=2)})
+        db_session.commit()
+        assert pledge_queue.purge_applied(db_session) == 1
+
+    def test_lowered_partition_count_drains_orphans(self, db_session, projects):
+        """Test entries of partitions that lost their consumer are applied by consumer 0."""
+        project = projects[0]
+        # Enqueued while there were 8 partitions, then the count went down to 2
+        orphan = pledge_queue.enqueue(db_session, project.id, None, Decimal("1.00"))
+        orphan.partition = 7
+        db_session.commit()
+
+        assert pledge_queue.consume(db_session, 1) == 0
+        assert pledge_queue.consume(db_session, 0) == 1
+        assert pledges.unfolded_amount(db_session, project.id) == Decimal("1.00")
@@ -1,5 +1,9 @@
 """Tests for project endpoints."""
+from datetime import datetime, timedelta
 import pytest
+from sqlalchemy import text
+import models
+from pagination import NEXT_CURSOR_HEADER
 
 
 class TestProjects:
@@ -113,3 +117,125 @@ class TestProjectUpdate:
         # Verify it's deleted
         response = client.get(f"/api/projects/{created_project['slug']}")
         assert response.status_code == 404
+
+
+class TestProjectPagination:
+    """Test keyset pagination of project listings."""
+
+    @pytest.fixture
+    def published_projects(self, client, db_session, project_owner):
+        """Create 7 public projects; the last three share a created_at."""
+        owner = project_owner
+
+        base = datetime(2026, 1, 1)
+        created = [base + timedelta(days=i) for i in range(4)] + [base + timedelta(days=10)] * 3
+        for i, created_at in enumerate(created):
+            db_session.add(models.Project(
+                owner_id=owner.id, title=f"Project {i}", slug=f"project-{i}",
+                status="financing", project_type="crowdfunding", created_at=created_at
+            ))
+        db_session.add(models.Project(owner_id=owner.id, title="Draft", slug="draft", status="draft", created_at=base))
+        db_session.commit()
+        return [p.slug for p in db_session.query(models.Project).filter(
+            models.Project.status == "financing"
+        ).order_by(models.Project.created_at.desc(), models.Project.id.desc())]
+
+    def _walk(self, client, url, limit, headers=None):
+        pages = []
+        cursor = None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get(url, params=params, headers=headers)
+            assert response.status_code == 200
+            pages.append([p["slug"] for p in response.json()])
+            assert len(pages) <= 10, "cursor does not advance"
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return pages
+
+    def test_cursor_walks_all_projects_once(self, client, published_projects):
+        """Test following cursors returns every project once, newest first."""
+        pages = self._walk(client, "/api/projects", 3)
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert sum(pages, []) == published_projects
+
+    def test_new_project_does_not_shift_next_page(self, client, db_session, published_projects):
+        """Test a project published between pages does not repeat rows."""
+        first = client.get("/api/projects", params={"limit": 3})
+        project = db_session.query(models.Project).filter(models.Project.slug == "draft").first()
+        project.status = "financing"
+        project.created_at = datetime(2026, 6, 1)
+        db_session.commit()
+
+        second = client.get("/api/projects", params={"limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]})
+        assert [p["slug"] for p in second.json()] == published_projects[3:6]
+
+    def test_cursor_walks_server_default_timestamps(self, client, make_project):
+        """Test rows created in the same second without explicit timestamps page through once."""
+        for i in range(7):
+            make_project(f"p{i}", status="financing")
+        pages = self._walk(client, "/api/projects", 3)
+        assert sum(pages, []) == [f"p{i}" for i in reversed(range(7))]
+
+    def test_offset_mode_still_supported(self, client, published_projects):
+        """Test skip/limit keeps working for existing clients."""
+        response = client.get("/api/projects", params={"skip": 2, "limit": 2})
+        assert [p["slug"] for p in response.json()] == published_projects[2:4]
+
+    def test_invalid_cursor(self, client):
+        """Test a malformed cursor is rejected."""
+        response = client.get("/api/projects", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+    def test_admin_cursor_includes_drafts(self, client, admin_headers, published_projects):
+        """Test the admin listing pages through every status."""
+        pages = self._walk(client, "/api/admin/projects", 5, headers=admin_headers)
+        assert len(sum(pages, [])) == len(published_projects) + 1
+
+
+class TestFundingRatio:
+    """Test the maintained funding_ratio column."""
+
+    def test_orm_writes_keep_ratio(self, db_session, make_project):
+        """Test inserts and updates through the ORM set the ratio."""
+        project = make_project("a", status="financing", funding_current=250, funding_goal=1000)
+        assert project.funding_ratio == 0.25
+
+        project.funding_current = 900
+        db_session.commit()
+        assert project.funding_ratio == 0.9
+
+        project.funding_goal = None
+        db_session.commit()
+        assert project.funding_ratio is None
+
+    def test_sql_writes_keep_ratio(self, db_session, make_project):
+        """Test the trigger recomputes the ratio for writes outside the ORM."""
+        project = make_project("a", status="financing", funding_current=0, funding_goal=200)
+        db_session.execute(
+            models.Project.__table__.update().where(models.Project.id == project.id).values(
+                funding_current=models.Project.funding_current + 150
+            )
+        )
+        db_session.commit()
+        db_session.refresh(project)
+        assert project.funding_ratio == 0.75
+
+    def test_near_goal_uses_ratio_index(self, client, db_session, make_project):
+        """Test the near-goal listing orders by ratio from the partial index."""
+        make_project("almost", status="financing", funding_current=950, funding_goal=1000)
+        make_project("close", status="financing", funding_current=800, funding_goal=1000)
+        make_project("far", status="financing", funding_current=100, funding_goal=1000)
+        make_project("draft", status="draft", funding_current=990, funding_goal=1000)
+
+        response = client.get("/api/projects/near-goal")
+        assert [p["slug"] for p in response.json()] == ["almost", "close"]
+
+        # INDEXED BY fails if the partial index cannot serve the query
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM projects INDEXED BY ix_projects_financing_funding_ratio "
+            "WHERE status = 'financing' AND funding_ratio >= 0.8 ORDER BY funding_ratio DESC"
+        )).fetchall()
+        assert not any("TEMP B-TREE" in row[-1] for row in plan)
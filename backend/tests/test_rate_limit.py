@@ -0,0 +1,86 @@
+"""Tests for the rate limiter."""
+import pytest
+from config import settings
+import rate_limit
+
+
+class TestRateParsing:
+    """Test rate strings from settings."""
+
+    def test_parse_rate(self):
+        """Test counts, units and multiplied periods."""
+        assert rate_limit.parse_rate("5/minute") == rate_limit.Rate(5, 60)
+        assert rate_limit.parse_rate("3/15minutes") == rate_limit.Rate(3, 900)
+        assert rate_limit.parse_rate("10/hour") == rate_limit.Rate(10, 3600)
+
+    def test_invalid_rate(self):
+        """Test malformed rates are rejected."""
+        with pytest.raises(ValueError):
+            rate_limit.parse_rate("five per minute")
+        with pytest.raises(ValueError):
+            rate_limit.parse_rate("0/minute")
+
+
+class TestBackends:
+    """Test GCRA bursts and refill in both backends."""
+
+    def test_memory_backend(self):
+        """Test a burst is allowed and the next request must wait."""
+        backend = rate_limit.MemoryBackend()
+        rate = rate_limit.Rate(3, 60)
+        assert [backend.hit(None, "k", rate) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert 0 < backend.hit(None, "k", rate) <= 20
+        assert backend.hit(None, "other", rate) == 0.0
+
+    def test_database_backend(self, db_session):
+        """Test the shared backend limits with a single upsert per request."""
+        backend = rate_limit.DatabaseBackend()
+        rate = rate_limit.Rate(2, 60)
+        assert backend.hit(db_session, "k", rate) == 0.0
+        assert backend.hit(db_session, "k", rate) == 0.0
+        assert 0 < backend.hit(db_session, "k", rate) <= 30
+
+
+class TestRouteLimits:
+    """Test limits attached to routes."""
+
+    def test_login_limited_per_email(self, client, registered_user, monkeypatch):
+        """Test failed logins for one email are throttled with Retry-After."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_PER_EMAIL", "2/minute")
+        for _ in range(2):
+            response = client.post("/api/auth/login", json={"email": registered_user["email"], "password": "wrong"})
+            assert response.status_code == 401
+
+        response = client.post("/api/auth/login", json={"email": registered_user["email"], "password": "wrong"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+
+        response = client.post("/api/auth/login", json={"email": "other@example.com", "password": "wrong"})
+        assert response.status_code == 401
+
+    def test_shared_backend_on_route(self, client, monkeypatch):
+        """Test the database backend on a route."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "database")
+        monkeypatch.setattr(settings, "RATE_LIMIT_EMAIL_PER_IP", "1/hour")
+        response = client.post("/api/auth/magic-link/request", json={"email": "a@example.com"})
+        assert response.status_code == 200
+        response = client.post("/api/auth/magic-link/request", json={"email": "b@example.com"})
+        assert response.status_code == 429
+
+    def test_anonymous_ai_limited_per_ip(self, client, monkeypatch):
+        """Test rotating session_id does not escape the anonymous AI limit."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_AI_ANONYMOUS_PER_IP", "2/hour")
+        statuses = [
+            client.post("/api/ai-coach/generate", json={"prompt": "Hallo", "session_id": f"session-{i}"}).status_code
+            for i in range(3)
+        ]
+        assert 429 not in statuses[:2]
+        assert statuses[2] == 429
+
+    def test_disabled(self, client, registered_user, monkeypatch):
+        """Test an empty setting disables the limit."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_PER_EMAIL", "")
+        monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_PER_IP", "")
+        for _ in range(15):
+            response = client.post("/api/auth/login", json={"email": registered_user["email"], "password": "wrong"})
+            assert response.status_code == 401
@@ -0,0 +1,86 @@
+"""Tests for the homepage response cache."""
+import threading
+import time
+import pytest
+import models
+import response_cache
+
+
+class TestResponseCache:
+    """Test caching and invalidation of homepage listings."""
+
+    @pytest.fixture
+    def homepage(self, project_owner, make_project):
+        for i, (status, current) in enumerate([("financing", 900), ("financing", 100), ("ended_success", 5000)]):
+            make_project(f"project-{i}", title=f"Project {i}", status=status, funding_goal=1000, funding_current=current)
+        return project_owner
+
+    def test_featured_served_from_cache(self, client, homepage, monkeypatch):
+        """Test repeated requests do not query again."""
+        first = client.get("/api/projects/featured")
+        assert [p["slug"] for p in first.json()] == ["project-0", "project-1"]
+
+        hits = response_cache._cache.hits
+        second = client.get("/api/projects/featured")
+        assert second.content == first.content
+        assert response_cache._cache.hits == hits + 1
+
+    def test_funding_change_invalidates(self, client, db_session, homepage):
+        """Test a funding change re-orders the cached listings."""
+        assert [p["slug"] for p in client.get("/api/projects/near-goal").json()] == ["project-0"]
+
+        project = db_session.query(models.Project).filter(models.Project.slug == "project-1").first()
+        project.funding_current = 950
+        db_session.commit()
+
+        assert [p["slug"] for p in client.get("/api/projects/near-goal").json()] == ["project-1", "project-0"]
+        assert [p["slug"] for p in client.get("/api/projects/featured").json()] == ["project-1", "project-0"]
+
+    def test_status_change_via_admin_invalidates(self, client, admin_headers, homepage):
+        """Test an admin status change updates the leaderboards."""
+        assert client.get("/api/profiles/starters/successful").json()[0]["successful_projects_count"] == 1
+
+        project_id = client.get("/api/projects/featured").json()[0]["id"]
+        response = client.patch(
+            f"/api/admin/projects/{project_id}", json={"status": "ended_success"}, headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        assert client.get("/api/profiles/starters/successful").json()[0]["successful_projects_count"] == 2
+        assert [p["slug"] for p in client.get("/api/projects/featured").json()] == ["project-1"]
+
+    def test_unlisted_field_keeps_cache(self, client, db_session, homepage):
+        """Test edits to columns the listings do not show keep the entries."""
+        client.get("/api/projects/featured")
+        entries = len(response_cache._cache)
+
+        project = db_session.query(models.Project).filter(models.Project.slug == "project-0").first()
+        project.description = "A longer description"
+        db_session.commit()
+        assert len(response_cache._cache) == entries
+
+    def test_owner_rename_invalidates_entries_showing_them(self, client, db_session, homepage):
+        """Test a starter's new name shows up in the leaderboard."""
+        client.get("/api/profiles/starters/all")
+        homepage.full_name = "Renamed Owner"
+        db_session.commit()
+        assert client.get("/api/profiles/starters/all").json()[0]["full_name"] == "Renamed Owner"
+
+    def test_single_flight_on_miss(self, client):
+        """Test concurrent misses for one key compute once."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return [{"id": 1}]
+
+        threads = [
+            threading.Thread(target=response_cache.cached_json, args=("test", (), 60, list, compute, lambda item: []))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
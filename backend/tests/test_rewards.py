@@ -0,0 +1,270 @@
+"""Tests for reward tiers and atomic reservations."""
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from database import Base
+import models
+import pledge_queue
+import rewards
+
+
+def _backers(db, count: int) -> list[int]:
+    users = [
+        models.User(email=f"backer{n}@example.com", hashed_password="x", full_name="Backer", profile_slug=f"backer-{n}")
+        for n in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+@pytest.fixture
+def campaign(registered_user, db_session, make_project):
+    owner = db_session.query(models.User).filter(models.User.email == registered_user["email"]).first()
+    return make_project("campaign", owner_id=owner.id, status="financing", funding_goal=1000, funding_current=0)
+
+
+@pytest.fixture
+def tier(db_session, campaign):
+    tier = models.RewardTier(project_id=campaign.id, title="Poster", amount=Decimal("20.00"), quantity=2, reserved=0)
+    db_session.add(tier)
+    db_session.commit()
+    return tier
+
+
+class TestRewardTierApi:
+    """Test managing and reserving reward tiers."""
+
+    def _other_headers(self, client, email="other@example.com"):
+        client.post("/api/auth/register", json={
+            "email": email, "password": "OtherPassword123!", "full_name": "Other"
+        })
+        login = client.post("/api/auth/login", json={"email": email, "password": "OtherPassword123!"})
+        return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def test_owner_creates_tiers(self, client, auth_headers, campaign):
+        """Test tiers are listed cheapest first with remaining stock."""
+        for title, amount, quantity in (("Tasse", "50", 10), ("Postkarte", "5", None)):
+            response = client.post("/api/projects/campaign/rewards", json={
+                "title": title, "amount": amount, "quantity": quantity
+            }, headers=auth_headers)
+            assert response.status_code == 201
+
+        tiers = client.get("/api/projects/campaign/rewards").json()
+        assert [(t["title"], t["remaining"]) for t in tiers] == [("Postkarte", None), ("Tasse", 10)]
+
+    def test_only_owner_creates_tiers(self, client, campaign, admin_headers, db_session):
+        """Test other users cannot add tiers."""
+        other_headers = self._other_headers(client)
+        payload = {"title": "Poster", "amount": "20"}
+
+        assert client.post("/api/projects/campaign/rewards", json=payload, headers=other_headers).status_code == 403
+        assert client.post("/api/projects/campaign/rewards", json=payload, headers=admin_headers).status_code == 201
+
+    def test_reserve_until_sold_out(self, client, auth_headers, tier):
+        """Test reservations take stock and the last one is refused."""
+        url = f"/api/projects/campaign/rewards/{tier.id}/reservations"
+        for headers in (auth_headers, self._other_headers(client)):
+            response = client.post(url, headers=headers)
+            assert response.status_code == 201
+            assert response.json()["status"] == "held"
+
+        third = self._other_headers(client, "third@example.com")
+        response = client.post(url, headers=third)
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Reward is sold out"
+        assert client.get("/api/projects/campaign/rewards").json()[0]["remaining"] == 0
+
+    def test_one_hold_per_backer(self, client, auth_headers, tier):
+        """Test a backer cannot stack holds on a tier, but can reserve again after releasing."""
+        url = f"/api/projects/campaign/rewards/{tier.id}/reservations"
+        reservation = client.post(url, headers=auth_headers).json()
+
+        response = client.post(url, headers=auth_headers)
+        assert response.status_code == 409
+        assert "already hold" in response.json()["detail"]
+        assert client.get("/api/projects/campaign/rewards").json()[0]["remaining"] == 1
+
+        client.delete(f"/api/projects/campaign/rewards/reservations/{reservation['id']}", headers=auth_headers)
+        assert client.post(url, headers=auth_headers).status_code == 201
+
+    def test_release_returns_stock(self, client, auth_headers, tier):
+        """Test a released hold can be reserved again, once."""
+        reservation = client.post(f"/api/projects/campaign/rewards/{tier.id}/reservations", headers=auth_headers).json()
+        url = f"/api/projects/campaign/rewards/reservations/{reservation['id']}"
+
+        assert client.delete(url, headers=auth_headers).status_code == 204
+        assert client.delete(url, headers=auth_headers).status_code == 404
+        assert client.get("/api/projects/campaign/rewards").json()[0]["remaining"] == 2
+
+    def test_writes_load_the_current_user(self, client, auth_headers, admin_headers, tier, db_session):
+        """Test a demoted admin or deactivated backer is refused despite their token's claims."""
+        db_session.execute(update(models.User).where(models.User.email == "admin@test.com").values(is_admin=False))
+        db_session.execute(update(models.User).where(models.User.email == "testuser@example.com").values(is_active=False))
+        db_session.commit()
+
+        payload = {"title": "Poster", "amount": "20"}
+        assert client.post("/api/projects/campaign/rewards", json=payload, headers=admin_headers).status_code == 403
+        assert client.post(
+            f"/api/projects/campaign/rewards/{tier.id}/reservations", headers=auth_headers
+        ).status_code == 400
+
+    def test_pledge_claims_reservation(self, client, auth_headers, tier, db_session):
+        """Test a pledge claims the hold and records the tier in the ledger."""
+        reservation = client.post(f"/api/projects/campaign/rewards/{tier.id}/reservations", headers=auth_headers).json()
+
+        too_low = {"amount": "10", "reservation_id": reservation["id"]}
+        assert client.post("/api/projects/campaign/pledges", json=too_low, headers=auth_headers).status_code == 400
+
+        pledge = {"amount": "25", "reservation_id": reservation["id"]}
+        response = client.post("/api/projects/campaign/pledges", json=pledge, headers=auth_headers)
+        assert response.status_code == 202
+        assert response.json()["reward_tier_id"] == tier.id
+        # A claimed reservation cannot be used twice or released
+        assert client.post("/api/projects/campaign/pledges", json=pledge, headers=auth_headers).status_code == 409
+        assert client.delete(
+            f"/api/projects/campaign/rewards/reservations/{reservation['id']}", headers=auth_headers
+        ).status_code == 404
+
+        pledge_queue.consume(db_session, pledge_queue.partition_of(tier.project_id))
+        assert db_session.query(models.Pledge).one().reward_tier_id == tier.id
+        assert client.get("/api/projects/campaign/rewards").json()[0]["remaining"] == 1
+
+
+class TestReservationExpiry:
+    """Test lapsed holds go back to stock exactly once."""
+
+    def _lapse(self, db_session):
+        db_session.query(models.RewardReservation).update({"expires_at": datetime.utcnow() - timedelta(minutes=1)})
+        db_session.commit()
+
+    def test_expiry_job_returns_stock(self, db_session, tier, campaign):
+        """Test expire() frees lapsed holds and a late claim fails."""
+        reservation = rewards.reserve(db_session, tier.id, campaign.owner_id)
+        db_session.commit()
+        self._lapse(db_session)
+
+        assert rewards.claim(db_session, reservation) is False
+        assert rewards.expire(db_session) == 1
+        assert rewards.expire(db_session) == 0
+        db_session.commit()
+        db_session.refresh(tier)
+        assert tier.reserved == 0
+
+    def test_sold_out_tier_reclaims_lapsed_holds(self, db_session, tier, campaign):
+        """Test a reservation succeeds on lapsed stock before the job has run."""
+        backers = _backers(db_session, 3)
+        for backer in backers[:2]:
+            rewards.reserve(db_session, tier.id, backer)
+        db_session.commit()
+        assert rewards.reserve(db_session, tier.id, backers[2]) is None
+        db_session.rollback()
+
+        self._lapse(db_session)
+        assert rewards.reserve(db_session, tier.id, backers[2]) is not None
+        db_session.commit()
+        db_session.refresh(tier)
+        assert tier.reserved == 1
+
+    def test_lapsed_own_hold_makes_room(self, db_session, tier, campaign):
+        """Test a backer whose hold lapsed can reserve again before the job has run."""
+        first = rewards.reserve(db_session, tier.id, campaign.owner_id)
+        db_session.commit()
+        with pytest.raises(rewards.AlreadyHeld) as exc_info:
+            rewards.reserve(db_session, tier.id, campaign.owner_id)
+        assert exc_info.value.reservation_id == first.id
+        db_session.rollback()
+
+        self._lapse(db_session)
+        assert rewards.reserve(db_session, tier.id, campaign.owner_id) is not None
+        db_session.commit()
+        db_session.refresh(tier)
+        assert tier.reserved == 1
+
+
+class TestConcurrentReservations:
+    """Stress reservations against a file database shared by many connections."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'rewards.db'}",
+            connect_args={"check_same_thread": False, "timeout": 60},
+            pool_size=20, max_overflow=0, pool_timeout=60
+        )
+        Base.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+    def _reserve_concurrently(self, engine, quantity, attempts, same_backer=False):
+        Session = sessionmaker(bind=engine, autoflush=False)
+        db = Session()
+        owner = models.User(email="owner@example.com", hashed_password="x", full_name="Owner", profile_slug="owner")
+        db.add(owner)
+        db.flush()
+        project = models.Project(owner_id=owner.id, title="Campaign", slug="campaign", status="financing")
+        db.add(project)
+        db.flush()
+        tier = models.RewardTier(project_id=project.id, title="Limited", amount=Decimal("10"), quantity=quantity)
+        db.add(tier)
+        db.commit()
+        tier_id = tier.id
+        user_ids = _backers(db, 1) * attempts if same_backer else _backers(db, attempts)
+        db.close()
+
+        start = threading.Barrier(attempts)
+        outcomes = []
+
+        def backer(user_id):
+            session = Session()
+            try:
+                start.wait()
+                try:
+                    reservation = rewards.reserve(session, tier_id, user_id)
+                except rewards.AlreadyHeld:
+                    reservation = None
+                if reservation is None:
+                    session.rollback()
+                else:
+                    session.commit()
+                outcomes.append(reservation is not None)
+            except Exception as e:
+                outcomes.append(e)
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=backer, args=(user_id,)) for user_id in user_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        db = Session()
+        tier = db.get(models.RewardTier, tier_id)
+        held = db.query(models.RewardReservation).filter(models.RewardReservation.tier_id == tier_id).count()
+        db.close()
+        return outcomes, tier.reserved, held
+
+    def test_hundreds_of_backers_never_oversell(self, engine):
+        """Test 300 concurrent reservations on 50 units yield exactly 50 holds."""
+        outcomes, reserved, held = self._reserve_concurrently(engine, quantity=50, attempts=300)
+        assert [o for o in outcomes if isinstance(o, Exception)] == []
+        assert outcomes.count(True) == 50
+        assert reserved == held == 50
+
+    def test_last_unit_goes_to_one_backer(self, engine):
+        """Test a single unit is won by exactly one of 200 racing backers."""
+        outcomes, reserved, held = self._reserve_concurrently(engine, quantity=1, attempts=200)
+        assert [o for o in outcomes if isinstance(o, Exception)] == []
+        assert outcomes.count(True) == 1
+        assert reserved == held == 1
+
+    def test_racing_requests_of_one_backer_hold_one_unit(self, engine):
+        """Test 50 concurrent reservations by one backer leave one hold and one reserved unit."""
+        outcomes, reserved, held = self._reserve_concurrently(engine, quantity=10, attempts=50, same_backer=True)
+        assert [o for o in outcomes if isinstance(o, Exception)] == []
+        assert outcomes.count(True) == 1
+        assert reserved == held == 1
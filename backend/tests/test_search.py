@@ -0,0 +1,101 @@
+"""Tests for full-text project search."""
+import pytest
+import models
+from pagination import NEXT_CURSOR_HEADER
+from text_search import search, search_terms, stem
+
+
+class TestSearchTerms:
+    """Test folding and stemming of indexed text."""
+
+    def test_umlauts_fold_like_slugs(self):
+        """Test umlauts and ß are spelled out as in slugs."""
+        assert search_terms("Fahrräder") == search_terms("FAHRRAEDER")
+        assert search_terms("Straße") == search_terms("strasse")
+
+    def test_plural_and_case_endings(self):
+        """Test common German endings reduce to the same stem."""
+        assert stem("projekte") == stem("projekten") == stem("projekts") == "projekt"
+        assert stem("kinder") == stem("kindes") == "kind"
+        assert search_terms(None) == ""
+
+
+class TestProjectSearch:
+    """Test the search endpoint."""
+
+    @pytest.fixture
+    def projects(self, make_project):
+
+        rows = [
+            ("fahrrad-werkstatt", "Fahrräder für alle", "Eine offene Werkstatt", "financing", "crowdfunding"),
+            ("gemeinschaftsgarten", "Gemeinschaftsgarten", "Wir reparieren auch Fahrraeder", "financing", "fundraising"),
+            ("buchladen", "Buchladen im Kiez", "Bücher und Lesungen", "verified", "crowdfunding"),
+            ("geheim", "Fahrräder Entwurf", "Noch nicht öffentlich", "draft", "crowdfunding"),
+        ]
+        for slug, title, short, status, project_type in rows:
+            make_project(
+                slug, title=title, short_description=short,
+                description=f"{title}. {short}.", status=status, project_type=project_type
+            )
+
+    def _slugs(self, response):
+        assert response.status_code == 200
+        return [p["slug"] for p in response.json()]
+
+    def test_title_matches_rank_first(self, client, projects):
+        """Test folded terms match and title hits outrank description hits."""
+        response = client.get("/api/projects/search", params={"q": "fahrraeder"})
+        assert self._slugs(response) == ["fahrrad-werkstatt", "gemeinschaftsgarten"]
+
+    def test_umlaut_query_and_stemming(self, client, projects):
+        """Test the query is folded and stemmed like the documents."""
+        response = client.get("/api/projects/search", params={"q": "Bücher"})
+        assert self._slugs(response) == ["buchladen"]
+
+    def test_filters(self, client, projects):
+        """Test status and project_type filters."""
+        response = client.get("/api/projects/search", params={"q": "fahrräder", "project_type": "fundraising"})
+        assert self._slugs(response) == ["gemeinschaftsgarten"]
+
+        response = client.get("/api/projects/search", params={"q": "fahrräder", "status": "draft"})
+        assert self._slugs(response) == []
+
+    def test_cursor_pages_through_results(self, client, projects):
+        """Test keyset pagination over ranked results."""
+        first = client.get("/api/projects/search", params={"q": "fahrräder", "limit": 1})
+        assert self._slugs(first) == ["fahrrad-werkstatt"]
+
+        second = client.get("/api/projects/search", params={
+            "q": "fahrräder", "limit": 1, "cursor": first.headers[NEXT_CURSOR_HEADER]
+        })
+        assert self._slugs(second) == ["gemeinschaftsgarten"]
+        assert NEXT_CURSOR_HEADER not in second.headers
+
+    def test_index_follows_updates_and_deletes(self, client, db_session, projects):
+        """Test edits and deletes are reflected without a reindex."""
+        project = db_session.query(models.Project).filter(models.Project.slug == "buchladen").first()
+        project.title = "Comicladen"
+        project.short_description = "Comics"
+        project.description = "Comics"
+        db_session.commit()
+        assert self._slugs(client.get("/api/projects/search", params={"q": "bücher"})) == []
+        assert self._slugs(client.get("/api/projects/search", params={"q": "comics"})) == ["buchladen"]
+
+        db_session.delete(project)
+        db_session.commit()
+        assert self._slugs(client.get("/api/projects/search", params={"q": "comics"})) == []
+
+    def test_query_without_terms(self, client, projects):
+        """Test punctuation-only queries return nothing."""
+        assert self._slugs(client.get("/api/projects/search", params={"q": "?!"})) == []
+
+    def test_postgres_cursor_compares_as_real(self):
+        """Test the cursor score is cast to ts_rank's float4 on PostgreSQL."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.orm import Session
+
+        session = Session(create_engine("postgresql://localhost/unused"))
+        query = search(session.query(models.Project), models.Project, "garten", (0.0607927, 12))
+        sql = str(query.statement.compile(dialect=postgresql.dialect()))
+        assert "CAST(%(param_1)s AS REAL)" in sql
@@ -0,0 +1,96 @@
+"""Tests for slug generation and unique slug allocation."""
+import pytest
+import models
+import slugs
+from slugs import SlugTaken, add_with_unique_slug, next_free_slug, slugify
+
+
+def _user(db_session, email, profile_slug=None):
+    user = models.User(email=email, hashed_password="x", full_name="Anna", profile_slug=profile_slug, is_active=True)
+    if profile_slug:
+        db_session.add(user)
+        db_session.commit()
+    return user
+
+
+class TestSlugify:
+    """Test slug generation."""
+
+    def test_umlauts_and_accents(self):
+        """Test umlauts and accents are transliterated."""
+        assert slugify("Grüne Straße für Café") == "gruene-strasse-fuer-cafe"
+
+    def test_strips_separators(self):
+        """Test leading, trailing and repeated separators collapse."""
+        assert slugify("  --Hello,   World!--  ") == "hello-world"
+        assert slugify("") == ""
+
+
+class TestUniqueSlugs:
+    """Test allocation against the unique index."""
+
+    def test_next_free_slug_fills_gaps(self, client, db_session):
+        """Test the lowest free suffix is returned from one prefix query."""
+        for i, slug in enumerate(["anna", "anna-1", "anna-3", "anna-banana"]):
+            _user(db_session, f"u{i}@example.com", slug)
+
+        assert next_free_slug(db_session, models.User.profile_slug, "anna") == "anna-2"
+        assert next_free_slug(db_session, models.User.profile_slug, "bob") == "bob"
+
+    def test_prefix_wildcards_are_escaped(self, client, db_session):
+        """Test LIKE wildcards in the base do not match other slugs."""
+        _user(db_session, "a@example.com", "a-b")
+        assert next_free_slug(db_session, models.User.profile_slug, "_") == "_"
+
+    def test_retries_when_slug_taken_concurrently(self, client, db_session, monkeypatch):
+        """Test a slug taken between lookup and insert is retried with the next one."""
+        _user(db_session, "first@example.com", "anna")
+        real_next_free_slug = slugs.next_free_slug
+        calls = []
+
+        def stale_lookup(db, column, base, exclude_id=None):
+            # The first lookup ran before the concurrent insert committed
+            calls.append(base)
+            return base if len(calls) == 1 else real_next_free_slug(db, column, base, exclude_id)
+
+        monkeypatch.setattr(slugs, "next_free_slug", stale_lookup)
+        user = _user(db_session, "second@example.com")
+
+        assert add_with_unique_slug(db_session, user, models.User.profile_slug, "anna") == "anna-1"
+        db_session.commit()
+        assert user.profile_slug == "anna-1"
+        assert len(calls) == 2
+
+    def test_exact_slug_taken_raises(self, client, db_session):
+        """Test exact allocation reports the taken slug and a suggestion."""
+        _user(db_session, "first@example.com", "anna")
+        user = _user(db_session, "second@example.com")
+
+        with pytest.raises(SlugTaken) as exc:
+            add_with_unique_slug(db_session, user, models.User.profile_slug, "anna", exact=True)
+        assert exc.value.suggestion == "anna-1"
+
+    def test_register_same_name_gets_suffix(self, client, db_session):
+        """Test two users with the same name get distinct profile slugs."""
+        for email in ("one@example.com", "two@example.com"):
+            response = client.post("/api/auth/register", json={
+                "email": email,
+                "password": "SecurePassword123!",
+                "full_name": "Test User"
+            })
+            assert response.status_code in [200, 201]
+
+        profile_slugs = [row[0] for row in db_session.query(models.User.profile_slug).order_by(models.User.id)]
+        assert profile_slugs == ["test-user", "test-user-1"]
+
+    def test_create_project_with_taken_slug(self, client, auth_headers):
+        """Test a taken project slug is rejected with a suggestion."""
+        project_data = {"title": "Taken", "slug": "taken", "short_description": "x", "description": "x"}
+        assert client.post("/api/projects/", json=project_data, headers=auth_headers).status_code in [200, 201]
+
+        response = client.post("/api/projects/", json=project_data, headers=auth_headers)
+        assert response.status_code == 400
+        assert "'taken-1'" in response.json()["detail"]
+
+        response = client.get("/api/projects/suggest-slug", params={"title": "Taken"}, headers=auth_headers)
+        assert response.json()["slug"] == "taken-1"
@@ -0,0 +1,28 @@
+"""Tests for two-factor authentication setup."""
+import base64
+import pyotp
+
+
+class TestTwoFactorSetup:
+    """Test 2FA setup and QR code rendering."""
+
+    def test_setup_returns_svg_qr_code(self, client, auth_headers):
+        """Test setup returns an SVG data URL for the secret."""
+        response = client.post("/api/2fa/setup", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["qr_code_url"].startswith("data:image/svg+xml;base64,")
+        svg = base64.b64decode(data["qr_code_url"].split(",", 1)[1]).decode("utf-8")
+        assert "<svg" in svg
+
+    def test_repeated_setup_reuses_pending_secret(self, client, auth_headers):
+        """Test a second setup attempt returns the same secret and cached QR code."""
+        first = client.post("/api/2fa/setup", headers=auth_headers).json()
+        second = client.post("/api/2fa/setup", headers=auth_headers).json()
+        assert first == second
+
+    def test_enable_with_code(self, client, auth_headers):
+        """Test the pending secret can be confirmed with a TOTP code."""
+        secret = client.post("/api/2fa/setup", headers=auth_headers).json()["secret"]
+        response = client.post("/api/2fa/verify", headers=auth_headers, json={"code": pyotp.TOTP(secret).now()})
+        assert response.status_code == 200
@@ -0,0 +1,119 @@
+"""Tests for the typeahead prefix index."""
+import threading
+import time
+import pytest
+import models
+import typeahead
+
+
+class TestTypeahead:
+    """Test prefix lookups and incremental updates."""
+
+    @pytest.fixture
+    def indexed(self, client, db_session):
+        starter = models.User(
+            email="anna@example.com", hashed_password="x", full_name="Anna Müller",
+            profile_slug="anna-mueller", is_starter=True, is_active=True
+        )
+        db_session.add(starter)
+        db_session.flush()
+        for slug, title, status in [
+            ("urbaner-garten-nord", "Urbaner Garten Nord", "financing"),
+            ("garage-band", "Garage Band Tour", "verified"),
+            ("garten-entwurf", "Garten Entwurf", "draft"),
+        ]:
+            db_session.add(models.Project(owner_id=starter.id, title=title, slug=slug, status=status))
+        db_session.commit()
+        return starter
+
+    def _labels(self, client, q, **params):
+        response = client.get("/api/projects/typeahead", params={"q": q, **params})
+        assert response.status_code == 200
+        return [item["label"] for item in response.json()]
+
+    def test_prefix_of_title_and_inner_word(self, client, indexed):
+        """Test title starts rank before inner words and drafts are hidden."""
+        assert self._labels(client, "ga") == ["Garage Band Tour", "Urbaner Garten Nord"]
+        assert self._labels(client, "nor") == ["Urbaner Garten Nord"]
+        assert self._labels(client, "tour") == ["Garage Band Tour"]
+
+    def test_starters_with_folded_umlauts(self, client, indexed):
+        """Test starter names match with folded umlauts."""
+        response = client.get("/api/projects/typeahead", params={"q": "Mül"})
+        assert response.json() == [
+            {"kind": "starter", "id": indexed.id, "label": "Anna Müller", "slug": "anna-mueller"}
+        ]
+        assert self._labels(client, "anna", kind="project") == []
+
+    def test_incremental_updates(self, client, db_session, indexed):
+        """Test published, renamed and deleted projects update the index."""
+        assert self._labels(client, "garten e") == []
+        rebuilds = typeahead.index.rebuilds
+
+        draft = db_session.query(models.Project).filter(models.Project.slug == "garten-entwurf").first()
+        draft.status = "financing"
+        db_session.commit()
+        assert self._labels(client, "garten e") == ["Garten Entwurf"]
+
+        project = db_session.query(models.Project).filter(models.Project.slug == "garage-band").first()
+        project.title = "Proberaum"
+        db_session.commit()
+        assert self._labels(client, "tour") == []
+        assert self._labels(client, "probe") == ["Proberaum"]
+
+        db_session.delete(project)
+        db_session.commit()
+        assert self._labels(client, "probe") == []
+        assert typeahead.index.rebuilds == rebuilds
+
+    def test_lookup_is_fast_and_reports_stats(self, client, db_session, indexed):
+        """Test lookups stay well under a millisecond with a few thousand items."""
+        db_session.add_all([
+            models.Project(owner_id=indexed.id, title=f"Projekt Nummer {i}", slug=f"projekt-{i}", status="financing")
+            for i in range(3000)
+        ])
+        db_session.commit()
+        typeahead.clear()
+        self._labels(client, "projekt")
+
+        started = time.perf_counter()
+        for _ in range(200):
+            typeahead.index.lookup(db_session, "projekt nummer 12", limit=8)
+        assert (time.perf_counter() - started) / 200 < 0.001
+
+        stats = typeahead.index.stats()
+        assert stats["items"] == 3003
+        assert stats["approx_memory_bytes"] > 0
+        assert stats["last_rebuild_ms"] >= 0
+
+    def test_ranks_matches_past_the_first_keys(self, client, db_session, indexed):
+        """Test a whole-title match wins even behind hundreds of inner-word keys."""
+        db_session.add_all([
+            models.Project(owner_id=indexed.id, title=f"Zentrum Gartenbau {i:03}", slug=f"zentrum-{i}",
+                           status="financing")
+            for i in range(300)
+        ])
+        db_session.add(models.Project(owner_id=indexed.id, title="Gartenhaus", slug="gartenhaus", status="financing"))
+        db_session.commit()
+        typeahead.clear()
+        assert self._labels(client, "garten")[0] == "Gartenhaus"
+
+    def test_concurrent_first_lookups_build_once(self, db_session, indexed, monkeypatch):
+        """Test lookups racing on an empty index share a single rebuild."""
+        typeahead.clear()
+        real_rebuild = typeahead.index.rebuild
+
+        def slow_rebuild(db):
+            time.sleep(0.05)
+            real_rebuild(db)
+
+        monkeypatch.setattr(typeahead.index, "rebuild", slow_rebuild)
+        rebuilds = typeahead.index.rebuilds
+        threads = [
+            threading.Thread(target=typeahead.index.lookup, args=(db_session, "garten")) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert typeahead.index.rebuilds == rebuilds + 1
@@ -0,0 +1,163 @@
+"""
+Full-text search over project title, short description and description.
+
+Text is folded like slugs (lowercase, ä -> ae, é -> e, ...), so "Fahrraeder"
+and "Fahrräder" match each other. The index is maintained by the database,
+so every write path (ORM, bulk SQL, admin edits) keeps it current:
+
+- PostgreSQL: ``projects.search_vector`` is set by a trigger from
+  ``to_tsvector('german', search_fold(...))`` with the title weighted
+  highest, and is searched through a GIN index.
+- SQLite (development and tests): triggers keep the contentless FTS5 table
+  ``projects_fts`` in sync, using a light German stemmer registered on each
+  connection as ``search_terms()``.
+
+Results are ranked (``ts_rank`` / ``bm25``) and paged with a
+``(score, id)`` keyset cursor.
+"""
+import re
+import sqlite3
+from typing import Optional
+from sqlalchemy import DDL, REAL, cast, event, func, literal, literal_column, table, column, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+from slugs import TRANSLITERATIONS, transliterate
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Relative weight of matches in title, short_description and description
+# (ts_rank's defaults for the A, B and C labels set by the trigger)
+WEIGHTS = (1.0, 0.4, 0.2)
+
+
+def stem(word: str) -> str:
+    """Light German stemmer: strips common plural and case endings."""
+    if len(word) > 5 and word.endswith("nen"):
+        return word[:-3]
+    if len(word) > 4 and word[-2:] in ("en", "er", "es", "se"):
+        return word[:-2]
+    if len(word) > 3 and word[-1] in "enrs":
+        return word[:-1]
+    return word
+
+
+def search_terms(text: Optional[str]) -> str:
+    """Folded, stemmed terms of ``text`` separated by spaces."""
+    if not text:
+        return ""
+    return " ".join(stem(token) for token in _TOKEN.findall(transliterate(text)))
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("search_terms", 1, search_terms, deterministic=True)
+
+
+def _fold_sql(expression: str) -> str:
+    for char, replacement in TRANSLITERATIONS.items():
+        expression = f"replace({expression}, '{char}', '{replacement}')"
+    return expression
+
+
+# Shared with the migration so both create the same objects
+POSTGRES_DDL = [
+    f"""
+    CREATE OR REPLACE FUNCTION search_fold(value text) RETURNS text AS $$
+        SELECT {_fold_sql("lower(coalesce(value, ''))")}
+    $$ LANGUAGE sql IMMUTABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION projects_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('german', search_fold(NEW.title)), 'A') ||
+            setweight(to_tsvector('german', search_fold(NEW.short_description)), 'B') ||
+            setweight(to_tsvector('german', search_fold(NEW.description)), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER projects_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, short_description, description ON projects
+    FOR EACH ROW EXECUTE FUNCTION projects_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_projects_search_vector ON projects USING gin (search_vector)",
+]
+
+_FTS_COLUMNS = "title, short_description, description"
+_FTS_NEW = "search_terms(new.title), search_terms(new.short_description), search_terms(new.description)"
+_FTS_OLD_DELETE = (
+    f"INSERT INTO projects_fts(projects_fts, rowid, {_FTS_COLUMNS}) VALUES ('delete', old.id, "
+    "search_terms(old.title), search_terms(old.short_description), search_terms(old.description));"
+)
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5({_FTS_COLUMNS}, content='')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_fts_insert AFTER INSERT ON projects BEGIN
+        INSERT INTO projects_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_fts_delete AFTER DELETE ON projects BEGIN
+        {_FTS_OLD_DELETE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS projects_fts_update AFTER UPDATE OF {_FTS_COLUMNS} ON projects BEGIN
+        {_FTS_OLD_DELETE}
+        INSERT INTO projects_fts(rowid, {_FTS_COLUMNS}) VALUES (new.id, {_FTS_NEW});
+    END
+    """,
+]
+
+
+def install(projects_table) -> None:
+    """Create the search index objects whenever ``projects_table`` is created."""
+    for statement in POSTGRES_DDL:
+        event.listen(projects_table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_DDL:
+        event.listen(projects_table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        projects_table, "before_drop",
+        DDL("DROP TABLE IF EXISTS projects_fts").execute_if(dialect="sqlite")
+    )
+
+
+def search(query: Query, model, text: str, cursor: Optional[tuple[float, int]] = None) -> Optional[Query]:
+    """
+    Restrict ``query`` (over ``model``, i.e. Project) to rows matching
+    ``text``, best matches first. Rows come back as (model, score).
+    Returns None when ``text`` has no searchable terms.
+    """
+    dialect = query.session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        folded = " ".join(_TOKEN.findall(transliterate(text)))
+        if not folded:
+            return None
+        tsquery = func.plainto_tsquery("german", folded)
+        score = func.ts_rank(model.search_vector, tsquery)
+        query = query.add_columns(score.label("score")).filter(model.search_vector.op("@@")(tsquery))
+    else:
+        terms = search_terms(text).split()
+        if not terms:
+            return None
+        fts = table("projects_fts", column("rowid"))
+        # bm25() is lower-is-better, so it is negated to sort like ts_rank
+        score = -func.bm25(literal_column("projects_fts"), *WEIGHTS)
+        query = query.add_columns(score.label("score")).join(
+            fts, fts.c.rowid == model.id
+        ).filter(
+            literal_column("projects_fts").op("MATCH")(" ".join(f'"{term}"' for term in terms))
+        )
+
+    if cursor:
+        cursor_score, cursor_id = cursor
+        if dialect == "postgresql":
+            # ts_rank is float4: compare at that precision, or boundary rows repeat or go missing
+            cursor_score = cast(literal(cursor_score), REAL)
+        query = query.filter(tuple_(score, model.id) < tuple_(cursor_score, cursor_id))
+    return query.order_by(score.desc(), model.id.desc())
@@ -1,7 +1,11 @@
-import pyotp
-import qrcode
-import io
 import base64
+import pyotp
+from cache import TTLCache
+from metrics import register_collector
+
+# Provisioning URI -> QR code data URL, so repeated setup attempts with the
+# same pending secret don't re-render the code
+_qr_code_cache = TTLCache(max_entries=256, default_ttl=600)
 
 
 def generate_2fa_secret() -> str:
@@ -20,15 +24,22 @@ def generate_qr_code(secret: str, email: str) -> str:
         issuer_name="Startnext Prototype"
     )
 
-    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    cached = _qr_code_cache.get(provisioning_uri)
+    if cached is not None:
+        return cached
+
+    # Imported lazily: only needed during 2FA setup
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=4, image_factory=SvgPathImage)
     qr.add_data(provisioning_uri)
     qr.make(fit=True)
 
-    img = qr.make_image(fill_color="black", back_color="white")
+    svg = qr.make_image().to_string(encoding="unicode")
+    data_url = f"data:image/svg+xml;base64,{base64.b64encode(svg.encode('utf-8')).decode()}"
+    _qr_code_cache.set(provisioning_uri, data_url)
+    return data_url
 
-    buffer = io.BytesIO()
-    img.save(buffer)
-    buffer.seek(0)
 
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
-    return f"data:image/png;base64,{img_base64}"
+register_collector("qr_code_cache", _qr_code_cache.stats)
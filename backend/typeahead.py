@@ -0,0 +1,233 @@
+"""
+In-memory prefix index for search-as-you-type.
+
+Public projects (title and slug) and starters (full name and profile slug)
+are indexed under normalized keys: the slug form of the text (lowercase,
+umlauts spelled out, words joined by "-") starting at each of its words, so
+"nor" finds "Urbaner Garten Nord" through its last word. The keys
+live in one sorted list and a lookup is two binary searches plus a scan of
+the matching range, which is ranked in full up to ``MAX_SCAN`` entries.
+
+The index is built once per worker (at startup, or on the first lookup)
+and then kept current incrementally: project and user changes published on
+the invalidation topics mark ids as pending, and the next lookup reloads
+just those rows. A ``{"all": True}`` reset schedules a full rebuild.
+"""
+import bisect
+import sys
+import threading
+import time
+from typing import Optional
+from sqlalchemy.orm import Session
+from auth_cache import USERS_TOPIC
+from metrics import register_collector
+from project_events import PROJECTS_TOPIC, changed_fields
+from slugs import slugify
+import invalidation
+import models
+
+PUBLIC_STATUSES = ("verified", "financing", "ended_success", "ended_failed")
+
+KIND_PROJECT = "project"
+KIND_STARTER = "starter"
+
+# Keys start at each of the first MAX_WORDS words of a text
+MAX_WORDS = 8
+
+# Entries ranked per lookup. A prefix matching more keys than this (one or
+# two letters on a large index) only ranks the alphabetically first ones;
+# each entry costs about a microsecond under the index lock.
+MAX_SCAN = 2000
+
+# Project columns that affect what is indexed
+INDEXED_FIELDS = frozenset({"title", "slug", "status"})
+
+
+def _keys(*texts: Optional[str]) -> set[str]:
+    keys = set()
+    for text in texts:
+        words = slugify(text or "").split("-")
+        for position in range(min(len(words), MAX_WORDS)):
+            key = "-".join(words[position:])
+            if key:
+                keys.add(key)
+    return keys
+
+
+class PrefixIndex:
+    def __init__(self):
+        # Sorted (key, kind, id) tuples
+        self._entries: list[tuple[str, str, int]] = []
+        # (kind, id) -> (label, slug, keys, key of the whole label)
+        self._items: dict[tuple[str, int], tuple[str, str, set[str], str]] = {}
+        self._lock = threading.Lock()
+        # Held for a full rebuild, so concurrent first lookups load the index once
+        self._rebuild_lock = threading.Lock()
+        self._loaded = False
+        self._pending: dict[str, set[int]] = {KIND_PROJECT: set(), KIND_STARTER: set()}
+        self.lookups = 0
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+        self.incremental_updates = 0
+
+    @staticmethod
+    def _load_projects(db: Session, ids: Optional[set[int]] = None) -> list:
+        query = db.query(models.Project.id, models.Project.title, models.Project.slug).filter(
+            models.Project.status.in_(PUBLIC_STATUSES)
+        )
+        if ids is not None:
+            query = query.filter(models.Project.id.in_(ids))
+        return [(KIND_PROJECT, row.id, row.title, row.slug, _keys(row.title, row.slug)) for row in query]
+
+    @staticmethod
+    def _load_starters(db: Session, ids: Optional[set[int]] = None) -> list:
+        query = db.query(models.User.id, models.User.full_name, models.User.profile_slug).filter(
+            models.User.is_active.is_(True),
+            models.User.is_starter.is_(True),
+            models.User.profile_slug.isnot(None)
+        )
+        if ids is not None:
+            query = query.filter(models.User.id.in_(ids))
+        return [(KIND_STARTER, row.id, row.full_name, row.profile_slug, _keys(row.full_name, row.profile_slug))
+                for row in query]
+
+    def rebuild(self, db: Session) -> None:
+        """Load every public project and starter into a fresh index."""
+        started = time.perf_counter()
+        with self._lock:
+            # Changes published from here on are applied after the swap
+            for ids in self._pending.values():
+                ids.clear()
+
+        rows = self._load_projects(db) + self._load_starters(db)
+        entries = sorted((key, kind, item_id) for kind, item_id, _, _, keys in rows for key in keys)
+        items = {(kind, item_id): (label, slug, keys, slugify(label)) for kind, item_id, label, slug, keys in rows}
+
+        with self._lock:
+            self._entries = entries
+            self._items = items
+            self._loaded = True
+            self.rebuilds += 1
+            self.rebuild_seconds = time.perf_counter() - started
+
+    def _remove(self, kind: str, item_id: int) -> None:
+        item = self._items.pop((kind, item_id), None)
+        if item is None:
+            return
+        for key in item[2]:
+            position = bisect.bisect_left(self._entries, (key, kind, item_id))
+            if position < len(self._entries) and self._entries[position] == (key, kind, item_id):
+                del self._entries[position]
+
+    def _apply_pending(self, db: Session) -> None:
+        with self._lock:
+            project_ids = self._pending[KIND_PROJECT]
+            starter_ids = self._pending[KIND_STARTER]
+            if not project_ids and not starter_ids:
+                return
+            self._pending = {KIND_PROJECT: set(), KIND_STARTER: set()}
+
+        rows = []
+        if project_ids:
+            rows += self._load_projects(db, project_ids)
+        if starter_ids:
+            rows += self._load_starters(db, starter_ids)
+
+        with self._lock:
+            # Rows that are gone or no longer public are simply not re-added
+            for item_id in project_ids:
+                self._remove(KIND_PROJECT, item_id)
+            for item_id in starter_ids:
+                self._remove(KIND_STARTER, item_id)
+            for kind, item_id, label, slug, keys in rows:
+                self._items[(kind, item_id)] = (label, slug, keys, slugify(label))
+                for key in keys:
+                    bisect.insort(self._entries, (key, kind, item_id))
+            self.incremental_updates += len(project_ids) + len(starter_ids)
+
+    def mark_changed(self, kind: str, ids) -> None:
+        with self._lock:
+            self._pending[kind].update(ids)
+
+    def invalidate(self) -> None:
+        """Drop everything; the next lookup rebuilds the index."""
+        with self._lock:
+            self._loaded = False
+            self._entries = []
+            self._items = {}
+
+    def lookup(self, db: Session, text: str, limit: int = 8, kind: Optional[str] = None) -> list[dict]:
+        """Items with a word starting with ``text``, whole-text matches first."""
+        if not self._loaded:
+            with self._rebuild_lock:
+                if not self._loaded:
+                    self.rebuild(db)
+        self._apply_pending(db)
+
+        prefix = slugify(text)
+        if not prefix:
+            return []
+
+        with self._lock:
+            self.lookups += 1
+            start = bisect.bisect_left(self._entries, (prefix,))
+            end = bisect.bisect_left(self._entries, (prefix + "\uffff",), lo=start)
+            candidates = {}
+            for key, entry_kind, item_id in self._entries[start:min(end, start + MAX_SCAN)]:
+                if kind and entry_kind != kind:
+                    continue
+                label, _, _, label_key = self._items[(entry_kind, item_id)]
+                # Matches at the start of the title or name rank before inner words
+                rank = (key != label_key, len(label))
+                candidates[(entry_kind, item_id)] = min(rank, candidates.get((entry_kind, item_id), rank))
+
+            best = sorted(candidates.items(), key=lambda item: item[1])[:limit]
+            return [
+                {"kind": entry_kind, "id": item_id, "label": self._items[(entry_kind, item_id)][0],
+                 "slug": self._items[(entry_kind, item_id)][1]}
+                for (entry_kind, item_id), _ in best
+            ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries
+            memory = sys.getsizeof(entries) + sum(
+                sys.getsizeof(entry) + sys.getsizeof(entry[0]) for entry in entries
+            ) + sys.getsizeof(self._items)
+            return {
+                "items": len(self._items),
+                "keys": len(entries),
+                "approx_memory_bytes": memory,
+                "rebuilds": self.rebuilds,
+                "last_rebuild_ms": round(self.rebuild_seconds * 1000, 2),
+                "incremental_updates": self.incremental_updates,
+                "lookups": self.lookups,
+            }
+
+
+index = PrefixIndex()
+
+
+def clear() -> None:
+    """Drop the index in this worker (it is rebuilt on the next lookup)."""
+    index.invalidate()
+
+
+def _on_projects_changed(payload: dict) -> None:
+    if payload.get("all"):
+        index.invalidate()
+        return
+    if changed_fields(payload) & INDEXED_FIELDS:
+        index.mark_changed(KIND_PROJECT, payload.get("project_ids", []))
+
+
+def _on_users_changed(payload: dict) -> None:
+    if payload.get("all"):
+        index.invalidate()
+        return
+    index.mark_changed(KIND_STARTER, payload.get("user_ids", []))
+
+
+invalidation.subscribe(PROJECTS_TOPIC, _on_projects_changed)
+invalidation.subscribe(USERS_TOPIC, _on_users_changed)
+register_collector("typeahead", index.stats)